@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Asyncio Probe Engine
+===================================================
+
+Asyncio backend for the probe engine. Every site request of every active
+search runs on one shared event loop, so a single process can serve many
+concurrent streaming searches without holding a thread per search.
+
+probe_pairs_async() yields exactly the same results as
+engine.probe_pairs(). Its sync adapter probe_pairs() runs it on the
+shared loop, so the search pipeline, and with it the Flask routes and
+the command-line tool, can use this backend unchanged.
+
+Requires aiohttp (pip install aiohttp).
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from itertools import islice
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from engine import (CANCEL_POLL, DEFAULT_WORKERS, HEADERS, classify, error_result, not_allowed_result,
+                    skipped_result)
+from dnscache import resolve_result
+from health import TRANSIENT_STATUS
+from http_pool import CHUNK_SIZE, DEFAULT_POOL_MAXSIZE, KEEPALIVE_TIMEOUT
+from manifest import CheckType
+from matcher import BodyScanner
+from metrics import ProbeTrace
+from ratelimit import THROTTLED_STATUS, parse_retry_after
+from tiers import GET, HEAD, INCONCLUSIVE_STATUS, RANGE, covers_body, range_header
+
+# Connections the shared loop keeps open in total
+CONNECTION_LIMIT = 200
+
+_DONE = object()
+
+
+def trace_config():
+    """
+    aiohttp hooks recording DNS and connect time into the ProbeTrace passed as trace_request_ctx.
+
+    aiohttp does not report the TLS handshake separately, it is part of "connect".
+    """
+    config = aiohttp.TraceConfig()
+
+    async def dns_start(session, context, params):
+        context.dns_started = time.perf_counter()
+
+    async def dns_end(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx.span("dns", time.perf_counter() - context.dns_started)
+
+    async def connect_start(session, context, params):
+        context.connect_started = time.perf_counter()
+        if context.trace_request_ctx is not None:
+            context.opened = context.trace_request_ctx.connection_time()
+
+    async def connect_end(session, context, params):
+        trace = context.trace_request_ctx
+        if trace is not None:
+            # Name resolution happens inside connection setup, leave it out
+            resolving = trace.connection_time() - context.opened
+            trace.span("connect", time.perf_counter() - context.connect_started - resolving)
+
+    config.on_dns_resolvehost_start.append(dns_start)
+    config.on_dns_resolvehost_end.append(dns_end)
+    config.on_connection_create_start.append(connect_start)
+    config.on_connection_create_end.append(connect_end)
+    return config
+
+
+def cached_resolver(dns):
+    """aiohttp resolver answering from a DnsCache, lookups it does not have yet run on a worker thread"""
+
+    class CachedResolver(aiohttp.abc.AbstractResolver):
+        async def resolve(self, host, port=0, family=0):
+            infos = dns.resolve(host, port, family, block=False)
+            if infos is None:
+                infos = await asyncio.get_running_loop().run_in_executor(None, dns.resolve, host, port, family)
+            if not infos:
+                raise OSError(f"{host} has no address for family {family}")
+            return [resolve_result(info, host) for info in infos]
+
+        async def close(self):
+            pass
+
+    return CachedResolver()
+
+
+class _Failure:
+    """Wraps an exception raised on the loop so the sync side can re-raise it"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class ProbeLoop:
+    """Background event loop and HTTP session shared by every search"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self.dns = None
+
+    def use_dns(self, dns):
+        """Resolve hosts through a DnsCache, takes effect for sessions opened afterwards"""
+        self.dns = dns
+
+    @property
+    def loop(self):
+        """The running event loop, started on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name="probe-loop", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    async def session(self):
+        """The shared aiohttp session, must be awaited on the loop"""
+        if aiohttp is None:
+            raise RuntimeError("The asyncio backend requires aiohttp (pip install aiohttp)")
+        if self._session is None or self._session.closed:
+            resolver = {} if self.dns is None else {"resolver": cached_resolver(self.dns), "use_dns_cache": False}
+            connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT,
+                                             limit_per_host=DEFAULT_POOL_MAXSIZE,
+                                             keepalive_timeout=KEEPALIVE_TIMEOUT, **resolver)
+            # Like HttpPool, keep no cookies: one search must not affect the next
+            self._session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar(),
+                                                  trace_configs=[trace_config()])
+        return self._session
+
+    def close(self):
+        """Close the shared session, called at interpreter exit"""
+        if self._session is not None and not self._session.closed:
+            self.submit(self._session.close()).result(timeout=5)
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def iterate(self, agen_func, *args, **kwargs):
+        """
+        Consume an async generator on the loop from synchronous code.
+
+        Closing the returned generator cancels the async one, so
+        abandoned searches stop sending requests.
+        """
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen_func(*args, **kwargs):
+                    items.put(item)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                items.put(_Failure(e))
+            finally:
+                items.put(_DONE)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            future.cancel()
+
+
+probe_loop = ProbeLoop()
+atexit.register(probe_loop.close)
+
+
+async def fetch_async(session, site, url, headers, timeout=None, on_error=None, trace=None, tier=GET):
+    """Async version of engine.fetch, returns (result, transient, retry_after)"""
+    started = time.perf_counter()
+    opened = trace.connection_time() if trace is not None else 0.0
+    if tier == HEAD:
+        request = session.head(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout),
+                               allow_redirects=True, trace_request_ctx=trace)
+    else:
+        if tier == RANGE:
+            headers = {**headers, "Range": range_header(site)}
+        request = session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout),
+                              trace_request_ctx=trace)
+    try:
+        async with request as r:
+            headers_at = time.perf_counter()
+            if trace is not None:
+                trace.status_code = r.status
+                trace.span("ttfb", headers_at - started - (trace.connection_time() - opened))
+
+            # A 429 page is not a profile, whatever the check type says
+            if r.status == THROTTLED_STATUS:
+                return (error_result(site.name, url, "Rate limited (429)"), True,
+                        parse_retry_after(r.headers.get("Retry-After")))
+            if r.status in TRANSIENT_STATUS:
+                return (error_result(site.name, url, f"Server error ({r.status})"), True,
+                        parse_retry_after(r.headers.get("Retry-After")))
+            if tier != GET and r.status in INCONCLUSIVE_STATUS:
+                return None, False, None
+
+            matched = None
+            if site.check is CheckType.MESSAGE:
+                # Only read the body until one of the site's markers shows up
+                scanner = BodyScanner(site.matcher_for(r.charset), site.max_bytes)
+                try:
+                    async for chunk in r.content.iter_chunked(CHUNK_SIZE):
+                        if trace is not None:
+                            trace.bytes += len(chunk)
+                        if scanner.feed(chunk):
+                            break
+                finally:
+                    if trace is not None:
+                        trace.span("body", time.perf_counter() - headers_at)
+                matched = scanner.matched
+                # Part of the page without a marker, the rest may still have one
+                if matched is None and r.status == 206 and not covers_body(r.headers.get("Content-Range")):
+                    return None, False, None
+            return classify(site, url, r.status, str(r.url), matched), False, None
+    except asyncio.TimeoutError as errt:
+        if on_error:
+            on_error(errt, "Timeout Error:", site.name)
+        return error_result(site.name, url, "Connection error"), False, None
+    except aiohttp.ClientConnectionError as errc:
+        if on_error:
+            on_error(errc, "Error Connecting:", site.name)
+        return error_result(site.name, url, "Connection error"), True, None
+    except aiohttp.ClientError as err:
+        if on_error:
+            on_error(err, "Unknown error:", site.name)
+        return error_result(site.name, url, "Connection error"), False, None
+
+
+async def check_site_async(session, site, username, headers=HEADERS, timeout=None, on_error=None, health=None,
+                           limiter=None, owner=None, metrics=None, tiers=None):
+    """Async version of engine.check_site"""
+    if metrics is None:
+        return await _check_site_async(session, site, username, headers, timeout, on_error, health, limiter,
+                                       owner, None, tiers)
+
+    def report(err, errstr, social_network):
+        metrics.record_error(social_network, errstr)
+        if on_error:
+            on_error(err, errstr, social_network)
+
+    trace = ProbeTrace()
+    metrics.probe_started()
+    started = time.monotonic()
+    try:
+        result = await _check_site_async(session, site, username, headers, timeout, report, health, limiter,
+                                         owner, trace, tiers)
+    except asyncio.CancelledError:
+        metrics.in_flight.dec()
+        raise
+    metrics.probe_finished(site.name, result, time.monotonic() - started, trace)
+    return result
+
+
+async def take_turn_async(limiter, site, owner, trace=None):
+    """Async version of engine.take_turn"""
+    waited = await limiter.acquire_async(site.host, owner)
+    if trace is not None:
+        trace.span("wait", waited)
+    return waited
+
+
+async def fetch_tiered_async(session, site, url, headers, timeout=None, on_error=None, trace=None, tiers=None,
+                             limiter=None, owner=None):
+    """Async version of engine.fetch_tiered"""
+    if tiers is None:
+        return (*await fetch_async(session, site, url, headers, timeout, on_error, trace), 0.0)
+
+    tier, verify = tiers.plan(site)
+    if tier == GET:
+        return (*await fetch_async(session, site, url, headers, timeout, on_error, trace), 0.0)
+
+    cheap, transient, retry_after = await fetch_async(session, site, url, headers, timeout, on_error, trace, tier)
+    if cheap is not None and (cheap["status"] == "error" or not verify):
+        if cheap["status"] != "error":
+            tiers.record(site, tier, cheap)
+        return cheap, transient, retry_after, 0.0
+
+    waited = await take_turn_async(limiter, site, owner, trace) if limiter is not None else 0.0
+    full, transient, retry_after = await fetch_async(session, site, url, headers, timeout, on_error, trace)
+    if full["status"] != "error":
+        tiers.record(site, tier, cheap, full)
+    return full, transient, retry_after, waited
+
+
+async def _check_site_async(session, site, username, headers, timeout, on_error, health, limiter, owner, trace,
+                            tiers):
+    try:
+        url = site.url_for(username)
+
+        if not site.allows(username):
+            return not_allowed_result(site.name)
+
+        if health is None:
+            if limiter is not None:
+                await take_turn_async(limiter, site, owner, trace)
+            result, _, retry_after, _ = await fetch_tiered_async(session, site, url, headers, timeout, on_error,
+                                                                 trace, tiers, limiter, owner)
+            if limiter is not None and retry_after is not None:
+                limiter.penalize(site.host, retry_after)
+            return result
+
+        if not health.allow(site.name):
+            return skipped_result(site.name, url, health.retry_in(site.name))
+
+        timeout = health.timeout_for(site.name, timeout)
+        failures = []
+        retry_after = None
+        for attempt in range(1 + health.retries):
+            if attempt:
+                delay = health.delay(attempt - 1)
+                # With a limiter the whole host is paused instead, see penalize()
+                if limiter is None and retry_after is not None:
+                    delay = max(delay, retry_after)
+                await asyncio.sleep(delay)
+            if limiter is not None:
+                await take_turn_async(limiter, site, owner, trace)
+            started = time.monotonic()
+            result, transient, retry_after, waited = await fetch_tiered_async(
+                session, site, url, headers, timeout, lambda *error: failures.append(error), trace, tiers, limiter,
+                owner)
+            if limiter is not None and retry_after is not None:
+                limiter.penalize(site.host, retry_after)
+            if not transient:
+                break
+
+        if result["status"] == "error":
+            health.record_failure(site.name)
+            # Only the last failure is worth reporting
+            if on_error and failures:
+                on_error(*failures[-1])
+        else:
+            # Request time only, a fallback's wait for its limiter turn would inflate the adaptive timeout
+            health.record_success(site.name, time.monotonic() - started - waited)
+        return result
+
+    except Exception as e:
+        return error_result(site.name, "", f"Error: {str(e)}")
+
+
+async def probe_pairs_async(pairs, max_workers=DEFAULT_WORKERS, headers=HEADERS, timeout=None, on_error=None,
+                            session=None, health=None, limiter=None, owner=None, metrics=None, cancel=None,
+                            tiers=None):
+    """
+    Check (username, site) pairs concurrently on the current event loop.
+
+    Takes the same arguments as engine.probe_pairs() and yields the same
+    (username, index, result) tuples in completion order. No more than
+    max_workers probes are in flight; pairs are pulled as they finish.
+    session is accepted for compatibility and ignored, the loop keeps its
+    own pooled session.
+    """
+    client = await probe_loop.session()
+    pairs = iter(pairs)
+    workers = max(1, max_workers)
+    pending = {}
+    if owner is None:
+        owner = object()
+    poll = None if cancel is None else CANCEL_POLL
+
+    def fill():
+        for username, site in islice(pairs, workers - len(pending)):
+            task = asyncio.ensure_future(check_site_async(client, site, username, headers, timeout,
+                                                         on_error, health, limiter, owner, metrics, tiers))
+            pending[task] = (username, site.index)
+
+    try:
+        fill()
+        while pending:
+            # cancel is a threading.Event set from another thread, so it is polled
+            if cancel is not None and cancel.is_set():
+                return
+            done, _ = await asyncio.wait(pending, timeout=poll, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                username, index = pending.pop(task)
+                yield username, index, task.result()
+            fill()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def probe_pairs(pairs, **kwargs):
+    """Sync adapter for probe_pairs_async(), a drop-in for engine.probe_pairs()"""
+    return probe_loop.iterate(probe_pairs_async, pairs, **kwargs)
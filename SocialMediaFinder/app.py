@@ -12,358 +12,317 @@ Repository: sherlok-finds
 """
 
 from flask import Flask, render_template, request, jsonify, send_file, Response
-import json
+import atexit
+import logging
 import os
 import requests
 import threading
 import time
+import uuid
 from datetime import datetime
 
+import aio_engine
+import engine
+from cache import MemoryBackend, ResultCache, SQLiteBackend
+from dnscache import DnsCache
+from encoder import MIMETYPES, EventEncoder, encodings
+from engine import batch_events, events
+from health import HealthTracker
+from http_pool import HttpPool
+from incremental import DEFAULT_MAX_AGE, recheck, site_hashes
+from jobs import FINISHED, JobManager, MemoryJobStore, SQLiteJobStore
+from manifest import ManifestError
+from metrics import ProbeMetrics
+from pipeline import Pipeline, SharedProbes, collect
+from ratelimit import load_rate_limits
+from serving import Saturated, SearchExecutor
+from singleflight import SingleFlight
+from tiers import TierTracker
+from variants import expand_usernames
+from workers import AUTHKEY_ENV, Dispatcher, ManagerBroker, parse_address, start_local_workers
+from writers import FORMATS, open_writer
+
 app = Flask(__name__)
 
-# Import the sherlock functions
-def write_to_file(url, filename):
-    """Write found URL to file"""
-    with open(filename, "a") as f:
-        f.write(url + "\n")
+# Number of sites checked at the same time for one search
+MAX_WORKERS = int(os.environ.get("SHERLOCK_WORKERS", "20"))
+
+# Probes running at the same time for one /search-batch request, across all its usernames
+BATCH_WORKERS = int(os.environ.get("SHERLOCK_BATCH_WORKERS", "50"))
+
+# Most usernames accepted by one /search-batch request
+MAX_BATCH_USERNAMES = int(os.environ.get("SHERLOCK_MAX_BATCH", "5000"))
+
+# Seconds to wait for a single site before giving up
+REQUEST_TIMEOUT = float(os.environ.get("SHERLOCK_TIMEOUT", "10"))
+
+# Completed searches are also saved to SHERLOCK_OUTPUT_DIR when set, one file per username (per
+# request for /search-batch), as SHERLOCK_OUTPUT_FORMAT: "jsonl" (default), "csv", "sqlite" or "txt"
+OUTPUT_DIR = os.environ.get("SHERLOCK_OUTPUT_DIR")
+OUTPUT_FORMAT = os.environ.get("SHERLOCK_OUTPUT_FORMAT", "jsonl")
+if OUTPUT_FORMAT not in FORMATS:
+    OUTPUT_FORMAT = "jsonl"
+
+# Streamed responses send the events arriving within SHERLOCK_STREAM_WINDOW milliseconds of each
+# other as one chunk, ?window= sets it per request up to MAX_STREAM_WINDOW; 0 sends every event at once
+STREAM_WINDOW = float(os.environ.get("SHERLOCK_STREAM_WINDOW", "0"))
+MAX_STREAM_WINDOW = 1000
+
+# Per-site adaptive timeouts (never above REQUEST_TIMEOUT), retries and circuit breakers
+site_health = HealthTracker(default_timeout=REQUEST_TIMEOUT, max_timeout=REQUEST_TIMEOUT)
+
+# Requests per second per host, shared by every search: ratelimits.json first, then "rateLimit" in data.json
+rate_limiter = load_rate_limits(os.environ.get("SHERLOCK_RATE_LIMITS", "ratelimits.json"))
+
+# Per-site HEAD / Range / GET tier, learned while searching and kept in SHERLOCK_TIERS ("off" always sends a GET)
+TIERS_PATH = os.environ.get("SHERLOCK_TIERS", "tiers.json")
+site_tiers = None if TIERS_PATH == "off" else TierTracker(TIERS_PATH)
+if site_tiers is not None:
+    atexit.register(site_tiers.save, force=True)
+
+# "threads" (default), "asyncio" to run every search on one shared event loop, or "workers" to
+# run every probe on worker processes (see workers.py): those of the broker at
+# SHERLOCK_WORKERS_ADDRESS ("host:port", authenticated with SHERLOCK_WORKERS_AUTHKEY), or
+# without an address SHERLOCK_WORKER_PROCESSES workers started by the app, one per CPU by default
+BACKEND = os.environ.get("SHERLOCK_BACKEND", "threads")
+if BACKEND == "workers":
+    if os.environ.get("SHERLOCK_WORKERS_ADDRESS"):
+        worker_broker = ManagerBroker(parse_address(os.environ["SHERLOCK_WORKERS_ADDRESS"]),
+                                      os.environ.get(AUTHKEY_ENV, "").encode())
+    else:
+        worker_processes = int(os.environ.get("SHERLOCK_WORKER_PROCESSES", str(os.cpu_count() or 1)))
+        worker_broker = start_local_workers(worker_processes, timeout=REQUEST_TIMEOUT)
+    probe_engine = Dispatcher(worker_broker)
+else:
+    probe_engine = aio_engine if BACKEND == "asyncio" else engine
+
+# Host name lookups shared by every search, kept for their TTL; the hosts of data.json are
+# resolved when it is loaded, below at startup and again whenever the file changes
+dns_cache = DnsCache()
+aio_engine.probe_loop.use_dns(dns_cache)
+
+# Keep-alive connections reused by every search this process runs
+http_pool = HttpPool(pool_maxsize=int(os.environ.get("SHERLOCK_POOL_SIZE", "10")),
+                     http2=os.environ.get("SHERLOCK_HTTP2") == "1", dns=dns_cache)
+
+# Recent results per (site, username): "memory" (default), "sqlite" or "off"
+CACHE_BACKEND = os.environ.get("SHERLOCK_CACHE", "memory")
+if CACHE_BACKEND == "sqlite":
+    result_cache = ResultCache(SQLiteBackend(os.environ.get("SHERLOCK_CACHE_PATH", "results_cache.db")))
+elif CACHE_BACKEND == "off":
+    result_cache = None
+else:
+    result_cache = ResultCache(MemoryBackend())
+
+# Searches run on their own bounded pool, not on the server's request workers:
+# SHERLOCK_MAX_SEARCHES at a time, SHERLOCK_SEARCH_QUEUE more waiting, the rest get a 503
+search_executor = SearchExecutor(max_searches=int(os.environ.get("SHERLOCK_MAX_SEARCHES", "8")),
+                                 max_queue=int(os.environ.get("SHERLOCK_SEARCH_QUEUE", "16")))
+
+# Concurrent searches for the same username share one scan, which does not count twice against the pool
+inflight = SingleFlight(start=search_executor.start_flight)
+
+# Served on /metrics, SHERLOCK_TRACE=1 adds time per site and phase (DNS, connect, TLS, TTFB, body)
+probe_metrics = ProbeMetrics(spans=os.environ.get("SHERLOCK_TRACE") == "1")
+if result_cache is not None:
+    probe_metrics.watch_cache(result_cache)
+probe_metrics.watch_searches(search_executor)
+probe_metrics.watch_dns(dns_cache)
+
+log = logging.getLogger("sherlock")
 
 def print_error(err, errstr, var, debug=False):
-    """Print error messages"""
+    """Log error messages, they are also counted on /metrics"""
     if debug:
-        print(f"ERROR: {errstr} {err}")
+        log.warning("%s %s", errstr, err)
     else:
-        print(f"ERROR: {errstr} {var}")
+        log.warning("%s %s", errstr, var)
 
-def make_request(url, headers, error_type, social_network):
-    """Make HTTP request to check if username exists"""
-    try:
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code:
-            return r, error_type
-    except requests.exceptions.HTTPError as errh:
-        print_error(errh, "HTTP Error:", social_network, False)
-    except requests.exceptions.ConnectionError as errc:
-        print_error(errc, "Error Connecting:", social_network, False)
-    except requests.exceptions.Timeout as errt:
-        print_error(errt, "Timeout Error:", social_network, False)
-    except requests.exceptions.RequestException as err:
-        print_error(err, "Unknown error:", social_network, False)
-    
-    return None, ""
-
-def sherlock_streaming(username):
-    """Streaming version of sherlock function that yields results one by one"""
-    
-    # Load data.json
+def report_error(err, errstr, social_network):
+    """Report a failed site request"""
+    print_error(err, errstr, social_network, False)
+
+# Every search goes through the same manifest -> plan -> probe path, only the sinks below differ
+pipeline = Pipeline("data.json", probe_engine, cache=result_cache, inflight=inflight, dns=dns_cache,
+                    max_workers=MAX_WORKERS, timeout=REQUEST_TIMEOUT, on_error=report_error, session=http_pool,
+                    health=site_health, limiter=rate_limiter, metrics=probe_metrics, tiers=site_tiers)
+
+# Background jobs: POST /jobs, then read /jobs/<id> or /jobs/<id>/stream from any offset.
+# Stored in SQLite (SHERLOCK_JOBS_PATH) unless SHERLOCK_JOBS=memory
+if os.environ.get("SHERLOCK_JOBS", "sqlite") == "memory":
+    job_store = MemoryJobStore()
+else:
+    job_store = SQLiteJobStore(os.environ.get("SHERLOCK_JOBS_PATH", "jobs.db"))
+job_manager = JobManager(pipeline, job_store, max_jobs=int(os.environ.get("SHERLOCK_MAX_JOBS", "4")),
+                         max_queue=int(os.environ.get("SHERLOCK_JOB_QUEUE", "1000")),
+                         ttl=float(os.environ.get("SHERLOCK_JOB_TTL", str(24 * 3600))))
+
+# Most events returned by one GET /jobs/<id>
+JOB_PAGE_SIZE = 1000
+
+def load_sites():
+    """Compiled data.json and None, or None and an error message"""
     try:
-        with open("data.json", "r", encoding="utf-8") as raw:
-            data = json.load(raw)
+        return pipeline.sites(), None
     except FileNotFoundError:
-        yield json.dumps({"error": "data.json file not found"}) + "\n"
+        return None, "data.json file not found"
+    except ManifestError as e:
+        return None, str(e)
+
+# Start resolving the hosts of data.json now rather than on the first search
+load_sites()
+
+def started(lines):
+    """
+    Run a response generator up to its first line, so a search that is not
+    admitted raises Saturated before any headers are sent.
+    """
+    first = next(lines, None)
+
+    def rest():
+        try:
+            if first is not None:
+                yield first
+            yield from lines
+        finally:
+            lines.close()
+
+    return rest()
+
+def saving(name, results, username=None):
+    """
+    Pass a search's results through, saving them to OUTPUT_DIR once the search is complete.
+
+    results holds (index, result) pairs of username, or (username, index, result)
+    tuples when username is None. A search that stops early saves nothing.
+    """
+    if OUTPUT_DIR is None:
+        yield from results
+        return
+    writer = open_writer(OUTPUT_DIR, name, OUTPUT_FORMAT)
+    try:
+        for item in results:
+            writer.write(item[0] if username is None else username, item[-1])
+            yield item
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+
+def sherlock_streaming(username, merge_progress=False):
+    """Streaming version of sherlock function that yields events one by one, see engine.events()"""
+    sites, error = load_sites()
+    if error:
+        yield {"error": error}
         return
     
-    # User agent for requests
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.12; rv:55.0) Gecko/20100101 Firefox/55.0'
-    }
-    
-    found_count = 0
-    total_count = len(data)
-    processed = 0
-    
-    # Send initial status
-    yield json.dumps({
-        "type": "start",
-        "username": username,
-        "total_platforms": total_count,
-        "timestamp": datetime.now().isoformat()
-    }) + "\n"
-    
-    for social_network in data:
-        try:
-            processed += 1
-            
-            # Send progress update
-            yield json.dumps({
-                "type": "progress",
-                "current_platform": social_network,
-                "processed": processed,
-                "total": total_count,
-                "percentage": int((processed / total_count) * 100)
-            }) + "\n"
-            
-            url = data.get(social_network).get("url").format(username)
-            error_type = data.get(social_network).get("errorType")
-            cant_have_period = data.get(social_network).get("noPeriod")
-            
-            # Check if username contains period and platform doesn't allow it
-            if ("." in username) and (cant_have_period == "True"):
-                result = {
-                    "type": "result",
-                    "platform": social_network,
-                    "status": "not_allowed",
-                    "url": "",
-                    "message": "Username not allowed (contains period)"
-                }
-                yield json.dumps(result) + "\n"
-                continue
-            
-            # Make request
-            r, error_type = make_request(url=url, headers=headers, error_type=error_type, social_network=social_network)
-            
-            # Skip if request failed
-            if r is None:
-                result = {
-                    "type": "result",
-                    "platform": social_network,
-                    "status": "error",
-                    "url": url,
-                    "message": "Connection error"
-                }
-                yield json.dumps(result) + "\n"
-                continue
-            
-            # Check based on error type
-            found = False
-            
-            if error_type == "message":
-                error = data.get(social_network).get("errorMsg")
-                if not error in r.text:
-                    found = True
-            elif error_type == "status_code":
-                if not r.status_code == 404:
-                    found = True
-            elif error_type == "response_url":
-                error = data.get(social_network).get("errorUrl")
-                if not error in r.url:
-                    found = True
-            
-            if found:
-                found_count += 1
-                result = {
-                    "type": "result",
-                    "platform": social_network,
-                    "status": "found",
-                    "url": url,
-                    "message": "Profile found"
-                }
-            else:
-                result = {
-                    "type": "result",
-                    "platform": social_network,
-                    "status": "not_found",
-                    "url": url,
-                    "message": "Profile not found"
-                }
-            
-            yield json.dumps(result) + "\n"
-                
-        except Exception as e:
-            result = {
-                "type": "result",
-                "platform": social_network,
-                "status": "error",
-                "url": "",
-                "message": f"Error: {str(e)}"
-            }
-            yield json.dumps(result) + "\n"
-    
-    # Send completion status
-    yield json.dumps({
-        "type": "complete",
-        "username": username,
-        "total_platforms": total_count,
-        "found_count": found_count,
-        "timestamp": datetime.now().isoformat()
-    }) + "\n"
+    # Cached results are sent straight away, the rest as each site finishes.
+    # Closing this generator (the client went away) cancels the scan's pending probes
+    results = pipeline.run(username, sites)
+    saved = saving(username, results, username)
+    try:
+        yield from events(username, len(sites), saved, merge_progress)
+    finally:
+        saved.close()
+        results.close()
 
 def sherlock_web(username):
     """Web version of sherlock function that returns results"""
-    results = []
+    sites, error = load_sites()
+    if error:
+        return {"error": error}
     
-    # Load data.json
-    try:
-        with open("data.json", "r", encoding="utf-8") as raw:
-            data = json.load(raw)
-    except FileNotFoundError:
-        return {"error": "data.json file not found"}
-    
-    # User agent for requests
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.12; rv:55.0) Gecko/20100101 Firefox/55.0'
-    }
-    
-    found_count = 0
-    total_count = len(data)
-    
-    for social_network in data:
-        try:
-            url = data.get(social_network).get("url").format(username)
-            error_type = data.get(social_network).get("errorType")
-            cant_have_period = data.get(social_network).get("noPeriod")
-            
-            # Check if username contains period and platform doesn't allow it
-            if ("." in username) and (cant_have_period == "True"):
-                results.append({
-                    "platform": social_network,
-                    "status": "not_allowed",
-                    "url": "",
-                    "message": "Username not allowed (contains period)"
-                })
-                continue
-            
-            # Make request
-            r, error_type = make_request(url=url, headers=headers, error_type=error_type, social_network=social_network)
-            
-            # Skip if request failed
-            if r is None:
-                results.append({
-                    "platform": social_network,
-                    "status": "error",
-                    "url": url,
-                    "message": "Connection error"
-                })
-                continue
-            
-            # Check based on error type
-            found = False
-            
-            if error_type == "message":
-                error = data.get(social_network).get("errorMsg")
-                if not error in r.text:
-                    found = True
-            elif error_type == "status_code":
-                if not r.status_code == 404:
-                    found = True
-            elif error_type == "response_url":
-                error = data.get(social_network).get("errorUrl")
-                if not error in r.url:
-                    found = True
-            
-            if found:
-                found_count += 1
-                results.append({
-                    "platform": social_network,
-                    "status": "found",
-                    "url": url,
-                    "message": "Profile found"
-                })
-            else:
-                results.append({
-                    "platform": social_network,
-                    "status": "not_found",
-                    "url": url,
-                    "message": "Profile not found"
-                })
-                
-        except Exception as e:
-            results.append({
-                "platform": social_network,
-                "status": "error",
-                "url": "",
-                "message": f"Error: {str(e)}"
-            })
+    results = collect(sites, saving(username, pipeline.run(username, sites), username))
+    found_count = sum(1 for result in results if result["status"] == "found")
     
     return {
         "username": username,
-        "total_platforms": total_count,
+        "total_platforms": len(sites),
         "found_count": found_count,
         "results": results,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "site_hashes": site_hashes(sites)
     }
-    """Web version of sherlock function that returns results"""
-    results = []
+
+def sherlock_recheck(previous, max_age):
+    """Re-check of a previous sherlock_web() result, probing only what may be out of date"""
+    sites, error = load_sites()
+    if error:
+        return {"error": error}
     
-    # Load data.json
+    def probe(username, stale):
+        # Re-checks skip the result cache, an old answer is what they replace
+        return search_executor.stream(
+            lambda cancel: pipeline.run_many([username], stale, refresh=True, cancel=cancel))
+    
+    return recheck(previous, sites, probe, max_age)
+
+def sherlock_batch(usernames, shared=None):
+    """Bulk version of sherlock_streaming() that yields events for many usernames, see engine.batch_events()"""
+    sites, error = load_sites()
+    if error:
+        yield {"error": error}
+        return
+    
+    # Every (username, site) probe shares one concurrency budget, and the
+    # whole batch takes one slot of the search pool. A batch the cache
+    # answers in full takes none
+    hits = pipeline.cached(usernames, sites)
+    if hits is not None:
+        results = (hit for hit in hits)
+    else:
+        results = search_executor.stream(
+            lambda cancel: pipeline.run_many(usernames, sites, shared=shared, max_workers=BATCH_WORKERS,
+                                             cancel=cancel))
+    saved = saving(f"batch-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}", results)
     try:
-        with open("data.json", "r", encoding="utf-8") as raw:
-            data = json.load(raw)
-    except FileNotFoundError:
-        return {"error": "data.json file not found"}
+        yield from batch_events(usernames, len(sites), saved)
+    finally:
+        saved.close()
+        results.close()
+
+def stream_window():
+    """Coalescing window in seconds from ?window= (milliseconds), None if malformed"""
+    try:
+        window = float(request.args.get('window', STREAM_WINDOW))
+    except ValueError:
+        return None
+    return window / 1000 if 0 <= window <= MAX_STREAM_WINDOW else None
+
+def stream_encoder(default_format):
+    """EventEncoder for the current request (?format=, ?window=, Accept-Encoding), or None and an error"""
+    fmt = request.args.get('format', default_format)
+    if fmt not in MIMETYPES:
+        return None, f"format must be one of {', '.join(MIMETYPES)}"
     
-    # User agent for requests
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.12; rv:55.0) Gecko/20100101 Firefox/55.0'
-    }
+    window = stream_window()
+    if window is None:
+        return None, f"window must be between 0 and {MAX_STREAM_WINDOW} milliseconds"
     
-    found_count = 0
-    total_count = len(data)
+    encoding = request.accept_encodings.best_match(encodings()) if fmt == 'ndjson' else None
+    return EventEncoder(fmt, window, encoding), None
+
+def streamed(encoder, events, headers=None):
+    """Streamed response of events, counted on /metrics while it is open"""
+    body = encoder.encode(events)
     
-    for social_network in data:
+    def generate():
+        probe_metrics.streams.inc()
         try:
-            url = data.get(social_network).get("url").format(username)
-            error_type = data.get(social_network).get("errorType")
-            cant_have_period = data.get(social_network).get("noPeriod")
-            
-            # Check if username contains period and platform doesn't allow it
-            if ("." in username) and (cant_have_period == "True"):
-                results.append({
-                    "platform": social_network,
-                    "status": "not_allowed",
-                    "url": "",
-                    "message": "Username not allowed (contains period)"
-                })
-                continue
-            
-            # Make request
-            r, error_type = make_request(url=url, headers=headers, error_type=error_type, social_network=social_network)
-            
-            # Skip if request failed
-            if r is None:
-                results.append({
-                    "platform": social_network,
-                    "status": "error",
-                    "url": url,
-                    "message": "Connection error"
-                })
-                continue
-            
-            # Check based on error type
-            found = False
-            
-            if error_type == "message":
-                error = data.get(social_network).get("errorMsg")
-                if not error in r.text:
-                    found = True
-            elif error_type == "status_code":
-                if not r.status_code == 404:
-                    found = True
-            elif error_type == "response_url":
-                error = data.get(social_network).get("errorUrl")
-                if not error in r.url:
-                    found = True
-            
-            if found:
-                found_count += 1
-                results.append({
-                    "platform": social_network,
-                    "status": "found",
-                    "url": url,
-                    "message": "Profile found"
-                })
-            else:
-                results.append({
-                    "platform": social_network,
-                    "status": "not_found",
-                    "url": url,
-                    "message": "Profile not found"
-                })
-                
-        except Exception as e:
-            results.append({
-                "platform": social_network,
-                "status": "error",
-                "url": "",
-                "message": f"Error: {str(e)}"
-            })
+            yield from body
+        finally:
+            body.close()
+            probe_metrics.streams.dec()
     
-    return {
-        "username": username,
-        "total_platforms": total_count,
-        "found_count": found_count,
-        "results": results,
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(generate(), mimetype=encoder.mimetype, headers={**encoder.headers, **(headers or {})})
+
+@app.errorhandler(Saturated)
+def saturated(error):
+    """Every search slot and queue place is taken, ask the client to come back later"""
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
 
 @app.route('/')
 def index():
@@ -373,8 +332,13 @@ def index():
 @app.route('/search', methods=['POST'])
 def search():
     """API endpoint for username search"""
-    data = request.get_json()
-    username = data.get('username', '').strip()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    username = data.get('username', '')
+    if not isinstance(username, str):
+        return jsonify({"error": "username must be a string"}), 400
+    username = username.strip()
     
     if not username:
         return jsonify({"error": "Username is required"}), 400
@@ -387,28 +351,197 @@ def search():
     
     return jsonify(results)
 
+@app.route('/recheck', methods=['POST'])
+def recheck_search():
+    """Incremental search, body {"previous": <a /search or /recheck result>, "max_age": seconds}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    max_age = data.get('max_age', DEFAULT_MAX_AGE)
+    
+    if not isinstance(max_age, (int, float)) or isinstance(max_age, bool) or max_age < 0:
+        return jsonify({"error": "max_age must be a number of seconds"}), 400
+    
+    try:
+        results = sherlock_recheck(data.get('previous'), max_age)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(results)
+
 @app.route('/search-stream/<username>')
 def search_stream(username):
-    """SSE endpoint for streaming search results"""
+    """
+    SSE endpoint for streaming search results.
+    
+    ?merge=1 sends each site's progress inside its result event, ?window= coalesces
+    events into fewer chunks and ?format=ndjson streams NDJSON lines instead
+    """
     
     if not username or len(username) < 2:
         return jsonify({"error": "Invalid username"}), 400
     
-    def generate():
-        for data in sherlock_streaming(username):
-            yield f"data: {data}\n\n"
+    encoder, error = stream_encoder('sse')
+    if error:
+        return jsonify({"error": error}), 400
     
-    return Response(generate(), mimetype='text/event-stream', headers={
-        'Cache-Control': 'no-cache',
+    lines = started(sherlock_streaming(username, request.args.get('merge') == '1'))
+    return streamed(encoder, lines, {
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Headers': 'Cache-Control'
     })
 
+def clean_usernames(usernames):
+    """Stripped usernames without duplicates, keeping the order they were sent in, or None and an error"""
+    cleaned = []
+    seen = set()
+    for username in usernames:
+        if not isinstance(username, str) or len(username.strip()) < 2:
+            return None, f"Invalid username: {username!r}"
+        username = username.strip()
+        if username not in seen:
+            seen.add(username)
+            cleaned.append(username)
+    return cleaned, None
+
+def with_variants(usernames, data):
+    """usernames expanded with their variants when the request body asks for them, or None and an error"""
+    variants = data.get('variants', False)
+    if not isinstance(variants, bool):
+        return None, "variants must be true or false"
+    if variants:
+        usernames = expand_usernames(usernames)
+        if len(usernames) > MAX_BATCH_USERNAMES:
+            return None, f"At most {MAX_BATCH_USERNAMES} usernames per request, variants included"
+    return usernames, None
+
+@app.route('/search-batch', methods=['POST'])
+def search_batch():
+    """NDJSON endpoint that checks a list of usernames, gzip or br compressed when accepted"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    usernames = data.get('usernames')
+    
+    if not isinstance(usernames, list) or not usernames:
+        return jsonify({"error": "usernames must be a non-empty list"}), 400
+    
+    if len(usernames) > MAX_BATCH_USERNAMES:
+        return jsonify({"error": f"At most {MAX_BATCH_USERNAMES} usernames per request"}), 400
+    
+    cleaned, error = clean_usernames(usernames)
+    if not error:
+        cleaned, error = with_variants(cleaned, data)
+    if not error:
+        encoder, error = stream_encoder('ndjson')
+    if error:
+        return jsonify({"error": error}), 400
+    
+    shared = SharedProbes() if data.get('variants') else None
+    return streamed(encoder, started(sherlock_batch(cleaned, shared)))
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Start a background search, body {"username": ...} or {"usernames": [...]}, "variants": true expands them"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    usernames = data.get('usernames')
+    if usernames is None and 'username' in data:
+        usernames = [data['username']]
+    
+    if not isinstance(usernames, list) or not usernames:
+        return jsonify({"error": "username or usernames is required"}), 400
+    
+    if len(usernames) > MAX_BATCH_USERNAMES:
+        return jsonify({"error": f"At most {MAX_BATCH_USERNAMES} usernames per request"}), 400
+    
+    cleaned, error = clean_usernames(usernames)
+    if not error:
+        cleaned, error = with_variants(cleaned, data)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    job = job_manager.submit(cleaned, share=data.get('variants', False))
+    return jsonify(job), 202, {"Location": f"/jobs/{job['id']}"}
+
+def job_offset(value):
+    """Event offset from a query argument or Last-Event-ID, None if malformed"""
+    try:
+        offset = int(value or 0)
+    except ValueError:
+        return None
+    return offset if offset >= 0 else None
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Job status and up to JOB_PAGE_SIZE events after ?offset="""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    offset = job_offset(request.args.get('offset'))
+    if offset is None:
+        return jsonify({"error": "offset must be a non-negative integer"}), 400
+    
+    page = job_manager.events(job_id, offset, JOB_PAGE_SIZE)
+    return jsonify({
+        **job,
+        "offset": offset,
+        "next_offset": page[-1][0] if page else offset,
+        "results": [event for _, event in page]
+    })
+
+@app.route('/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """SSE stream of a job's events, resuming after Last-Event-ID (or ?offset=)"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    offset = job_offset(request.headers.get('Last-Event-ID') or request.args.get('offset'))
+    if offset is None:
+        return jsonify({"error": "offset must be a non-negative integer"}), 400
+    
+    window = stream_window()
+    if window is None:
+        return jsonify({"error": f"window must be between 0 and {MAX_STREAM_WINDOW} milliseconds"}), 400
+    
+    # Nothing left to send, 204 also stops EventSource from reconnecting
+    if job["status"] in FINISHED and offset >= job["events"]:
+        return '', 204
+    
+    # (seq, event) pairs, every message carries its id
+    return streamed(EventEncoder('sse', window), job_manager.follow(job_id, offset), {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Cache-Control, Last-Event-ID'
+    })
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    if job["status"] in FINISHED:
+        return jsonify({"error": f"Job is already {job['status']}"}), 409
+    
+    if not job_manager.cancel(job_id):
+        return jsonify({"error": "Job is run by another process"}), 409
+    
+    return jsonify({"id": job_id, "status": "cancelling"}), 202
+
 @app.route('/about')
 def about():
     """About page"""
     return render_template('about.html')
 
+@app.route('/metrics')
+def metrics():
+    """Probe metrics in the Prometheus text format"""
+    return Response(probe_metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/health')
 def health():
     """Health check endpoint"""
@@ -419,4 +552,5 @@ if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only, production runs under gunicorn (see Procfile and gunicorn.conf.py)
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", host='0.0.0.0', port=int(os.environ.get("PORT", "5000")))
\ No newline at end of file
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Benchmark
+========================================
+
+Measures how fast searches run without touching a single real website.
+
+A local site farm emulates every data.json entry: "message" sites serve
+pages with or without the errorMsg (after a configurable amount of
+padding), "status_code" sites answer 200 or 404 and "response_url" sites
+redirect missing profiles to their error page. Responses are delayed by
+a configurable latency distribution and a share of the sites can hang
+past the timeout.
+
+The command-line search (sherlock()), the JSON search (sherlock_web())
+and the streaming search (sherlock_streaming()) are then driven against
+the farm, each in its own process, and reported with wall time, search
+and per-site latency percentiles, searches per second and peak RSS.
+
+Usage:
+    python benchmark.py [--searches N] [--concurrency N] [--cli-concurrency N] [--latency SPEC] [--hang-fraction F]
+                        [--body-bytes N] [--backend threads|asyncio] [--json FILE] [--compare FILE]
+
+Latency SPEC is one of:
+    fixed:SECONDS
+    uniform:LOW:HIGH
+    lognormal:MEDIAN:SIGMA
+    exp:MEAN
+
+Example:
+    python benchmark.py --searches 40 --concurrency 8 --latency lognormal:0.08:0.6 --hang-fraction 0.05
+    python benchmark.py --json baseline.json
+    python benchmark.py --compare baseline.json --tolerance 0.2
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+TARGETS = ("cli", "web", "stream")
+
+# Result lines printed by sherlock(), as opposed to its error lines
+CLI_RESULT_LINE = re.compile(r"^\x1b\[37;1m\[\x1b\[9[12];1m[+-]\x1b\[37;1m\]\x1b\[92;1m ")
+
+
+def parse_latency(spec):
+    """
+    Turn a latency SPEC into a function returning one delay in seconds.
+
+    Raises:
+        ValueError: If the spec is not understood
+    """
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(":")] if params else []
+    except ValueError:
+        raise ValueError(f"bad latency spec {spec!r}") from None
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda: random.expovariate(1 / values[0])
+    raise ValueError(f"bad latency spec {spec!r}, expected fixed:S, uniform:LO:HI, lognormal:MEDIAN:SIGMA or exp:MEAN")
+
+
+def percentile(values, fraction):
+    """Value below which the given fraction of values fall, None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MiB, None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def is_found(site_index, username, found_percent):
+    """Whether the farm pretends username has a profile on a site, stable between runs"""
+    return zlib.crc32(f"{site_index}/{username}".encode("utf-8")) % 100 < found_percent
+
+
+def farm_manifest(data, ports):
+    """data.json rewritten so every site points at its own port of the farm"""
+    farm = {}
+    for index, ((name, info), port) in enumerate(zip(data.items(), ports)):
+        entry = {key: value for key, value in info.items() if key != "rateLimit"}
+        entry["url"] = f"http://127.0.0.1:{port}/s/{index}/{{}}"
+        if info.get("errorType") == "response_url":
+            entry["errorUrl"] = f"http://127.0.0.1:{port}/e/{index}"
+        farm[name] = entry
+    return farm
+
+
+def first_marker(info, key):
+    """First errorMsg or foundMsg of a site as bytes, b"" if it has none"""
+    value = info.get(key)
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return value.encode("utf-8") if isinstance(value, str) else b""
+
+
+class FarmHandler(BaseHTTPRequestHandler):
+    """Answers /s/<site index>/<username> like the real site would"""
+
+    protocol_version = "HTTP/1.1"
+    sites = []
+    config = {}
+    latency = staticmethod(lambda: 0.0)
+    hanging = frozenset()
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body=b"", headers=()):
+        # Honour "Range: bytes=a-b" on full pages like most real servers do
+        span = self.headers.get("Range", "")
+        if status == 200 and body and span.startswith("bytes="):
+            first, _, last = span[6:].partition("-")
+            if first.isdigit() and last.isdigit() and int(first) < len(body):
+                first, last = int(first), min(int(last), len(body) - 1)
+                headers = [*headers, ("Content-Range", f"bytes {first}-{last}/{len(body)}")]
+                status, body = 206, body[first:last + 1]
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        parts = self.path.split("/", 3)
+        if len(parts) >= 3 and parts[1] == "e":
+            return self.reply(200, b"<html>error page</html>")
+        if len(parts) != 4 or parts[1] != "s" or not parts[2].isdigit() or int(parts[2]) >= len(self.sites):
+            return self.reply(400, b"bad path")
+
+        index, username = int(parts[2]), parts[3]
+        info = self.sites[index]
+        if index in self.hanging:
+            time.sleep(self.config["hang_seconds"])
+        time.sleep(max(0.0, self.latency()))
+
+        found = is_found(index, username, self.config["found_percent"])
+        padding = b"<p>" + b"x" * self.config["body_bytes"] + b"</p>"
+        check = info.get("errorType")
+
+        if check == "message":
+            # Markers after the padding, so deciding means reading the whole page
+            marker = first_marker(info, "foundMsg" if found else "errorMsg")
+            return self.reply(200, b"<html>" + padding + marker + b"</html>")
+        if check == "response_url" and not found:
+            return self.reply(302, headers=[("Location", f"/e/{index}")])
+        return self.reply(200 if found else 404, b"<html>" + padding + b"</html>")
+
+    do_HEAD = do_GET
+
+
+def run_farm(data, config, ready, stop):
+    """
+    Site farm process, serves until stop is set.
+
+    Every site gets its own port, so connection pools and rate limits see
+    one host per site like they would in production. The ports are sent
+    through ready in data.json order.
+    """
+    FarmHandler.sites = list(data.values())
+    FarmHandler.config = config
+    FarmHandler.latency = staticmethod(parse_latency(config["latency"]))
+    rng = random.Random(config["seed"])
+    count = round(len(data) * config["hang_fraction"])
+    FarmHandler.hanging = frozenset(rng.sample(range(len(data)), count))
+
+    ThreadingHTTPServer.request_queue_size = 1024
+    servers = []
+    for _ in data:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FarmHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    ready.put([server.server_address[1] for server in servers])
+    stop.wait()
+    for server in servers:
+        server.shutdown()
+
+
+class TimestampedLines(io.TextIOBase):
+    """stdout replacement that notes when each sherlock() result line is printed, separately for each thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _state(self):
+        local = self._local
+        if not hasattr(local, "times"):
+            local.times = []
+            local.buffer = ""
+        return local
+
+    @property
+    def times(self):
+        """When the result lines written by the calling thread were printed"""
+        return self._state().times
+
+    def write(self, text):
+        now = time.perf_counter()
+        local = self._state()
+        local.buffer += text
+        *lines, local.buffer = local.buffer.split("\n")
+        for line in lines:
+            if CLI_RESULT_LINE.match(line):
+                local.times.append(now)
+        return len(text)
+
+
+def run_target(target, config, workdir, results):
+    """Run the searches of one target in a fresh process and send its statistics back"""
+    os.chdir(workdir)
+    sys.path.insert(0, config["source_dir"])
+    os.environ["SHERLOCK_CACHE"] = "memory" if config["cache"] else "off"
+    os.environ["SHERLOCK_BACKEND"] = config["backend"]
+    os.environ["SHERLOCK_WORKERS"] = str(config["workers"])
+    os.environ["SHERLOCK_TIMEOUT"] = str(config["timeout"])
+
+    usernames = [f"bench{i}" for i in range(config["searches"])]
+    search_times = []
+    site_times = []
+    lock = threading.Lock()
+
+    if target == "cli":
+        from sherlock import sherlock
+
+        # sherlock() prints its results, each search's lines are timed on the thread that runs it
+        out = TimestampedLines()
+        sys.stdout = out
+
+        def search(username):
+            out.times.clear()
+            begin = time.perf_counter()
+            sherlock(username, max_workers=config["workers"], backend=config["backend"], timeout=config["timeout"])
+            with lock:
+                search_times.append(time.perf_counter() - begin)
+                site_times.extend(t - begin for t in out.times)
+
+        concurrency = config["cli_concurrency"]
+
+    else:
+        import app
+
+        # Errors of hanging sites are printed by the app, keep them out of the report
+        sys.stdout = open(os.devnull, "w")
+
+        # sherlock_web() only returns once every site is done, so the times its
+        # results arrive are taken from the pipeline stream it collects
+        arrivals = {}
+        run = app.pipeline.run
+
+        def timed_run(username, sites, **overrides):
+            stamps = arrivals.setdefault(username, [])
+            items = run(username, sites, **overrides)
+            try:
+                for item in items:
+                    stamps.append(time.perf_counter())
+                    yield item
+            finally:
+                close = getattr(items, "close", None)
+                if close is not None:
+                    close()
+
+        if target == "web":
+            app.pipeline.run = timed_run
+
+        def search(username):
+            begin = time.perf_counter()
+            if target == "web":
+                app.sherlock_web(username)
+                times = [t - begin for t in arrivals.pop(username, [])]
+            else:
+                times = [time.perf_counter() - begin for event in app.sherlock_streaming(username)
+                         if event.get("type") == "result"]
+            with lock:
+                search_times.append(time.perf_counter() - begin)
+                site_times.extend(times)
+
+        concurrency = config["concurrency"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(search, usernames))
+    wall = time.perf_counter() - started
+
+    results.put({
+        "target": target,
+        "searches": len(usernames),
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "searches_per_s": len(usernames) / wall if wall else None,
+        "search_p50_s": percentile(search_times, 0.5),
+        "search_p99_s": percentile(search_times, 0.99),
+        "site_p50_s": percentile(site_times, 0.5),
+        "site_p99_s": percentile(site_times, 0.99),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def format_value(value, unit=""):
+    return "-" if value is None else f"{value:.3f}{unit}" if isinstance(value, float) else str(value)
+
+
+def print_report(reports, config):
+    print(f"Sites: {config['sites']}  latency: {config['latency']}  hang: {config['hang_fraction']:.0%}  "
+          f"body: {config['body_bytes']} B  backend: {config['backend']}  cache: {'on' if config['cache'] else 'off'}")
+    columns = ("target", "searches", "concurrency", "wall_s", "searches_per_s", "search_p50_s", "search_p99_s",
+               "site_p50_s", "site_p99_s", "peak_rss_mb")
+    rows = [columns] + [tuple(format_value(report[column]) for column in columns) for report in reports]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def compare(reports, baseline_path, tolerance):
+    """Regressions of wall time and search p99 against a saved run, as messages"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {report["target"]: report for report in json.load(f)["reports"]}
+
+    regressions = []
+    for report in reports:
+        before = baseline.get(report["target"])
+        if before is None:
+            continue
+        for metric in ("wall_s", "search_p99_s"):
+            if before.get(metric) and report[metric] is not None and report[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{report['target']} {metric}: {before[metric]:.3f} -> {report[metric]:.3f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark searches against a local emulation of data.json")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.json"),
+                        help="Site definitions to emulate (default: data.json next to this file)")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help="Comma separated entry points to drive: cli, web, stream (default: all)")
+    parser.add_argument("--searches", type=int, default=20, help="Searches per target (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Searches running at the same time for web and stream (default: %(default)s)")
+    parser.add_argument("--cli-concurrency", type=int, default=1,
+                        help="sherlock() calls running at the same time for cli (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=20, help="Sites checked at the same time per search")
+    parser.add_argument("--backend", choices=["threads", "asyncio"], default="threads")
+    parser.add_argument("--latency", default="lognormal:0.05:0.5",
+                        help="Per-response delay distribution (default: %(default)s)")
+    parser.add_argument("--hang-fraction", type=float, default=0.0,
+                        help="Share of sites that hang past the timeout (default: %(default)s)")
+    parser.add_argument("--hang-seconds", type=float, default=15.0, help="How long a hanging site stalls")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-site timeout of the searches")
+    parser.add_argument("--body-bytes", type=int, default=20000, help="Padding in every page (default: %(default)s)")
+    parser.add_argument("--found-percent", type=int, default=20,
+                        help="Share of (site, username) pairs that have a profile (default: %(default)s)")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache on (off by default)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed choosing the hanging sites")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="Exit 1 if wall time or p99 regressed against FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown for --compare (default: 20%%)")
+    args = parser.parse_args(argv)
+
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    for target in targets:
+        if target not in TARGETS:
+            parser.error(f"unknown target {target!r}")
+    if args.concurrency < 1 or args.cli_concurrency < 1:
+        parser.error("--concurrency and --cli-concurrency must be at least 1")
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    config = {
+        "source_dir": os.path.dirname(os.path.abspath(__file__)),
+        "sites": len(data),
+        "searches": args.searches,
+        "concurrency": args.concurrency,
+        "cli_concurrency": args.cli_concurrency,
+        "workers": args.workers,
+        "backend": args.backend,
+        "latency": args.latency,
+        "hang_fraction": args.hang_fraction,
+        "hang_seconds": args.hang_seconds,
+        "timeout": args.timeout,
+        "body_bytes": args.body_bytes,
+        "found_percent": args.found_percent,
+        "cache": args.cache,
+        "seed": args.seed,
+    }
+
+    # Farm and targets each get their own process, so neither skews the other's timings or RSS
+    context = multiprocessing.get_context("spawn")
+    ready, stop = context.Queue(), context.Event()
+    farm = context.Process(target=run_farm, args=(data, config, ready, stop), daemon=True)
+    farm.start()
+    ports = ready.get(timeout=30)
+
+    reports = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="sherlock-bench-") as workdir:
+            with open(os.path.join(workdir, "data.json"), "w", encoding="utf-8") as f:
+                json.dump(farm_manifest(data, ports), f)
+            # Many searches hit each emulated site within seconds, which must not be throttled like a real one
+            with open(os.path.join(workdir, "ratelimits.json"), "w", encoding="utf-8") as f:
+                json.dump({"default": {"rate": 1000000, "burst": 100000}}, f)
+
+            for target in targets:
+                results = context.Queue()
+                worker = context.Process(target=run_target, args=(target, config, workdir, results))
+                worker.start()
+                while True:
+                    try:
+                        reports.append(results.get(timeout=1))
+                        break
+                    except queue.Empty:
+                        if not worker.is_alive():
+                            raise RuntimeError(f"The {target} benchmark exited with code {worker.exitcode}")
+                worker.join()
+    finally:
+        stop.set()
+        farm.join(timeout=5)
+
+    print_report(reports, config)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "reports": reports}, f, indent=2)
+
+    if args.compare:
+        regressions = compare(reports, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
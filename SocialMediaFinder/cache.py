@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Result Cache
+===========================================
+
+TTL cache for (site, username) probe results, placed in front of the
+probe step of the web app. Found, not found and error results each keep
+their own lifetime, so a popular handle is answered from memory while
+failures are retried soon.
+
+Two backends are available: an in-process LRU bounded by an estimate of
+its memory use (the default) and an on-disk SQLite table that survives
+restarts and can be shared by several worker processes.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+
+# Seconds a result is reused, by status
+TTL_FOUND = 6 * 3600
+TTL_NOT_FOUND = 3600
+TTL_ERROR = 60
+
+# Rough memory budget of the in-process backend
+MAX_MEMORY_BYTES = 32 * 1024 * 1024
+
+# Rows kept by the SQLite backend
+MAX_SQLITE_ROWS = 500000
+
+# Bookkeeping cost of one in-process entry on top of its strings
+ENTRY_OVERHEAD = 400
+
+
+def normalize_username(username):
+    """Cache key form of a username"""
+    return unicodedata.normalize("NFC", username.strip())
+
+
+class MemoryBackend:
+    """In-process LRU store bounded by an estimate of its memory use"""
+
+    def __init__(self, max_bytes=MAX_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cost(key, result):
+        return ENTRY_OVERHEAD + len(key[0]) + len(key[1]) + sum(len(str(v)) for v in result.values())
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, cost, result = entry
+            if expires <= now:
+                del self._entries[key]
+                self.size -= cost
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def set(self, key, result, expires):
+        cost = self._cost(key, result)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (expires, cost, result)
+            self.size += cost
+
+            # Evict least recently used entries until back under budget
+            while self.size > self.max_bytes and self._entries:
+                _, (_, evicted_cost, _) = self._entries.popitem(last=False)
+                self.size -= evicted_cost
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """On-disk store, least recently used rows are dropped past max_rows"""
+
+    def __init__(self, path="results_cache.db", max_rows=MAX_SQLITE_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS results ("
+                       "site TEXT, username TEXT, result TEXT, expires REAL, accessed REAL, "
+                       "PRIMARY KEY (site, username))")
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def get(self, key, now):
+        db = self._connect()
+        row = db.execute("SELECT result, expires FROM results WHERE site = ? AND username = ?", key).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        with db:
+            db.execute("UPDATE results SET accessed = ? WHERE site = ? AND username = ?", (now, *key))
+        return json.loads(row[0])
+
+    def set(self, key, result, expires):
+        db = self._connect()
+        with db:
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                       (*key, json.dumps(result), expires, time.time()))
+
+        # Trimming scans the table, so only do it every few hundred writes
+        with self._lock:
+            self._writes += 1
+            trim = self._writes % 500 == 0
+        if trim:
+            with db:
+                db.execute("DELETE FROM results WHERE rowid IN (SELECT rowid FROM results "
+                           "ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_rows,))
+
+    def clear(self):
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM results")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """
+    Cache of probe results keyed by (site, normalized username).
+
+    Args:
+        backend: MemoryBackend (default) or SQLiteBackend
+        ttl_found (float): Seconds a "found" result is reused
+        ttl_not_found (float): Seconds a "not_found" result is reused
+        ttl_error (float): Seconds an "error" result is reused, 0 disables negative caching
+    """
+
+    def __init__(self, backend=None, ttl_found=TTL_FOUND, ttl_not_found=TTL_NOT_FOUND, ttl_error=TTL_ERROR):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttls = {"found": ttl_found, "not_found": ttl_not_found, "error": ttl_error}
+        self.hits = 0
+        self.misses = 0
+        # Searches on several threads share one cache, += on the counters is not atomic
+        self._lock = threading.Lock()
+
+    def get(self, site, username):
+        """Cached result for site and username, or None"""
+        result = self.backend.get((site.name, normalize_username(username)), time.time())
+        if result is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return dict(result)
+
+    def put(self, site, username, result):
+        """Remember a probe result, statuses without a TTL are not stored"""
+        ttl = self.ttls.get(result["status"])
+        if ttl:
+            # Spans time the probe that produced the result, a cache hit takes none
+            stored = {key: value for key, value in result.items() if key != "spans"}
+            self.backend.set((site.name, normalize_username(username)), stored, time.time() + ttl)
+
+    def cached(self, pairs):
+        """
+        Every cached result of (username, Site) pairs, or None as soon as one of them is missing.
+
+        A search answered in full this way needs no probe, and no slot to run one.
+
+        Returns:
+            list: (username, index, result) of every pair, or None
+        """
+        now = time.time()
+        results = []
+        for username, site in pairs:
+            result = self.backend.get((site.name, normalize_username(username)), now)
+            if result is None:
+                # Not counted as a miss, the probing path that follows counts it
+                return None
+            results.append((username, site.index, dict(result)))
+        with self._lock:
+            self.hits += len(results)
+        return results
+
+    def probe_pairs(self, probe_pairs_func, pairs, refresh=False, **kwargs):
+        """
+        Answer (username, site) pairs from the cache first, then probe only the pairs that missed.
+
+        Pairs are looked up as the probe engine pulls them, so a bulk search
+        never holds more than the engine's window of them. Hits met on the
+        way are yielded between the probed results, and a pair passed in
+        twice is answered twice.
+
+        Args:
+            probe_pairs_func (callable): engine.probe_pairs or aio_engine.probe_pairs
+            pairs (iterable): (username, Site) pairs to check
+            refresh (bool): Probe every pair, the results still replace the cached ones
+            **kwargs: Passed on to probe_pairs_func
+
+        Yields:
+            tuple: (username, index, result), the hits before the first miss straight away
+        """
+        pairs = iter(pairs)
+        hits = deque()
+        sites = {}
+
+        def lookup(username, site):
+            result = None if refresh else self.get(site, username)
+            if result is None:
+                sites[site.index] = site
+            return result
+
+        first = None
+        for username, site in pairs:
+            result = lookup(username, site)
+            if result is None:
+                first = (username, site)
+                break
+            yield username, site.index, result
+        if first is None:
+            return
+
+        def missed():
+            # Runs on whichever thread the engine pulls pairs from, hits are handed back through the deque
+            yield first
+            for username, site in pairs:
+                result = lookup(username, site)
+                if result is None:
+                    yield username, site
+                else:
+                    hits.append((username, site.index, result))
+
+        for username, index, result in probe_pairs_func(missed(), **kwargs):
+            while hits:
+                yield hits.popleft()
+            self.put(sites[index], username, result)
+            yield username, index, result
+        while hits:
+            yield hits.popleft()
+
+    def clear(self):
+        self.backend.clear()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - DNS Cache
+========================================
+
+Name resolution shared by every search of a process, so a probe never
+waits for DNS on a host that was looked up before.
+
+Every answer is kept for its TTL. An expired answer is still used while
+a background lookup refreshes it, so only the very first connection to a
+host waits for the resolver. The hosts of data.json are resolved ahead
+of time, as soon as a manifest is loaded.
+
+Sites with per-user subdomains ("https://{}.blogspot.com") would need a
+new lookup for every username. When the parent domain answers for a
+random label too (wildcard DNS), that one answer is used for every user
+subdomain; otherwise each subdomain is cached on its own, failures
+included, briefly.
+
+The standard resolver does not report TTLs, so answers are kept for
+DEFAULT_TTL. With dnspython installed (pip install dnspython) the TTL of
+each record is used instead.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    import dns.exception
+    import dns.resolver
+except ImportError:
+    dns = None
+
+# Seconds an answer is kept when its TTL is unknown
+DEFAULT_TTL = 300
+
+# Bounds applied to record TTLs
+MIN_TTL = 30
+MAX_TTL = 3600
+
+# Seconds a failed lookup is remembered
+NEGATIVE_TTL = 30
+
+# Seconds past its expiry an answer is still served while it is refreshed
+MAX_STALE = 600
+
+# Lookups running at the same time when a manifest is pre-resolved
+PREWARM_WORKERS = 16
+
+# Seconds the resolver library waits for one lookup
+LOOKUP_TIMEOUT = 5.0
+
+
+def is_address(host):
+    """Whether host is an IP address rather than a name"""
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+def manifest_hosts(sites):
+    """
+    Hosts a manifest connects to.
+
+    Returns:
+        tuple: (static, wildcard) where static are fixed host names and
+        wildcard the parent domains of per-user subdomain sites
+    """
+    static = set()
+    wildcard = set()
+    for site in sites:
+        host = urlsplit(site.url_template).hostname or ""
+        if host.startswith("{}."):
+            wildcard.add(host[3:])
+        elif "{}" not in host and host and not is_address(host):
+            static.add(host)
+    return static, wildcard
+
+
+class _Entry:
+    __slots__ = ("addresses", "error", "expires", "refreshing")
+
+    def __init__(self, addresses, error, expires):
+        self.addresses = addresses
+        self.error = error
+        self.expires = expires
+        self.refreshing = False
+
+
+class DnsCache:
+    """
+    TTL cache of host name lookups.
+
+    Args:
+        default_ttl (float): Seconds an answer is kept when its TTL is unknown
+        negative_ttl (float): Seconds a failed lookup is remembered
+        max_stale (float): Seconds past expiry an answer is served while it is refreshed
+    """
+
+    def __init__(self, default_ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL, max_stale=MAX_STALE):
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.max_stale = max_stale
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lookups = {}
+        self._wildcards = {}
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    def resolve(self, host, port, family=0, block=True):
+        """
+        Addresses of host in socket.getaddrinfo() form, for SOCK_STREAM.
+
+        With block=False a host that is not cached returns None at once
+        instead of being looked up, for callers that must not wait.
+
+        Raises:
+            socket.gaierror: If the host does not resolve
+        """
+        if is_address(host):
+            return socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+
+        key = self._key(host.lower().rstrip("."))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires + (self.max_stale if entry.error is None else 0):
+                self.hits += 1
+                if now >= entry.expires and not entry.refreshing:
+                    entry.refreshing = True
+                    threading.Thread(target=self._lookup, args=(key,), name="dns-refresh", daemon=True).start()
+            else:
+                self.misses += 1
+                entry = None
+
+        if entry is None:
+            if not block:
+                return None
+            entry = self._lookup(key)
+        if entry.error is not None:
+            raise socket.gaierror(*entry.error)
+
+        # IPv6 socket addresses carry flow info and scope id after the port
+        return [(addr_family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (address[0], port) + address[2:])
+                for addr_family, address in entry.addresses if family in (0, addr_family)]
+
+    def _key(self, host):
+        # Every user subdomain of a wildcard domain shares one answer
+        label, _, parent = host.partition(".")
+        if parent and self._wildcards.get(parent):
+            return "*." + parent
+        return host
+
+    def _lookup(self, key):
+        """Resolve key once, however many threads ask for it at the same time"""
+        with self._lock:
+            running = self._lookups.get(key)
+            if running is None:
+                running = self._lookups[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            running.wait(LOOKUP_TIMEOUT * 2)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+
+        try:
+            # A wildcard answer is looked up through any label below the domain
+            name = f"{uuid.uuid4().hex[:12]}.{key[2:]}" if key.startswith("*.") else key
+            try:
+                addresses, ttl = self._query(name)
+                entry = _Entry(addresses, None, time.monotonic() + ttl)
+            except socket.gaierror as e:
+                entry = _Entry((), e.args, time.monotonic() + self.negative_ttl)
+            with self._lock:
+                old = self._entries.get(key)
+                if entry.error is not None and old is not None and old.error is None:
+                    # Keep serving the last good answer while the resolver has trouble
+                    old.expires = max(old.expires, time.monotonic() + self.negative_ttl)
+                    old.refreshing = False
+                    return old
+                self._entries[key] = entry
+            return entry
+        finally:
+            if owner:
+                with self._lock:
+                    del self._lookups[key]
+                running.set()
+
+    def _query(self, name):
+        """(addresses, ttl) of name, addresses as (family, sockaddr) pairs"""
+        if dns is not None:
+            addresses = []
+            ttls = []
+            for rdtype, addr_family in (("A", socket.AF_INET), ("AAAA", socket.AF_INET6)):
+                try:
+                    answer = dns.resolver.resolve(name, rdtype, lifetime=LOOKUP_TIMEOUT)
+                except dns.exception.DNSException:
+                    continue
+                ttls.append(answer.rrset.ttl)
+                for record in answer:
+                    sockaddr = (record.address, 0) if addr_family == socket.AF_INET else (record.address, 0, 0, 0)
+                    addresses.append((addr_family, sockaddr))
+            if addresses:
+                return addresses, min(max(min(ttls), MIN_TTL), MAX_TTL)
+            # Not in DNS, but /etc/hosts or another system source may know it
+
+        infos = socket.getaddrinfo(name, None, 0, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys((addr_family, sockaddr) for addr_family, _, _, _, sockaddr in infos))
+        return addresses, self.default_ttl
+
+    def is_wildcard(self, domain):
+        """Whether every subdomain of domain resolves, decided once per domain"""
+        with self._lock:
+            known = self._wildcards.get(domain)
+        if known is not None:
+            return known
+        try:
+            self._query(f"{uuid.uuid4().hex[:12]}.{domain}")
+            wildcard = True
+        except socket.gaierror:
+            wildcard = False
+        with self._lock:
+            self._wildcards[domain] = wildcard
+        return wildcard
+
+    def prewarm(self, sites, max_workers=PREWARM_WORKERS):
+        """Resolve every host of a manifest now, and find out which subdomain sites use wildcard DNS"""
+        static, wildcard = manifest_hosts(sites)
+
+        def warm(host):
+            try:
+                self.resolve(host, 443)
+            except OSError:
+                pass
+
+        def warm_wildcard(domain):
+            if self.is_wildcard(domain):
+                self._lookup("*." + domain)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dns-prewarm") as executor:
+            list(executor.map(warm_wildcard, wildcard))
+            list(executor.map(warm, static))
+
+    def use_sites(self, sites):
+        """
+        Pre-resolve the hosts of a manifest in the background.
+
+        Cheap to call on every search, a manifest is only resolved again
+        when a different (reloaded) one is passed in.
+        """
+        with self._lock:
+            if sites is self._manifest:
+                return
+            self._manifest = sites
+        threading.Thread(target=self.prewarm, args=(sites,), name="dns-prewarm", daemon=True).start()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def resolve_result(info, host):
+    """One socket.getaddrinfo() entry as the dict aiohttp resolvers return"""
+    family, _, proto, _, sockaddr = info
+    return {"hostname": host, "host": sockaddr[0], "port": sockaddr[1], "family": family, "proto": proto,
+            "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV}
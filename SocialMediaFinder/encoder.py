@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Stream Encoder
+=============================================
+
+Turns search events into the bytes of a streamed response, as Server-Sent
+Events (what EventSource reads) or as NDJSON, one event per line.
+
+Events are serialized once, straight to bytes, with orjson when it is
+installed (pip install orjson) and otherwise with a compact JSON encoder
+built once for the process.
+
+Given a window, the events that arrive within it of each other are sent
+as one chunk: one write to the socket and one compressor flush for a
+burst of cached results instead of one per event. The framing does not
+change, every event is still its own SSE message or NDJSON line.
+
+NDJSON responses are compressed with gzip, or Brotli when the brotli
+package is installed (pip install brotli), if the client accepts it. The
+compressor is flushed after every chunk so each event reaches the client
+as soon as it is sent. SSE is left uncompressed, browsers and proxies
+handle a compressed event stream badly.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import json
+import queue
+import threading
+import time
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Most events sent as one chunk, however fast they arrive
+MAX_CHUNK_EVENTS = 256
+
+# zlib level of gzip responses, streaming favours speed over ratio
+GZIP_LEVEL = 6
+
+# Brotli quality of br responses
+BROTLI_QUALITY = 4
+
+MIMETYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+if orjson is not None:
+    def dumps(event):
+        """event as compact JSON bytes"""
+        return orjson.dumps(event)
+else:
+    _encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def dumps(event):
+        """event as compact JSON bytes"""
+        return _encoder.encode(event).encode("utf-8")
+
+
+def encodings():
+    """Content-Encodings this process can send, best first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class _Gzip:
+    def __init__(self):
+        self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._zlib.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self):
+        return self._brotli.finish()
+
+
+_COMPRESSORS = {"gzip": _Gzip, "br": _Brotli}
+
+
+class _Failed:
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+_END = object()
+
+
+def coalesced(items, window, max_items=MAX_CHUNK_EVENTS):
+    """
+    Group the items of a blocking iterator into lists.
+
+    A list holds the items that arrived within window seconds of its first
+    one. With a window the iterator is read on a thread of its own, so a
+    lone item is never held back waiting for the next. Closing the returned
+    generator closes items, with a window once its pending read returns.
+
+    Yields:
+        list: One or more items, in order
+    """
+    close = getattr(items, "close", None)
+    if window <= 0:
+        try:
+            for item in items:
+                yield [item]
+        finally:
+            if close is not None:
+                close()
+        return
+
+    arrived = queue.Queue()
+    stop = threading.Event()
+
+    def pump():
+        try:
+            for item in items:
+                arrived.put(item)
+                if stop.is_set():
+                    break
+        except BaseException as e:
+            arrived.put(_Failed(e))
+        finally:
+            if close is not None:
+                close()
+            arrived.put(_END)
+
+    threading.Thread(target=pump, name="stream-coalesce", daemon=True).start()
+    try:
+        item = None
+        while item is not _END:
+            group = []
+            item = arrived.get()
+            deadline = time.monotonic() + window
+            while item is not _END:
+                if isinstance(item, _Failed):
+                    if group:
+                        yield group
+                    raise item.error
+                group.append(item)
+                remaining = deadline - time.monotonic()
+                if len(group) >= max_items or remaining <= 0:
+                    break
+                try:
+                    item = arrived.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if group:
+                yield group
+    finally:
+        stop.set()
+
+
+class EventEncoder:
+    """
+    Encoder of one streamed response.
+
+    Args:
+        fmt (str): "sse" or "ndjson"
+        window (float): Seconds within which events are sent as one chunk, 0 sends each on its own
+        encoding (str): Content-Encoding of an NDJSON response, "gzip", "br" or None
+
+    Raises:
+        ValueError: If the format or encoding is unknown
+    """
+
+    def __init__(self, fmt="sse", window=0.0, encoding=None):
+        if fmt not in MIMETYPES:
+            raise ValueError(f"Unknown stream format {fmt!r}, expected one of {', '.join(MIMETYPES)}")
+        if encoding is not None and encoding not in encodings():
+            raise ValueError(f"Unsupported encoding {encoding!r}")
+        self.fmt = fmt
+        self.window = window
+        # Compressed event streams are only sent to clients that are not browsers
+        self.encoding = encoding if fmt == "ndjson" else None
+
+    @property
+    def mimetype(self):
+        return MIMETYPES[self.fmt]
+
+    @property
+    def headers(self):
+        """Response headers that go with the encoded body"""
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if self.encoding is not None:
+            headers["Content-Encoding"] = self.encoding
+        return headers
+
+    def frame(self, event, event_id=None):
+        """One event as SSE message or NDJSON line bytes"""
+        if self.fmt == "ndjson":
+            return dumps(event) + b"\n"
+        if event_id is not None:
+            return b"id: %d\ndata: %s\n\n" % (event_id, dumps(event))
+        return b"data: " + dumps(event) + b"\n\n"
+
+    def encode(self, events):
+        """
+        Bytes of the response body, one chunk per group of events.
+
+        Args:
+            events (iterable): Event dicts, or (id, event) pairs for SSE messages that carry an id
+
+        Yields:
+            bytes: Chunks to write to the client
+        """
+        compressor = _COMPRESSORS[self.encoding]() if self.encoding is not None else None
+        groups = coalesced(events, self.window)
+        try:
+            for group in groups:
+                chunk = b"".join(self.frame(event[1], event[0]) if isinstance(event, tuple) else self.frame(event)
+                                 for event in group)
+                yield compressor.compress(chunk) if compressor is not None else chunk
+            if compressor is not None:
+                yield compressor.finish()
+        finally:
+            groups.close()
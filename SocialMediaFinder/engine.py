@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Probe Engine
+===========================================
+
+Shared probe engine used by the command-line tool (sherlock.py) and the
+web interface (app.py). Every site in data.json is checked on a worker
+thread, so a search takes about as long as the slowest single site rather
+than the sum of all of them.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+
+import requests
+
+from health import TRANSIENT_STATUS
+from http_pool import CONNECTION_ERRORS, REQUEST_ERRORS, TIMEOUT_ERRORS, body_charset, iter_body, release, tracing
+from manifest import CheckType
+from matcher import scan_body
+from metrics import ProbeTrace
+from ratelimit import THROTTLED_STATUS, parse_retry_after
+from tiers import GET, HEAD, INCONCLUSIVE_STATUS, RANGE, covers_body, range_header
+
+# Number of sites checked at the same time
+DEFAULT_WORKERS = 20
+
+# How often a search waiting on slow sites checks whether it was cancelled
+CANCEL_POLL = 0.25
+
+# User agent is needed because some sites does not
+# return the correct information because it thinks that
+# we are bot
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.12; rv:55.0) Gecko/20100101 Firefox/55.0'
+}
+
+
+def report_request_error(err, social_network, on_error):
+    """Pass a request exception to on_error with a description of its kind"""
+    if on_error is None:
+        return
+    if isinstance(err, requests.exceptions.HTTPError):
+        on_error(err, "HTTP Error:", social_network)
+    elif isinstance(err, CONNECTION_ERRORS):
+        on_error(err, "Error Connecting:", social_network)
+    elif isinstance(err, TIMEOUT_ERRORS):
+        on_error(err, "Timeout Error:", social_network)
+    else:
+        on_error(err, "Unknown error:", social_network)
+
+
+def classify(site, url, status_code, final_url, matched=None):
+    """
+    Decide whether a profile exists from a site response.
+
+    Args:
+        site (Site): The site that was checked
+        url (str): The profile URL that was requested
+        status_code (int): HTTP status of the response
+        final_url (str): URL of the response after redirects
+        matched (str): Kind of the first marker in the body (matcher.NEGATIVE or POSITIVE),
+            None if there was none; only used by "message" sites
+
+    Returns:
+        dict: Result with platform, status, url and message keys
+    """
+    found = False
+
+    if site.check is CheckType.MESSAGE:
+        # Checks which marker, if any, the HTML contains
+        found = site.matcher.verdict(matched)
+    elif site.check is CheckType.STATUS_CODE:
+        # Checks if the status code of the repsonse is 404
+        if not status_code == 404:
+            found = True
+    elif site.check is CheckType.RESPONSE_URL:
+        if not site.error_url in final_url:
+            found = True
+
+    if found:
+        return {
+            "platform": site.name,
+            "status": "found",
+            "url": url,
+            "message": "Profile found"
+        }
+    return {
+        "platform": site.name,
+        "status": "not_found",
+        "url": url,
+        "message": "Profile not found"
+    }
+
+
+def not_allowed_result(social_network):
+    """Result for a username the site cannot have"""
+    return {
+        "platform": social_network,
+        "status": "not_allowed",
+        "url": "",
+        "message": "Username not allowed (contains period)"
+    }
+
+
+def error_result(social_network, url, message):
+    """Result for a site that could not be checked"""
+    return {
+        "platform": social_network,
+        "status": "error",
+        "url": url,
+        "message": message
+    }
+
+
+def skipped_result(social_network, url, retry_in):
+    """Result for a site whose circuit breaker is open"""
+    return {
+        "platform": social_network,
+        "status": "skipped",
+        "url": url,
+        "message": f"Site is failing, skipped (retrying in {int(retry_in)}s)"
+    }
+
+
+def is_transient(err):
+    """Whether a request exception is worth retrying"""
+    return isinstance(err, CONNECTION_ERRORS) and not isinstance(err, TIMEOUT_ERRORS)
+
+
+def take_turn(limiter, site, owner, trace=None):
+    """Wait until the site's host accepts another request from this search, returns the seconds waited"""
+    waited = limiter.acquire(site.host, owner)
+    if trace is not None:
+        trace.span("wait", waited)
+    return waited
+
+
+def counted(chunks, trace):
+    """Pass body chunks through, adding their size to trace.bytes"""
+    for chunk in chunks:
+        trace.bytes += len(chunk)
+        yield chunk
+
+
+def fetch(site, url, headers, timeout=None, session=None, on_error=None, trace=None, tier=GET):
+    """
+    Make HTTP request to check if username exists, once.
+
+    Args:
+        site (Site): The site to check
+        url (str): Profile URL of the username on the site
+        headers (dict): HTTP headers sent with the request
+        timeout (float): Request timeout in seconds, None waits forever
+        session (HttpPool): Pooled session to send the request on, None opens a new connection
+        on_error (callable): Called with (err, errstr, social_network) on request errors
+        trace (ProbeTrace): Receives the status code, body size and time spans, None records nothing
+        tier (str): "get" (default), or "head" / "range" for a cheap request that may not decide
+
+    Returns:
+        tuple: (result, transient, retry_after) where transient tells whether trying again
+        may help and retry_after is the delay the site asked for, or None.
+        Timeouts are not transient, retrying a slow site only adds to the wait.
+        result is None when a head or range request could not decide.
+    """
+    started = time.perf_counter()
+    opened = trace.connection_time() if trace is not None else 0.0
+    try:
+        with tracing(trace):
+            if tier == HEAD:
+                r = (session or requests).head(url, headers=headers, timeout=timeout, allow_redirects=True)
+            else:
+                if tier == RANGE:
+                    headers = {**headers, "Range": range_header(site)}
+                r = (session or requests).get(url, headers=headers, timeout=timeout, stream=True)
+    except REQUEST_ERRORS as err:
+        report_request_error(err, site.name, on_error)
+        return error_result(site.name, url, "Connection error"), is_transient(err), None
+
+    headers_at = time.perf_counter()
+    if trace is not None:
+        trace.status_code = r.status_code
+        trace.span("ttfb", headers_at - started - (trace.connection_time() - opened))
+
+    inconclusive = tier != GET and r.status_code in INCONCLUSIVE_STATUS
+    reads_body = (site.check is CheckType.MESSAGE and r.status_code not in TRANSIENT_STATUS
+                  and r.status_code != THROTTLED_STATUS and not inconclusive)
+    try:
+        if inconclusive:
+            return None, False, None
+        # A 429 page is not a profile, whatever the check type says
+        if r.status_code == THROTTLED_STATUS:
+            return (error_result(site.name, url, "Rate limited (429)"), True,
+                    parse_retry_after(r.headers.get("Retry-After")))
+        if r.status_code in TRANSIENT_STATUS:
+            return (error_result(site.name, url, f"Server error ({r.status_code})"), True,
+                    parse_retry_after(r.headers.get("Retry-After")))
+
+        matched = None
+        if reads_body:
+            # Only read the body until one of the site's markers shows up
+            matcher = site.matcher_for(body_charset(r.headers))
+            chunks = iter_body(r) if trace is None else counted(iter_body(r), trace)
+            matched = scan_body(chunks, matcher, site.max_bytes)
+            # Part of the page without a marker, the rest may still have one
+            if matched is None and r.status_code == 206 and not covers_body(r.headers.get("Content-Range")):
+                return None, False, None
+    except REQUEST_ERRORS as err:
+        report_request_error(err, site.name, on_error)
+        return error_result(site.name, url, "Connection error"), is_transient(err), None
+    finally:
+        # status_code and response_url sites never read the body
+        release(r, drain=not reads_body)
+        if trace is not None:
+            trace.span("body", time.perf_counter() - headers_at)
+
+    return classify(site, url, r.status_code, str(r.url), matched), False, None
+
+
+def fetch_tiered(site, url, headers, timeout=None, session=None, on_error=None, trace=None, tiers=None,
+                 limiter=None, owner=None):
+    """
+    fetch() on the site's learned tier, see tiers.py.
+
+    A head or range request that cannot decide, or whose answer is still
+    being verified, is followed by a full GET, which then gives the result.
+    Takes the arguments of fetch() plus the TierTracker and the limiter
+    turn the extra request waits for.
+
+    Returns:
+        tuple: What fetch() returns, plus the seconds spent waiting for
+        that turn, which are not part of the site's latency
+    """
+    if tiers is None:
+        return (*fetch(site, url, headers, timeout, session, on_error, trace), 0.0)
+
+    tier, verify = tiers.plan(site)
+    if tier == GET:
+        return (*fetch(site, url, headers, timeout, session, on_error, trace), 0.0)
+
+    cheap, transient, retry_after = fetch(site, url, headers, timeout, session, on_error, trace, tier)
+    if cheap is not None and (cheap["status"] == "error" or not verify):
+        if cheap["status"] != "error":
+            tiers.record(site, tier, cheap)
+        return cheap, transient, retry_after, 0.0
+
+    waited = take_turn(limiter, site, owner, trace) if limiter is not None else 0.0
+    full, transient, retry_after = fetch(site, url, headers, timeout, session, on_error, trace)
+    if full["status"] != "error":
+        tiers.record(site, tier, cheap, full)
+    return full, transient, retry_after, waited
+
+
+def check_site(site, username, headers=HEADERS, timeout=None, on_error=None, session=None, health=None,
+               limiter=None, owner=None, metrics=None, tiers=None):
+    """
+    Check a single site for the username.
+
+    Args:
+        site (Site): The site to check
+        username (str): The username to search for
+        headers (dict): HTTP headers sent with the request
+        timeout (float): Request timeout in seconds, None waits forever
+        on_error (callable): Called with (err, errstr, social_network) on request errors
+        session (HttpPool): Pooled session to send the request on, None opens a new connection
+        health (HealthTracker): Adaptive timeouts, retries and circuit breaker, None sends one request
+        limiter (RateLimiter): Per-host rate limits, None sends requests as soon as possible
+        owner: The search this probe belongs to, the limiter takes turns between owners
+        metrics (ProbeMetrics): Records the probe's outcome, size and timings, None records nothing
+        tiers (TierTracker): Learned head/range/get tier per site, None always sends a full GET
+
+    Returns:
+        dict: Result with platform, status, url and message keys
+    """
+    if metrics is None:
+        return _check_site(site, username, headers, timeout, on_error, session, health, limiter, owner, None,
+                           tiers)
+
+    def report(err, errstr, social_network):
+        metrics.record_error(social_network, errstr)
+        if on_error:
+            on_error(err, errstr, social_network)
+
+    trace = ProbeTrace()
+    metrics.probe_started()
+    started = time.monotonic()
+    result = _check_site(site, username, headers, timeout, report, session, health, limiter, owner, trace, tiers)
+    metrics.probe_finished(site.name, result, time.monotonic() - started, trace)
+    return result
+
+
+def _check_site(site, username, headers, timeout, on_error, session, health, limiter, owner, trace, tiers):
+    try:
+        url = site.url_for(username)
+
+        if not site.allows(username):
+            return not_allowed_result(site.name)
+
+        if health is None:
+            if limiter is not None:
+                take_turn(limiter, site, owner, trace)
+            result, _, retry_after, _ = fetch_tiered(site, url, headers, timeout, session, on_error, trace, tiers,
+                                                     limiter, owner)
+            if limiter is not None and retry_after is not None:
+                limiter.penalize(site.host, retry_after)
+            return result
+
+        if not health.allow(site.name):
+            return skipped_result(site.name, url, health.retry_in(site.name))
+
+        timeout = health.timeout_for(site.name, timeout)
+        failures = []
+        retry_after = None
+        for attempt in range(1 + health.retries):
+            if attempt:
+                delay = health.delay(attempt - 1)
+                # With a limiter the whole host is paused instead, see penalize()
+                if limiter is None and retry_after is not None:
+                    delay = max(delay, retry_after)
+                time.sleep(delay)
+            if limiter is not None:
+                take_turn(limiter, site, owner, trace)
+            started = time.monotonic()
+            result, transient, retry_after, waited = fetch_tiered(site, url, headers, timeout, session,
+                                                                  lambda *error: failures.append(error), trace,
+                                                                  tiers, limiter, owner)
+            if limiter is not None and retry_after is not None:
+                limiter.penalize(site.host, retry_after)
+            if not transient:
+                break
+
+        if result["status"] == "error":
+            health.record_failure(site.name)
+            # Only the last failure is worth reporting
+            if on_error and failures:
+                on_error(*failures[-1])
+        else:
+            # Request time only, a fallback's wait for its limiter turn would inflate the adaptive timeout
+            health.record_success(site.name, time.monotonic() - started - waited)
+        return result
+
+    except Exception as e:
+        return error_result(site.name, "", f"Error: {str(e)}")
+
+
+def probe_pairs(pairs, max_workers=DEFAULT_WORKERS, headers=HEADERS, timeout=None, on_error=None, session=None,
+                health=None, limiter=None, owner=None, metrics=None, cancel=None, tiers=None):
+    """
+    Check (username, site) pairs concurrently under one worker budget.
+
+    Pairs are pulled from the iterable only as workers free up, so a bulk
+    search over thousands of usernames never queues more than a couple of
+    probes per worker.
+
+    Args:
+        pairs (iterable): (username, Site) pairs to check
+        max_workers (int): Maximum number of probes running at the same time
+        headers (dict): HTTP headers sent with every request
+        timeout (float): Per-request timeout in seconds
+        on_error (callable): Called with (err, errstr, social_network) on request errors
+        session (HttpPool): Pooled session shared by every request
+        health (HealthTracker): Adaptive timeouts, retries and circuit breakers shared by every probe
+        limiter (RateLimiter): Per-host rate limits shared by every search
+        owner: Identifies this search to the limiter, defaults to a new identity per call
+        metrics (ProbeMetrics): Records every probe
+        cancel (threading.Event): Stops the search early once set, e.g. when the client went away
+        tiers (TierTracker): Learned head/range/get tier per site, shared by every search
+
+    Yields:
+        tuple: (username, index, result) in completion order, where index
+        is the position of the site in data.json
+    """
+    pairs = iter(pairs)
+    workers = max(1, max_workers)
+    window = workers * 2
+    if owner is None:
+        owner = object()
+    poll = None if cancel is None else CANCEL_POLL
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = {}
+
+    def fill():
+        for username, site in islice(pairs, window - len(pending)):
+            future = executor.submit(check_site, site, username, headers, timeout, on_error, session, health,
+                                     limiter, owner, metrics, tiers)
+            pending[future] = (username, site.index)
+
+    try:
+        fill()
+        while pending:
+            if cancel is not None and cancel.is_set():
+                return
+            done, _ = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                username, index = pending.pop(future)
+                yield username, index, future.result()
+            fill()
+    finally:
+        # Queued probes are dropped when the search ends early; the ones
+        # already running finish in the background within their timeout
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start_event(username, total_count):
+    """Event sent before any site is checked"""
+    return {
+        "type": "start",
+        "username": username,
+        "total_platforms": total_count,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def progress_event(social_network, processed, total_count):
+    """Event sent each time a site finishes"""
+    return {
+        "type": "progress",
+        "current_platform": social_network,
+        "processed": processed,
+        "total": total_count,
+        "percentage": int((processed / total_count) * 100)
+    }
+
+
+def complete_event(username, total_count, found_count):
+    """Event sent once every site has been checked"""
+    return {
+        "type": "complete",
+        "username": username,
+        "total_platforms": total_count,
+        "found_count": found_count,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def events(username, total_count, results, merge_progress=False):
+    """
+    Turn probe results into the event sequence the streaming client expects.
+
+    Args:
+        username (str): The username being searched
+        total_count (int): Number of sites in the search
+        results (iterable): (index, result) pairs, e.g. from Pipeline.run()
+        merge_progress (bool): Send the progress of each site inside its result
+            event ("processed", "total", "percentage") instead of on its own
+
+    Yields:
+        dict: start, then a progress and a result event per site, then complete
+    """
+    found_count = 0
+    processed = 0
+
+    yield start_event(username, total_count)
+
+    for index, result in results:
+        processed += 1
+        if result["status"] == "found":
+            found_count += 1
+
+        if merge_progress:
+            yield {"type": "result", **result, "processed": processed, "total": total_count,
+                   "percentage": int((processed / total_count) * 100)}
+        else:
+            yield progress_event(result["platform"], processed, total_count)
+            yield {"type": "result", **result}
+
+    yield complete_event(username, total_count, found_count)
+
+
+def batch_events(usernames, total_count, results):
+    """
+    Turn bulk probe results into NDJSON-ready events.
+
+    Args:
+        usernames (list): The usernames being searched
+        total_count (int): Number of sites checked per username
+        results (iterable): (username, index, result) tuples from probe_pairs()
+
+    Yields:
+        dict: start, a result event per (username, site) pair, then complete
+    """
+    found_count = 0
+    processed = 0
+
+    yield {
+        "type": "start",
+        "usernames": len(usernames),
+        "total_platforms": total_count,
+        "total_checks": len(usernames) * total_count,
+        "timestamp": datetime.now().isoformat()
+    }
+
+    for username, index, result in results:
+        processed += 1
+        if result["status"] == "found":
+            found_count += 1
+        yield {"type": "result", "username": username, **result}
+
+    yield {
+        "type": "complete",
+        "usernames": len(usernames),
+        "total_checks": processed,
+        "found_count": found_count,
+        "timestamp": datetime.now().isoformat()
+    }
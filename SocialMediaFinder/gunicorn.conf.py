@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Gunicorn Settings
+================================================
+
+Production settings for the web app, used by the Procfile:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Searches run on the app's own bounded search pool (SHERLOCK_MAX_SEARCHES,
+SHERLOCK_SEARCH_QUEUE), so request threads only wait on results and
+stream them out. Every open stream holds one thread, hence threaded
+workers with plenty of threads rather than sync workers.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# One process keeps the result cache, single-flight scans, rate limits and
+# the search pool shared by every request; raise it only with the limits in mind
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+worker_class = "gthread"
+threads = int(os.environ.get("SHERLOCK_WEB_THREADS", "64"))
+
+# A streamed search stays open until its slowest site answers
+timeout = int(os.environ.get("SHERLOCK_WEB_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
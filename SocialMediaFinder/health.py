@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Site Health
+==========================================
+
+Per-site latency tracking, adaptive timeouts, retries and circuit
+breakers. Each site gets a timeout derived from its own recent latency
+(p99 x factor), transient failures are retried with jittered backoff,
+and a site that keeps failing is skipped for a cooldown period instead
+of adding a full timeout to every search.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+# Responses worth retrying, the site is overloaded or restarting
+TRANSIENT_STATUS = frozenset({502, 503, 504})
+
+# Latency samples kept per site
+LATENCY_WINDOW = 100
+
+# Samples needed before the adaptive timeout replaces the default
+MIN_SAMPLES = 10
+
+
+def backoff_delay(attempt, base, cap):
+    """Full-jitter exponential backoff before retry number attempt (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class SiteHealth:
+    """Recent latency and failure state of one site"""
+
+    __slots__ = ("latencies", "failures", "open_until")
+
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.failures = 0
+        self.open_until = 0.0
+
+    def percentile(self, fraction):
+        """Latency below which the given fraction of recent samples fall"""
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HealthTracker:
+    """
+    Health of every site, shared by all searches of a process.
+
+    Args:
+        default_timeout (float): Timeout used until a site has enough samples
+        min_timeout (float): Lowest adaptive timeout
+        max_timeout (float): Highest adaptive timeout
+        timeout_factor (float): Adaptive timeout is the p99 latency times this
+        retries (int): Extra attempts after a transient failure
+        backoff (float): Base delay in seconds between attempts
+        max_backoff (float): Longest delay between attempts
+        failure_threshold (int): Consecutive failures that open the circuit
+        cooldown (float): Seconds a failing site is skipped before it is tried again
+    """
+
+    def __init__(self, default_timeout=10.0, min_timeout=2.0, max_timeout=10.0, timeout_factor=3.0,
+                 retries=2, backoff=0.25, max_backoff=2.0, failure_threshold=5, cooldown=300.0):
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def _site(self, name):
+        health = self._sites.get(name)
+        if health is None:
+            with self._lock:
+                health = self._sites.setdefault(name, SiteHealth())
+        return health
+
+    def timeout_for(self, name, limit=None):
+        """
+        Timeout for the next request to a site.
+
+        Args:
+            name (str): Site name
+            limit (float): Caller's own timeout, never exceeded
+
+        Returns:
+            float: p99 latency x factor once enough samples exist, else the default
+        """
+        health = self._site(name)
+        with self._lock:
+            if len(health.latencies) >= MIN_SAMPLES:
+                timeout = health.percentile(0.99) * self.timeout_factor
+                timeout = max(self.min_timeout, min(self.max_timeout, timeout))
+            else:
+                timeout = self.default_timeout
+        if limit is not None:
+            timeout = min(timeout, limit)
+        return timeout
+
+    def allow(self, name):
+        """
+        Whether a site may be probed now.
+
+        While the circuit is open this returns False. Once the cooldown is
+        over a single trial probe is let through; the circuit stays open
+        for everyone else until that probe succeeds.
+        """
+        health = self._site(name)
+        now = time.monotonic()
+        with self._lock:
+            if health.failures < self.failure_threshold:
+                return True
+            if now < health.open_until:
+                return False
+            health.open_until = now + self.cooldown
+            return True
+
+    def retry_in(self, name):
+        """Seconds until a skipped site is tried again"""
+        return max(0.0, self._site(name).open_until - time.monotonic())
+
+    def record_success(self, name, latency):
+        health = self._site(name)
+        with self._lock:
+            health.latencies.append(latency)
+            health.failures = 0
+            health.open_until = 0.0
+
+    def record_failure(self, name):
+        health = self._site(name)
+        with self._lock:
+            health.failures += 1
+            if health.failures >= self.failure_threshold:
+                health.open_until = time.monotonic() + self.cooldown
+
+    def delay(self, attempt):
+        """Seconds to wait before retry number attempt (0-based)"""
+        return backoff_delay(attempt, self.backoff, self.max_backoff)
+
+    def snapshot(self):
+        """Per-site latency and circuit state, for diagnostics"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "samples": len(health.latencies),
+                    "p50": health.percentile(0.5) if health.latencies else None,
+                    "p99": health.percentile(0.99) if health.latencies else None,
+                    "failures": health.failures,
+                    "open": health.failures >= self.failure_threshold and now < health.open_until,
+                }
+                for name, health in self._sites.items()
+            }
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Connection Pool
+==============================================
+
+Long-lived HTTP session shared by every search of a process. Connections
+to each site are kept alive and reused, so repeated searches against the
+same hosts skip the TCP and TLS handshakes.
+
+The web app and the command-line tool each own one HttpPool and pass it
+to the probe engine. HTTP/2 is used when requested and httpx with h2
+support is installed (pip install "httpx[http2]").
+
+Requests sent inside tracing(trace) record how long new connections
+spent on DNS, TCP connect and TLS into the trace (HTTP/1.1 only). Given
+a DnsCache, new HTTP/1.1 connections resolve their host through it.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Number of hosts to keep a connection pool for
+DEFAULT_POOL_CONNECTIONS = 100
+
+# Connections kept open to a single host
+DEFAULT_POOL_MAXSIZE = 10
+
+# Seconds an idle connection is kept open (asyncio backend and HTTP/2)
+KEEPALIVE_TIMEOUT = 30
+
+# Bytes read from a streamed body at a time
+CHUNK_SIZE = 16 * 1024
+
+# Unread bodies up to this size are drained so the connection goes back to the pool
+DRAIN_BYTES = 64 * 1024
+
+# Exceptions raised by either client, grouped the way make_request reports them
+if httpx is not None:
+    CONNECTION_ERRORS = (requests.exceptions.ConnectionError, httpx.NetworkError)
+    TIMEOUT_ERRORS = (requests.exceptions.Timeout, httpx.TimeoutException)
+    REQUEST_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError, httpx.InvalidURL)
+else:
+    CONNECTION_ERRORS = (requests.exceptions.ConnectionError,)
+    TIMEOUT_ERRORS = (requests.exceptions.Timeout,)
+    REQUEST_ERRORS = (requests.exceptions.RequestException,)
+
+
+class _NoCookies(DefaultCookiePolicy):
+    """Never keep cookies between requests, one search must not affect the next"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+_tracing = threading.local()
+
+
+@contextmanager
+def tracing(trace):
+    """Record connection spans of requests sent by this thread into trace (a metrics.ProbeTrace)"""
+    previous = getattr(_tracing, "trace", None)
+    _tracing.trace = trace
+    try:
+        yield
+    finally:
+        _tracing.trace = previous
+
+
+class _TracedConnectionMixin:
+    """Resolves new connections through the pool's DnsCache and times their DNS and TCP connect for the active trace"""
+
+    resolver = None
+
+    def _new_conn(self):
+        trace = getattr(_tracing, "trace", None)
+        if trace is None and self.resolver is None:
+            return super()._new_conn()
+
+        started = time.perf_counter()
+        try:
+            if self.resolver is not None:
+                address = self.resolver.resolve(self._dns_host, self.port)[0][4][0]
+            else:
+                address = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except (OSError, IndexError):
+            # Let urllib3 resolve again and raise its usual error
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        if trace is not None:
+            trace.span("dns", resolved - started)
+
+        # Connect to the address just resolved, the host name still goes into SNI and Host
+        host = self._dns_host
+        self._dns_host = address
+        try:
+            sock = super()._new_conn()
+        except NewConnectionError:
+            # The first address failed, fall back to urllib3 trying every address
+            self._dns_host = host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        if trace is not None:
+            trace.span("connect", time.perf_counter() - resolved)
+        return sock
+
+
+class TracedHTTPConnection(_TracedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TracedHTTPSConnection(_TracedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        trace = getattr(_tracing, "trace", None)
+        if trace is None:
+            return super().connect()
+
+        started = time.perf_counter()
+        opened = trace.connection_time()
+        super().connect()
+        # Whatever connect() spent beyond DNS and TCP was the handshake
+        trace.span("tls", time.perf_counter() - started - (trace.connection_time() - opened))
+
+
+class TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TracedHTTPConnection
+
+
+class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TracedHTTPSConnection
+
+
+def _pool_classes(resolver):
+    """Connection pool classes per scheme whose connections resolve through resolver"""
+    if resolver is None:
+        return {"http": TracedHTTPConnectionPool, "https": TracedHTTPSConnectionPool}
+    http = type("ResolvedHTTPConnection", (TracedHTTPConnection,), {"resolver": resolver})
+    https = type("ResolvedHTTPSConnection", (TracedHTTPSConnection,), {"resolver": resolver})
+    return {
+        "http": type("ResolvedHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http}),
+        "https": type("ResolvedHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https}),
+    }
+
+
+class TracedAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report their setup time to the active trace and resolve through resolver"""
+
+    def __init__(self, *args, resolver=None, **kwargs):
+        # init_poolmanager() runs inside HTTPAdapter.__init__
+        self._pool_classes = _pool_classes(resolver)
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+
+class HttpPool:
+    """
+    Keep-alive connection pool shared across searches.
+
+    Args:
+        pool_maxsize (int): Connections kept open to a single host
+        host_pool_sizes (dict): Per-host overrides of pool_maxsize, e.g. {"www.reddit.com": 20}
+        pool_connections (int): Number of hosts to keep a pool for
+        http2 (bool): Use HTTP/2 through httpx when it is installed with h2, HTTP/1.1 otherwise
+        dns (DnsCache): Resolves the hosts of new connections, None uses the system resolver every time
+            (HTTP/1.1 only, httpx resolves on its own)
+    """
+
+    def __init__(self, pool_maxsize=DEFAULT_POOL_MAXSIZE, host_pool_sizes=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, http2=False, dns=None):
+        self.http2 = bool(http2) and httpx is not None
+        self._session = None
+        self._client = None
+
+        if self.http2:
+            try:
+                self._client = httpx.Client(
+                    http2=True,
+                    follow_redirects=True,
+                    cookies=CookieJar(policy=_NoCookies()),
+                    limits=httpx.Limits(max_keepalive_connections=pool_connections * pool_maxsize,
+                                        keepalive_expiry=KEEPALIVE_TIMEOUT),
+                )
+                return
+            except ImportError:
+                # httpx without the h2 package (pip install "httpx[http2]")
+                self.http2 = False
+
+        self._session = requests.Session()
+        self._session.cookies.set_policy(_NoCookies())
+        adapter = TracedAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, resolver=dns)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # requests picks the longest matching prefix, so these win over the defaults
+        for host, size in (host_pool_sizes or {}).items():
+            host_adapter = TracedAdapter(pool_connections=1, pool_maxsize=size, resolver=dns)
+            self._session.mount(f"https://{host}", host_adapter)
+            self._session.mount(f"http://{host}", host_adapter)
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        """
+        Send a GET request over a pooled connection, following redirects.
+
+        With stream=True only the status line and headers are read; the
+        body is left on the connection for iter_body() or release().
+        """
+        if self._client is not None:
+            request = self._client.build_request("GET", url, headers=headers, timeout=timeout)
+            return self._client.send(request, stream=stream)
+        return self._session.get(url, headers=headers, timeout=timeout, stream=stream)
+
+    def head(self, url, headers=None, timeout=None, allow_redirects=True):
+        """Send a HEAD request over a pooled connection, following redirects unless allow_redirects is False"""
+        if self._client is not None:
+            return self._client.head(url, headers=headers, timeout=timeout, follow_redirects=allow_redirects)
+        return self._session.head(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+
+    def close(self):
+        """Close every pooled connection"""
+        if self._client is not None:
+            self._client.close()
+        if self._session is not None:
+            self._session.close()
+
+
+def iter_body(r, chunk_size=CHUNK_SIZE):
+    """Iterate over the decoded body of a streamed requests or httpx response"""
+    if hasattr(r, "iter_bytes"):
+        return r.iter_bytes(chunk_size)
+    return r.iter_content(chunk_size)
+
+
+def body_charset(headers):
+    """Charset declared in the Content-Type header, or None"""
+    for param in headers.get("Content-Type", "").split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset" and value:
+            return value.strip('"\' ')
+    return None
+
+
+def release(r, drain=True):
+    """
+    Finish with a streamed response.
+
+    When drain is set and the unread body is small it is read and thrown
+    away so the connection can be reused; otherwise the connection is
+    dropped. Pass drain=False once part of the body has been read.
+    """
+    try:
+        length = int(r.headers.get("Content-Length", ""))
+    except ValueError:
+        length = None
+
+    try:
+        if drain and length is not None and length <= DRAIN_BYTES:
+            for _ in iter_body(r):
+                pass
+    except REQUEST_ERRORS:
+        pass
+    finally:
+        r.close()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Incremental Re-check
+===================================================
+
+Monitoring a username means searching it again and again while almost
+nothing changes. A re-check takes the previous result set, the JSON
+that /search returns, and probes only the sites whose answer may be out
+of date:
+
+    - the result is older than max_age
+    - the site could not be checked last time (error, skipped)
+    - the site's definition in data.json changed, told by its digest in
+      the result set's "site_hashes"
+    - the site is new
+
+Every other result is reused as it was. The new result set has the same
+shape, with the time each result was checked and the list of profiles
+whose status changed, and can be passed to the next re-check.
+
+A site that fails on a re-check keeps its previous answer, so a profile
+going from found to an error and then to not found is still reported as
+one change.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+from datetime import datetime
+
+from engine import error_result
+
+# Seconds a result is reused before its site is probed again
+DEFAULT_MAX_AGE = 24 * 3600
+
+# Statuses that answer whether the profile exists, the others are probed again
+DEFINITIVE = frozenset({"found", "not_found", "not_allowed"})
+
+
+def site_hashes(sites):
+    """site name -> digest of its data.json entry"""
+    return {site.name: site.digest for site in sites}
+
+
+def check_result_set(previous):
+    """
+    Validate a result set passed in for a re-check.
+
+    Raises:
+        ValueError: If it is not shaped like the JSON /search returns
+    """
+    if not isinstance(previous, dict):
+        raise ValueError("previous results must be an object")
+    username = previous.get("username")
+    if not isinstance(username, str) or len(username.strip()) < 2:
+        raise ValueError("previous results have no valid username")
+    results = previous.get("results", [])
+    if not isinstance(results, list) or not all(isinstance(result, dict) for result in results):
+        raise ValueError("previous results must hold a list of results")
+    for result in results:
+        if not isinstance(result.get("platform"), str) or not isinstance(result.get("status"), str):
+            raise ValueError("every previous result needs a platform and a status")
+    hashes = previous.get("site_hashes")
+    if hashes is not None and not isinstance(hashes, dict):
+        raise ValueError("site_hashes must be an object")
+
+
+def checked_at(result, previous):
+    """
+    When a previous result was checked, the result set's timestamp if it does not say, None if unknown.
+
+    Stamps are naive local time like datetime.now(), ones with an offset ("Z", "+00:00") are converted to it.
+    """
+    stamp = result.get("checked") or previous.get("timestamp")
+    try:
+        checked = datetime.fromisoformat(stamp)
+    except (TypeError, ValueError):
+        return None
+    if checked.tzinfo is not None:
+        checked = checked.astimezone().replace(tzinfo=None)
+    return checked
+
+
+def kept_result(result, previous):
+    """A previous result carried over, with the time it was checked"""
+    checked = checked_at(result, previous)
+    return dict(result, checked=checked.isoformat()) if checked is not None else dict(result)
+
+
+def plan_recheck(previous, sites, max_age=DEFAULT_MAX_AGE, now=None):
+    """
+    Split a re-check into the results that can be reused and the sites to probe.
+
+    Args:
+        previous (dict): Previous result set, see check_result_set()
+        sites (Manifest): Compiled sites
+        max_age (float): Seconds a result is reused
+        now (datetime): Time of the re-check, defaults to now
+
+    Returns:
+        tuple: (kept, stale) where kept maps site index to the reused
+        result and stale lists the Sites to probe again
+    """
+    now = now or datetime.now()
+    previous_results = {result.get("platform"): result for result in previous.get("results", [])}
+    # Result sets from before site_hashes existed are judged by age and status alone
+    hashes = previous.get("site_hashes")
+
+    kept = {}
+    stale = []
+    for site in sites:
+        result = previous_results.get(site.name)
+        checked = checked_at(result, previous) if result is not None else None
+        if result is None or result.get("status") not in DEFINITIVE or checked is None \
+                or (now - checked).total_seconds() > max_age \
+                or (hashes is not None and hashes.get(site.name) != site.digest):
+            stale.append(site)
+        else:
+            kept[site.index] = kept_result(result, previous)
+    return kept, stale
+
+
+def diff(previous, results):
+    """
+    Profiles whose status changed since the previous result set.
+
+    Returns:
+        list: {"platform", "url", "before", "after"} per change, before is None for a new site
+    """
+    before = {result.get("platform"): result.get("status") for result in previous.get("results", [])}
+    return [{"platform": result["platform"], "url": result["url"],
+             "before": before.get(result["platform"]), "after": result["status"]}
+            for result in results
+            if result["status"] in DEFINITIVE and before.get(result["platform"]) != result["status"]]
+
+
+def recheck(previous, sites, probe, max_age=DEFAULT_MAX_AGE):
+    """
+    Re-check a previous result set.
+
+    Args:
+        previous (dict): Previous result set, see check_result_set()
+        sites (Manifest): Compiled sites
+        probe (callable): Called with the username and the list of Sites to
+            probe, returns (username, index, result) tuples, e.g.
+            lambda username, stale: pipeline.run_many([username], stale, refresh=True)
+        max_age (float): Seconds a result is reused
+
+    Returns:
+        dict: The new result set: the /search shape plus "site_hashes",
+        a "checked" time per result, "rechecked", "reused", "failed"
+        (sites that could not be checked, they keep their previous answer)
+        and "changes", see diff()
+
+    Raises:
+        ValueError: If previous is malformed
+    """
+    check_result_set(previous)
+    username = previous["username"].strip()
+    now = datetime.now()
+    kept, stale = plan_recheck(previous, sites, max_age, now)
+    previous_results = {result.get("platform"): result for result in previous.get("results", [])}
+
+    results = [None] * len(sites)
+    for index, result in kept.items():
+        results[index] = result
+
+    hashes = site_hashes(sites)
+    failed = []
+    for _, index, result in probe(username, stale) if stale else ():
+        old = previous_results.get(result["platform"])
+        if result["status"] not in DEFINITIVE and old is not None and old.get("status") in DEFINITIVE:
+            failed.append(result["platform"])
+            results[index] = kept_result(old, previous)
+        else:
+            results[index] = dict(result, checked=now.isoformat())
+
+    # A probe stream cut short leaves holes, the previous answers fill them
+    for site in stale:
+        if results[site.index] is None:
+            old = previous_results.get(site.name)
+            results[site.index] = kept_result(old, previous) if old is not None else \
+                error_result(site.name, site.url_for(username), "Not checked")
+            failed.append(site.name)
+
+    # Answers carried over were not checked against the current definition, so the next re-check probes them
+    for name in failed:
+        del hashes[name]
+
+    return {
+        "username": username,
+        "total_platforms": len(sites),
+        "found_count": sum(1 for result in results if result["status"] == "found"),
+        "results": results,
+        "timestamp": now.isoformat(),
+        "site_hashes": hashes,
+        "rechecked": len(stale),
+        "reused": len(kept),
+        "failed": failed,
+        "changes": diff(previous, results),
+    }
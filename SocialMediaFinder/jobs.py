@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Search Jobs
+==========================================
+
+Searches that outlive the request that started them. POST /jobs returns
+a job id straight away; the scan runs in the background and every event
+it produces is stored in order, numbered from 1. Clients then read the
+events from any offset, as a JSON page or as an SSE stream that resumes
+from Last-Event-ID, so a reconnecting browser or a batch consumer never
+causes a second scan.
+
+A job for one username stores the same start/progress/result/complete
+events as /search-stream; a job for several stores the /search-batch
+events.
+
+Two stores are available, mirroring the result cache: an in-process one
+and a SQLite one (the default) that keeps jobs across restarts and can
+be shared by several worker processes. Each job records the manager that
+runs it, which refreshes its heartbeat while it is queued or running; a
+job whose heartbeat stopped was lost with its process and is failed the
+next time it is read.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from engine import batch_events, events
+from pipeline import SharedProbes
+from serving import SearchExecutor
+
+# Job states, the last three are final
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# Seconds a finished job and its events are kept
+JOB_TTL = 24 * 3600
+
+# Events are written in batches of up to FLUSH_EVENTS, at least every FLUSH_SECONDS
+FLUSH_EVENTS = 200
+FLUSH_SECONDS = 0.5
+
+# How often the heartbeat of every queued or running job is refreshed
+HEARTBEAT_SECONDS = 10
+
+# A queued or running job whose heartbeat is this old was lost with its process
+STALE_SECONDS = 60
+
+# How often a follower checks the store, for jobs run by another process
+FOLLOW_POLL = 1.0
+
+
+class MemoryJobStore:
+    """In-process job store, jobs are lost on restart"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            self._events[job["id"]] = []
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+
+    def heartbeat(self, job_ids, now):
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job["finished"] is None:
+                    job["heartbeat"] = now
+
+    def append(self, job_id, new_events, now):
+        with self._lock:
+            stored = self._events[job_id]
+            stored.extend(new_events)
+            job = self._jobs[job_id]
+            job["events"] = len(stored)
+            job["updated"] = now
+
+    def events(self, job_id, offset=0, limit=None):
+        with self._lock:
+            stored = self._events.get(job_id, [])
+            end = len(stored) if limit is None else offset + limit
+            return [(offset + i + 1, event) for i, event in enumerate(stored[offset:end])]
+
+    def purge(self, before):
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["finished"] is not None and job["finished"] < before]
+            for job_id in expired:
+                del self._jobs[job_id]
+                del self._events[job_id]
+
+
+class SQLiteJobStore:
+    """On-disk job store, shared by every process using the same file"""
+
+    def __init__(self, path="jobs.db"):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                       "id TEXT PRIMARY KEY, usernames TEXT, status TEXT, error TEXT, events INTEGER, "
+                       "created REAL, updated REAL, finished REAL, owner TEXT, heartbeat REAL)")
+            # Stores created before jobs had an owner
+            columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished)")
+            db.execute("CREATE TABLE IF NOT EXISTS job_events ("
+                       "job_id TEXT, seq INTEGER, event TEXT, PRIMARY KEY (job_id, seq))")
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def create(self, job):
+        db = self._connect()
+        with db:
+            db.execute("INSERT INTO jobs (id, usernames, status, error, events, created, updated, finished, owner, "
+                       "heartbeat) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (job["id"], json.dumps(job["usernames"]), job["status"], job["error"], job["events"],
+                        job["created"], job["updated"], job["finished"], job["owner"], job["heartbeat"]))
+
+    def update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        db = self._connect()
+        with db:
+            db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        row = self._connect().execute(
+            "SELECT id, usernames, status, error, events, created, updated, finished, owner, heartbeat "
+            "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "usernames": json.loads(row[1]), "status": row[2], "error": row[3],
+                "events": row[4], "created": row[5], "updated": row[6], "finished": row[7],
+                "owner": row[8], "heartbeat": row[9]}
+
+    def delete(self, job_id):
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def heartbeat(self, job_ids, now):
+        db = self._connect()
+        with db:
+            db.executemany("UPDATE jobs SET heartbeat = ? WHERE id = ? AND finished IS NULL",
+                           [(now, job_id) for job_id in job_ids])
+
+    def append(self, job_id, new_events, now):
+        db = self._connect()
+        with db:
+            first = db.execute("SELECT events FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] + 1
+            db.executemany("INSERT INTO job_events VALUES (?, ?, ?)",
+                           [(job_id, first + i, json.dumps(event)) for i, event in enumerate(new_events)])
+            db.execute("UPDATE jobs SET events = ?, updated = ? WHERE id = ?",
+                       (first + len(new_events) - 1, now, job_id))
+
+    def events(self, job_id, offset=0, limit=None):
+        rows = self._connect().execute(
+            "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (job_id, offset, -1 if limit is None else limit)).fetchall()
+        return [(seq, json.loads(event)) for seq, event in rows]
+
+    def purge(self, before):
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM job_events WHERE job_id IN "
+                       "(SELECT id FROM jobs WHERE finished IS NOT NULL AND finished < ?)", (before,))
+            db.execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?", (before,))
+
+
+class JobManager:
+    """
+    Runs search jobs in the background and records their events.
+
+    Args:
+        pipeline (Pipeline): Search path the jobs run through
+        store: SQLiteJobStore or MemoryJobStore
+        max_jobs (int): Jobs running at the same time
+        max_queue (int): Jobs waiting for a slot before new ones are rejected
+        ttl (float): Seconds a finished job is kept
+    """
+
+    def __init__(self, pipeline, store=None, max_jobs=4, max_queue=1000, ttl=JOB_TTL):
+        self.pipeline = pipeline
+        self.store = store if store is not None else MemoryJobStore()
+        self.ttl = ttl
+        self.executor = SearchExecutor(max_searches=max_jobs, max_queue=max_queue)
+        # Identifies this manager in the store, jobs of other processes are never expired while they beat
+        self.owner = uuid.uuid4().hex
+        self._cancels = {}
+        self._pending = {}
+        self._changed = threading.Condition()
+        self._ticker = None
+        self._ticker_lock = threading.Lock()
+
+    def submit(self, usernames, share=False):
+        """
+        Queue a search for usernames.
+
+        Args:
+            usernames (list): The usernames to search for
+            share (bool): Probe each distinct profile URL once, for variant searches
+
+        Returns:
+            dict: The new job
+
+        Raises:
+            Saturated: If the job queue is full
+        """
+        now = time.time()
+        self.store.purge(now - self.ttl)
+
+        job = {"id": uuid.uuid4().hex, "usernames": list(usernames), "status": QUEUED, "error": None,
+               "events": 0, "created": now, "updated": now, "finished": None, "owner": self.owner,
+               "heartbeat": now}
+        self._start_ticker()
+        cancel = threading.Event()
+        self.store.create(job)
+        self._cancels[job["id"]] = cancel
+        try:
+            self.executor.submit(self._run, job["id"], job["usernames"], cancel, share)
+        except BaseException:
+            del self._cancels[job["id"]]
+            self.store.delete(job["id"])
+            raise
+        return job
+
+    def get(self, job_id):
+        """The job with that id, or None"""
+        job = self.store.get(job_id)
+        if job is not None and job["status"] not in FINISHED and job["id"] not in self._cancels \
+                and (job["heartbeat"] or job["updated"]) < time.time() - STALE_SECONDS:
+            # Its manager stopped beating, the process running it is gone
+            self._finish(job_id, FAILED, "Job was interrupted")
+            job = self.store.get(job_id)
+        return job
+
+    def cancel(self, job_id):
+        """Stop a job run by this process, returns False if it is not running here"""
+        cancel = self._cancels.get(job_id)
+        if cancel is None:
+            return False
+        cancel.set()
+        return True
+
+    def events(self, job_id, offset=0, limit=None):
+        """(seq, event) pairs of a job after offset"""
+        return self.store.events(job_id, offset, limit)
+
+    def follow(self, job_id, offset=0):
+        """
+        Yield (seq, event) pairs of a job after offset until it has finished.
+
+        Events already stored come first, then new ones as the job writes them.
+        """
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return
+            pending = self.store.events(job_id, offset)
+            for seq, event in pending:
+                offset = seq
+                yield seq, event
+            if job["status"] in FINISHED and offset >= job["events"]:
+                return
+            if not pending:
+                with self._changed:
+                    self._changed.wait(FOLLOW_POLL)
+
+    def _start_ticker(self):
+        with self._ticker_lock:
+            if self._ticker is None:
+                self._ticker = threading.Thread(target=self._tick, name="job-ticker", daemon=True)
+                self._ticker.start()
+
+    def _tick(self):
+        """Flush events a slow site holds back and refresh the heartbeat of the jobs of this manager"""
+        beat = time.monotonic()
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            try:
+                for pending in list(self._pending.values()):
+                    pending.flush()
+                if time.monotonic() - beat >= HEARTBEAT_SECONDS:
+                    beat = time.monotonic()
+                    job_ids = list(self._cancels)
+                    if job_ids:
+                        self.store.heartbeat(job_ids, time.time())
+            except Exception:
+                # A busy store is tried again on the next tick
+                pass
+
+    def _run(self, job_id, usernames, cancel, share=False):
+        now = time.time()
+        self.store.update(job_id, status=RUNNING, updated=now, heartbeat=now)
+        self._notify()
+        pending = self._pending[job_id] = _PendingEvents(self, job_id)
+        try:
+            sites = self.pipeline.sites()
+            # Jobs already hold a slot of their own, so they probe directly rather than joining a flight
+            results = self.pipeline.run_many(usernames, sites, shared=SharedProbes() if share else None,
+                                             cancel=cancel)
+            if len(usernames) == 1:
+                job_events = events(usernames[0], len(sites),
+                                    ((index, result) for _, index, result in results))
+            else:
+                job_events = batch_events(usernames, len(sites), results)
+
+            # Full batches are written here, the ticker writes the rest every FLUSH_SECONDS
+            for event in job_events:
+                if cancel.is_set():
+                    break
+                pending.add(event)
+            pending.flush()
+            self._finish(job_id, CANCELLED if cancel.is_set() else DONE)
+        except Exception as e:
+            pending.flush()
+            self._finish(job_id, FAILED, str(e))
+        finally:
+            self._pending.pop(job_id, None)
+            self._cancels.pop(job_id, None)
+
+    def _finish(self, job_id, status, error=None):
+        now = time.time()
+        self.store.update(job_id, status=status, error=error, updated=now, finished=now)
+        self._notify()
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+
+class _PendingEvents:
+    """Events of a running job not written yet, flushed by its run and by the ticker"""
+
+    def __init__(self, manager, job_id):
+        self.manager = manager
+        self.job_id = job_id
+        self._events = []
+        self._lock = threading.Lock()
+
+    def add(self, event):
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= FLUSH_EVENTS
+        if full:
+            self.flush()
+
+    def flush(self):
+        # Held while writing, so the batches of one job are stored in order
+        with self._lock:
+            if not self._events:
+                return
+            self.manager.store.append(self.job_id, self._events, time.time())
+            self._events = []
+        self.manager._notify()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Site Manifest
+============================================
+
+Loads data.json once, validates every entry and compiles it into a
+compact Site record, so probes never parse JSON or look up dict keys
+while a search is running. The manifest is reloaded only when the file's
+modification time changes.
+
+A malformed entry raises ManifestError at load time instead of crashing
+halfway through a scan. The markers of "message" sites (errorMsg,
+foundMsg, errorRegex, foundRegex) are compiled here too, see matcher.py.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from enum import Enum
+from urllib.parse import urlsplit
+
+from matcher import Matcher, compile_regex
+from ratelimit import parse_limit
+
+# Most of a page "message" sites read looking for errorMsg, override with "maxBytes" in data.json
+MAX_BODY_BYTES = 512 * 1024
+
+
+class ManifestError(ValueError):
+    """Raised when data.json contains an entry that cannot be checked"""
+
+
+class CheckType(Enum):
+    """How a site tells that a profile does not exist"""
+
+    MESSAGE = "message"
+    STATUS_CODE = "status_code"
+    RESPONSE_URL = "response_url"
+
+
+def _markers(info, key, name):
+    """A string or list of strings from an entry, as a tuple"""
+    value = info.get(key)
+    if value is None:
+        return ()
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not values or not all(isinstance(v, str) and v for v in values):
+        raise ManifestError(f"{name}: {key} must be a non-empty string or a list of them")
+    return tuple(values)
+
+
+class Site:
+    """A compiled data.json entry"""
+
+    __slots__ = ("name", "index", "url_template", "url_prefix", "url_suffix", "check", "error_msg", "found_msg",
+                 "error_regex", "found_regex", "matcher", "error_url", "no_period", "case_insensitive",
+                 "max_bytes", "host",
+                 "rate_limit", "info", "digest", "_matchers")
+
+    def __init__(self, name, index, info):
+        if not isinstance(info, dict):
+            raise ManifestError(f"{name}: entry must be an object")
+
+        url = info.get("url")
+        if not isinstance(url, str) or url.count("{}") != 1 or url.count("{") != 1 or url.count("}") != 1:
+            raise ManifestError(f"{name}: url must contain exactly one {{}} placeholder")
+
+        try:
+            check = CheckType(info.get("errorType"))
+        except ValueError:
+            raise ManifestError(f"{name}: unknown errorType {info.get('errorType')!r}") from None
+
+        error_msg = _markers(info, "errorMsg", name)
+        found_msg = _markers(info, "foundMsg", name)
+        error_regex = _markers(info, "errorRegex", name)
+        found_regex = _markers(info, "foundRegex", name)
+        if check is CheckType.MESSAGE and not (error_msg or found_msg or error_regex or found_regex):
+            raise ManifestError(f"{name}: errorType \"message\" needs errorMsg, foundMsg, errorRegex or foundRegex")
+        try:
+            for source in error_regex + found_regex:
+                compile_regex(source, name)
+            matcher = Matcher(error_msg, found_msg, error_regex, found_regex) if check is CheckType.MESSAGE else None
+        except ValueError as e:
+            raise ManifestError(str(e)) from None
+        except re.error as e:
+            raise ManifestError(f"{name}: markers do not combine: {e}") from None
+
+        error_url = info.get("errorUrl")
+        if check is CheckType.RESPONSE_URL and (not isinstance(error_url, str) or not error_url):
+            raise ManifestError(f"{name}: errorType \"response_url\" needs a non-empty errorUrl")
+
+        no_period = info.get("noPeriod", "False")
+        if no_period not in ("True", "False", True, False):
+            raise ManifestError(f"{name}: noPeriod must be \"True\" or \"False\"")
+
+        case_insensitive = info.get("caseInsensitive", "False")
+        if case_insensitive not in ("True", "False", True, False):
+            raise ManifestError(f"{name}: caseInsensitive must be \"True\" or \"False\"")
+
+        max_bytes = info.get("maxBytes", MAX_BODY_BYTES)
+        if not isinstance(max_bytes, int) or isinstance(max_bytes, bool) or max_bytes <= 0:
+            raise ManifestError(f"{name}: maxBytes must be a positive integer")
+
+        rate_limit = info.get("rateLimit")
+        if rate_limit is not None:
+            try:
+                rate_limit = parse_limit(rate_limit, name)
+            except ValueError as e:
+                raise ManifestError(str(e)) from None
+
+        self.name = name
+        self.index = index
+        self.url_template = url
+        self.url_prefix, self.url_suffix = url.split("{}")
+        self.check = check
+        self.error_msg = error_msg
+        self.found_msg = found_msg
+        self.error_regex = error_regex
+        self.found_regex = found_regex
+        # Markers compiled for UTF-8 bodies, other charsets are compiled when first seen
+        self.matcher = matcher
+        self._matchers = {}
+        self.error_url = error_url
+        self.no_period = no_period in ("True", True)
+        # Host names never depend on case, so per-user subdomains are always case-insensitive
+        self.case_insensitive = case_insensitive in ("True", True) or "{}" in urlsplit(url).netloc
+        self.max_bytes = max_bytes
+        # Rate-limit key, per-user subdomains share their parent domain's budget
+        self.host = urlsplit(url).netloc.lower().replace("{}.", "")
+        self.rate_limit = rate_limit
+        self.info = info
+        # Changes whenever the entry in data.json does, so results checked against an older definition can be told
+        self.digest = hashlib.sha256(json.dumps(info, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def __repr__(self):
+        return f"Site({self.name!r}, {self.check.value})"
+
+    def url_for(self, username):
+        """Profile URL for username"""
+        return self.url_prefix + username + self.url_suffix
+
+    def probe_key(self, username):
+        """Profile URL for username as the site resolves it, equal for usernames that reach the same profile"""
+        return self.url_for(username.lower() if self.case_insensitive else username)
+
+    def allows(self, username):
+        """Check if username contains period and platform doesn't allow it"""
+        return not (self.no_period and "." in username)
+
+    def matcher_for(self, charset):
+        """Markers compiled for a page body in the given charset"""
+        if not charset or charset.lower().replace("_", "-") in ("utf-8", "utf8"):
+            return self.matcher
+        charset = charset.lower()
+        matcher = self._matchers.get(charset)
+        if matcher is None:
+            try:
+                matcher = Matcher(self.error_msg, self.found_msg, self.error_regex, self.found_regex, charset)
+            except (LookupError, UnicodeEncodeError):
+                matcher = self.matcher
+            self._matchers[charset] = matcher
+        return matcher
+
+
+class Manifest:
+    """Every site in data.json, in file order"""
+
+    def __init__(self, path, mtime, sites):
+        self.path = path
+        self.mtime = mtime
+        self.sites = sites
+        self.by_name = {site.name: site for site in sites}
+
+    def __len__(self):
+        return len(self.sites)
+
+    def __iter__(self):
+        return iter(self.sites)
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+
+def compile_manifest(data, path="", mtime=0.0):
+    """
+    Validate site definitions and compile them into a Manifest.
+
+    Args:
+        data (dict): Parsed data.json
+        path (str): File the definitions came from
+        mtime (float): Modification time of that file
+
+    Returns:
+        Manifest: The compiled sites
+
+    Raises:
+        ManifestError: If any entry is malformed
+    """
+    if not isinstance(data, dict):
+        raise ManifestError("data.json must contain an object of sites")
+    sites = [Site(name, index, info) for index, (name, info) in enumerate(data.items())]
+    return Manifest(path, mtime, sites)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_manifest(path="data.json"):
+    """
+    Load and compile data.json, reusing the compiled copy while the file is unchanged.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ManifestError: If the file is not valid JSON or an entry is malformed
+    """
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime
+
+    cached = _cache.get(path)
+    if cached is not None and cached.mtime == mtime:
+        return cached
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached.mtime == mtime:
+            return cached
+
+        try:
+            with open(path, "r", encoding="utf-8") as raw:
+                data = json.load(raw)
+        except ValueError as e:
+            raise ManifestError(f"{os.path.basename(path)} is not valid JSON: {e}") from None
+
+        manifest = compile_manifest(data, path, mtime)
+        _cache[path] = manifest
+        return manifest
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Body Matcher
+===========================================
+
+Decides "message" sites from the raw body bytes. A site can list several
+markers in data.json:
+
+    errorMsg     text of the "no such user" page (negative), a string or a list
+    foundMsg     text only an existing profile shows (positive), a string or a list
+    errorRegex   regular expressions for the negative case, for pages that vary
+    foundRegex   regular expressions for the positive case
+
+Every marker of a site is compiled once, when the manifest is loaded:
+literals are encoded to bytes and the regexes of each kind are joined
+into one pattern. The body is scanned as it downloads, chunk by chunk,
+never decoded to str, and the earliest marker decides.
+
+Literals are located with bytes.find, which runs CPython's fast search
+in C, and a site with only one errorMsg needs nothing else. Measured on
+a 500 KB page, a find per marker costs a fraction of one alternation of
+the same literals in re, and re gets several times slower still once
+each alternative is wrapped in a group to tell its kind apart. An
+Aho-Corasick automaton would have to step through every byte in the
+interpreter, so these beat it by a wide margin.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import re
+
+# Kinds of marker
+NEGATIVE = "negative"
+POSITIVE = "positive"
+
+# Bytes of the previous chunk searched again with the next one when a site
+# has regexes, so a match split across two chunks is still seen
+REGEX_OVERLAP = 1024
+
+
+def compile_regex(pattern, where):
+    """
+    Compile a data.json regex over bytes.
+
+    Raises:
+        ValueError: If the pattern does not compile
+    """
+    try:
+        return re.compile(pattern.encode("utf-8"))
+    except re.error as e:
+        raise ValueError(f"{where}: invalid regex {pattern!r}: {e}") from None
+
+
+class Matcher:
+    """
+    Every marker of one site, compiled for one body encoding.
+
+    Args:
+        negatives (tuple): Literal markers of a missing profile
+        positives (tuple): Literal markers of an existing profile
+        negative_regexes (tuple): Regex sources of a missing profile
+        positive_regexes (tuple): Regex sources of an existing profile
+        encoding (str): How the literals are encoded in the body
+    """
+
+    __slots__ = ("has_positive", "overlap", "_literals", "_regexes")
+
+    def __init__(self, negatives=(), positives=(), negative_regexes=(), positive_regexes=(), encoding="utf-8"):
+        negatives = [marker.encode(encoding) for marker in negatives]
+        positives = [marker.encode(encoding) for marker in positives]
+        self.has_positive = bool(positives or positive_regexes)
+
+        # Negatives first, so they win a tie at the same position
+        self._literals = tuple([(marker, NEGATIVE) for marker in negatives]
+                               + [(marker, POSITIVE) for marker in positives])
+        self._regexes = tuple((re.compile(b"|".join(b"(?:%s)" % source.encode("utf-8") for source in sources)), kind)
+                              for sources, kind in ((negative_regexes, NEGATIVE), (positive_regexes, POSITIVE))
+                              if sources)
+
+        longest = max(map(len, negatives + positives), default=1)
+        self.overlap = max(longest - 1, REGEX_OVERLAP if self._regexes else 0)
+
+    def search(self, data):
+        """Kind of the earliest marker in data, or None"""
+        first = len(data)
+        kind = None
+        for marker, marker_kind in self._literals:
+            at = data.find(marker, 0, first + len(marker))
+            if at != -1 and at < first:
+                first, kind = at, marker_kind
+        for pattern, pattern_kind in self._regexes:
+            match = pattern.search(data)
+            if match is not None and match.start() < first:
+                first, kind = match.start(), pattern_kind
+        return kind
+
+    def verdict(self, matched):
+        """Whether a page with that first marker (None for none) is an existing profile"""
+        if matched is not None:
+            return matched == POSITIVE
+        # Without positive markers a page is a profile unless it says otherwise
+        return not self.has_positive
+
+
+class BodyScanner:
+    """
+    Search a body for a site's markers while it downloads.
+
+    Feed chunks in order; feed() returns True once a marker has been seen
+    or the byte cap is reached, after which nothing more needs to be read.
+
+    Args:
+        matcher (Matcher): The site's compiled markers
+        max_bytes (int): Stop reading after this many bytes
+    """
+
+    __slots__ = ("matcher", "max_bytes", "matched", "read", "_tail")
+
+    def __init__(self, matcher, max_bytes):
+        self.matcher = matcher
+        self.max_bytes = max_bytes
+        self.matched = None
+        self.read = 0
+        self._tail = b""
+
+    def feed(self, chunk):
+        """Scan the next chunk, returns True when reading can stop"""
+        if self.read + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.read]
+        self.read += len(chunk)
+
+        window = self._tail + chunk
+        self.matched = self.matcher.search(window)
+        if self.matched is not None:
+            return True
+        overlap = self.matcher.overlap
+        self._tail = window[-overlap:] if overlap else b""
+        return self.read >= self.max_bytes
+
+
+def scan_body(chunks, matcher, max_bytes):
+    """
+    Search a body for a site's markers, reading no more than needed.
+
+    Args:
+        chunks (iterable): Body as a sequence of bytes chunks
+        matcher (Matcher): The site's compiled markers
+        max_bytes (int): Stop reading after this many bytes
+
+    Returns:
+        str: NEGATIVE or POSITIVE for the first marker seen, None at the end of the body or the cap
+    """
+    scanner = BodyScanner(matcher, max_bytes)
+    for chunk in chunks:
+        if scanner.feed(chunk):
+            break
+    return scanner.matched
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Metrics
+======================================
+
+Probe metrics in the Prometheus text format, served by the web app on
+/metrics: per-site latency histograms, bytes downloaded, HTTP status and
+outcome counters, errors by kind, cache hit ratio, probes in flight,
+open streams and the load of the search pool.
+
+Every probe also carries a ProbeTrace that splits its time into spans:
+
+    wait     queued behind the host's rate limit
+    dns      resolving the host name (new connections only)
+    connect  TCP connect (new connections only; includes TLS on the asyncio backend)
+    tls      TLS handshake (new connections only)
+    ttfb     request sent until the response headers arrived
+    body     reading the body
+
+When enabled (SHERLOCK_TRACE=1 for the web app, --trace on the command
+line) spans are exported per site, and each probed result carries its own
+under "spans", so the sites and phases that dominate one search stand out.
+
+No client library is needed, the format is written directly.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import threading
+from collections import defaultdict
+
+# Upper bounds of the probe latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Parts of a probe a ProbeTrace times, in the order they happen
+PHASES = ("wait", "dns", "connect", "tls", "ttfb", "body")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels, or read from a callback when rendered"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def items(self):
+        """(labels, value) pairs recorded so far"""
+        with self._lock:
+            return list(self._values.items())
+
+    def lines(self):
+        if self.callback is not None:
+            value = self.callback()
+            if value is not None:
+                yield f"{self.name} {_format_value(value)}"
+            return
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in sorted(values):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down, or is read from a callback when rendered"""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    """Cumulative histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # labels -> [count per bucket..., sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def lines(self):
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+        for labels, counts in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class ProbeTrace:
+    """Where the time of one probe went, filled in by the engine and the connection pool"""
+
+    __slots__ = ("status_code", "bytes", "spans")
+
+    def __init__(self):
+        self.status_code = None
+        self.bytes = 0
+        self.spans = {}
+
+    def span(self, phase, seconds):
+        """Add seconds to a phase, phases repeat across retries and redirects"""
+        self.spans[phase] = self.spans.get(phase, 0.0) + max(0.0, seconds)
+
+    def connection_time(self):
+        """Seconds spent opening connections"""
+        spans = self.spans
+        return spans.get("dns", 0.0) + spans.get("connect", 0.0) + spans.get("tls", 0.0)
+
+
+class ProbeMetrics:
+    """
+    Metrics of every probe of a process.
+
+    Args:
+        spans (bool): Also export time per site and phase from each probe's trace
+    """
+
+    def __init__(self, spans=False):
+        self.spans = spans
+        self._metrics = []
+
+        self.probe_seconds = self._add(Histogram(
+            "sherlock_probe_duration_seconds", "Time to check one site, not counting rate-limit waits",
+            ("site",)))
+        self.results = self._add(Counter(
+            "sherlock_probe_results_total", "Probes by outcome", ("site", "status")))
+        self.responses = self._add(Counter(
+            "sherlock_http_responses_total", "HTTP responses by status code", ("site", "code")))
+        self.errors = self._add(Counter(
+            "sherlock_probe_errors_total", "Failed requests by kind", ("site", "kind")))
+        self.bytes = self._add(Counter(
+            "sherlock_probe_bytes_total", "Body bytes downloaded", ("site",)))
+        self.in_flight = self._add(Gauge(
+            "sherlock_probes_in_flight", "Probes currently running"))
+        self.streams = self._add(Gauge(
+            "sherlock_active_streams", "Open streaming responses"))
+        self.phase_seconds = self._add(Histogram(
+            "sherlock_probe_phase_seconds", "Time per probe phase", ("phase",)))
+        self.site_phase_seconds = self._add(Counter(
+            "sherlock_site_phase_seconds_total", "Time spent per site and probe phase", ("site", "phase")))
+        self.in_flight.set(0)
+        self.streams.set(0)
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def watch_cache(self, cache):
+        """Export the hit ratio of a ResultCache"""
+        def ratio():
+            lookups = cache.hits + cache.misses
+            return cache.hits / lookups if lookups else None
+
+        self._add(Counter("sherlock_cache_hits_total", "Result cache hits", callback=lambda: cache.hits))
+        self._add(Counter("sherlock_cache_misses_total", "Result cache misses", callback=lambda: cache.misses))
+        self._add(Gauge("sherlock_cache_hit_ratio", "Share of lookups answered by the result cache",
+                        callback=ratio))
+
+    def watch_dns(self, dns):
+        """Export the lookups answered by a DnsCache"""
+        self._add(Counter("sherlock_dns_hits_total", "Host name lookups answered by the DNS cache",
+                          callback=lambda: dns.hits))
+        self._add(Counter("sherlock_dns_misses_total", "Host name lookups sent to the resolver",
+                          callback=lambda: dns.misses))
+        self._add(Gauge("sherlock_dns_entries", "Host names held by the DNS cache", callback=lambda: len(dns)))
+
+    def watch_searches(self, executor):
+        """Export the load of a SearchExecutor"""
+        self._add(Gauge("sherlock_searches_running", "Searches running on the search pool",
+                        callback=lambda: executor.running))
+        self._add(Gauge("sherlock_searches_queued", "Searches waiting for a slot on the search pool",
+                        callback=lambda: executor.queued))
+        self._add(Counter("sherlock_searches_rejected_total", "Searches turned away because the pool was saturated",
+                          callback=lambda: executor.rejected))
+
+    def probe_started(self):
+        self.in_flight.inc()
+
+    def probe_finished(self, site_name, result, seconds, trace):
+        """Record a finished probe, with spans enabled its trace is also added to the result as "spans" """
+        self.in_flight.dec()
+        self.results.inc(site_name, result["status"])
+        if trace.status_code is not None:
+            self.responses.inc(site_name, str(trace.status_code))
+        if trace.bytes:
+            self.bytes.inc(site_name, amount=trace.bytes)
+        if result["status"] in ("not_allowed", "skipped"):
+            return
+
+        self.probe_seconds.observe(seconds - trace.spans.get("wait", 0.0), site_name)
+        if self.spans:
+            for phase, spent in trace.spans.items():
+                self.phase_seconds.observe(spent, phase)
+                self.site_phase_seconds.inc(site_name, phase, amount=spent)
+            if trace.spans:
+                result["spans"] = dict(trace.spans)
+
+    def record_error(self, site_name, errstr):
+        """Count a request error, errstr is the kind passed to on_error, e.g. "Timeout Error:" """
+        self.errors.inc(site_name, errstr.rstrip(":"))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        out = []
+        for metric in self._metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.lines())
+        return "\n".join(out) + "\n"
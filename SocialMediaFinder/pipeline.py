@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Search Pipeline
+==============================================
+
+The single path every search takes, whichever front end started it:
+
+    manifest -> plan -> [share] -> probe (fetch + classify) -> sink
+
+The manifest stage loads the compiled data.json, plan answers what needs
+no request (usernames a site cannot have), probe runs the rest through
+the cache and the probe engine, and the caller's sink turns the
+(index, result) stream into terminal lines, a JSON list or events. The
+command-line tool and the web app only differ in their sink.
+
+The optional share stage is used by variant searches: usernames that a
+site resolves to the same profile URL are probed once, and the result is
+fanned back out to each of them.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import threading
+from collections import deque
+
+import engine
+from cache import normalize_username
+from engine import not_allowed_result
+from manifest import load_manifest
+
+
+def plan(usernames, sites):
+    """
+    Split a search into results known up front and the probes it needs.
+
+    Args:
+        usernames (list): The usernames to search for
+        sites (Manifest): Compiled sites
+
+    Returns:
+        tuple: (immediate, pairs) where immediate is a list of
+        (username, index, result) for usernames a site does not allow and
+        pairs lazily yields the (username, Site) pairs left to probe
+    """
+    immediate = [(username, site.index, not_allowed_result(site.name))
+                 for username in usernames for site in sites if not site.allows(username)]
+    pairs = ((username, site) for username in usernames for site in sites if site.allows(username))
+    return immediate, pairs
+
+
+class SharedProbes:
+    """
+    Probe every distinct profile URL once, however many usernames lead to it.
+
+    Two usernames share a probe on a site when Site.probe_key() gives the
+    same URL for both, e.g. "Alice" and "alice" on a case-insensitive
+    site. The first of them is probed, the others get a copy of its result.
+
+    Attributes:
+        checks (int): (username, site) pairs that went through the stage
+        probes (int): Pairs actually handed to the probe engine
+    """
+
+    def __init__(self):
+        self.checks = 0
+        self.probes = 0
+        self._keys = {}
+        self._waiting = {}
+        self._done = {}
+        self._ready = deque()
+        self._lock = threading.Lock()
+
+    def unique(self, pairs):
+        """Pairs to probe, without the ones whose profile URL is already being probed"""
+        # The asyncio engine pulls pairs on its loop thread, hence the lock
+        for username, site in pairs:
+            key = (site.index, site.probe_key(username))
+            with self._lock:
+                self.checks += 1
+                done = self._done.get(key)
+                if done is not None:
+                    self._ready.append(self._share(site, username, *done))
+                    continue
+                waiting = self._waiting.get(key)
+                if waiting is not None:
+                    waiting.append(username)
+                    continue
+                self._keys[(username, site.index)] = (key, site)
+                self._waiting[key] = []
+                self.probes += 1
+            yield username, site
+
+    def fan_out(self, results):
+        """Probe results followed by a copy for every username that shares each of them"""
+        for username, index, result in results:
+            yield username, index, result
+            with self._lock:
+                key, site = self._keys.pop((username, index))
+                self._done[key] = (username, result)
+                shared = [self._share(site, follower, username, result) for follower in self._waiting.pop(key)]
+                shared.extend(self._drain())
+            yield from shared
+        with self._lock:
+            shared = self._drain()
+        yield from shared
+
+    def _drain(self):
+        ready = list(self._ready)
+        self._ready.clear()
+        return ready
+
+    @staticmethod
+    def _share(site, username, probed, result):
+        result = dict(result)
+        if result["url"] == site.url_for(probed):
+            result["url"] = site.url_for(username)
+        return username, site.index, result
+
+
+def collect(sites, results):
+    """Sink that orders (index, result) pairs back into data.json order"""
+    ordered = [None] * len(sites)
+    for index, result in results:
+        ordered[index] = result
+    return ordered
+
+
+class Pipeline:
+    """
+    Search path shared by the command-line tool and the web app.
+
+    Args:
+        manifest_path (str): Location of data.json
+        probe_engine (module): engine (threads, default), aio_engine or a workers.Dispatcher
+        cache (ResultCache): Answers repeated probes, None probes every site
+        inflight (SingleFlight): Joins identical concurrent searches, None runs each one
+        dns (DnsCache): Pre-resolves the hosts of every manifest loaded, None leaves DNS to each connection
+        **probe_kwargs: max_workers, headers, timeout, on_error, session, health, limiter,
+            metrics, cancel and tiers, passed to the probe engine
+    """
+
+    def __init__(self, manifest_path="data.json", probe_engine=engine, cache=None, inflight=None, dns=None,
+                 **probe_kwargs):
+        self.manifest_path = manifest_path
+        self.probe_engine = probe_engine
+        self.cache = cache
+        self.inflight = inflight
+        self.dns = dns
+        self.probe_kwargs = probe_kwargs
+
+    def sites(self):
+        """
+        Manifest stage, the compiled data.json.
+
+        Raises:
+            FileNotFoundError: If data.json does not exist
+            ManifestError: If data.json is malformed
+        """
+        sites = load_manifest(self.manifest_path)
+        limiter = self.probe_kwargs.get("limiter")
+        if limiter is not None:
+            limiter.use_sites(sites)
+        if self.dns is not None:
+            self.dns.use_sites(sites)
+        return sites
+
+    def cached(self, usernames, sites):
+        """
+        Plan and cache stages alone, for a search that needs no probe.
+
+        Returns:
+            list: (username, index, result) in run_many() order, or None if
+            some site has to be probed
+        """
+        if self.cache is None:
+            return None
+        immediate, pairs = plan(usernames, sites)
+        hits = self.cache.cached(pairs)
+        return immediate + hits if hits is not None else None
+
+    def run_many(self, usernames, sites, shared=None, refresh=False, **overrides):
+        """
+        Check every site for every username.
+
+        Args:
+            usernames (list): The usernames to search for
+            sites (Manifest): Compiled sites from sites(), or a list of some of them
+            shared (SharedProbes): Probes each distinct profile URL once, None probes every pair
+            refresh (bool): Probe even what the cache could answer, e.g. to re-check old results
+            **overrides: Probe keyword arguments replacing the pipeline's own for this run
+
+        Yields:
+            tuple: (username, index, result), answers that need no request first
+        """
+        immediate, pairs = plan(usernames, sites)
+        yield from immediate
+
+        if shared is not None:
+            pairs = shared.unique(pairs)
+        kwargs = {**self.probe_kwargs, **overrides}
+        if self.cache is None:
+            results = self.probe_engine.probe_pairs(pairs, **kwargs)
+        else:
+            results = self.cache.probe_pairs(self.probe_engine.probe_pairs, pairs, refresh=refresh, **kwargs)
+        if shared is not None:
+            results = shared.fan_out(results)
+        yield from results
+
+    def run(self, username, sites, **overrides):
+        """
+        Check every site for one username.
+
+        A search for a username that is already being scanned joins that
+        scan instead of starting another one. The scan is cancelled once
+        every caller has closed its iterator. A search the cache answers in
+        full is not a scan at all, its results are returned straight away.
+
+        Returns:
+            iterator: (index, result) pairs in completion order
+
+        Raises:
+            Saturated: If the single-flight layer has no room to start the scan
+        """
+        # A joined scan is cancelled by the single-flight layer, not by one caller
+        cancel = overrides.pop("cancel", None)
+
+        hits = self.cached([username], sites) if not overrides.get("refresh") else None
+        if hits is not None:
+            return ((index, result) for _, index, result in hits)
+
+        def scan(cancel=cancel):
+            for _, index, result in self.run_many([username], sites, cancel=cancel, **overrides):
+                yield index, result
+
+        if self.inflight is None:
+            return scan()
+        return self.inflight.run((normalize_username(username), sites.path, sites.mtime), scan)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Host Rate Limiter
+================================================
+
+Token-bucket rate limiting per host, shared by every search of a
+process. Probes waiting on the same host are served round-robin across
+searches, so one large batch cannot starve an interactive search.
+
+Limits come from, in order of precedence: a side config file
+(ratelimits.json), a "rateLimit" entry on the site in data.json, and
+the limiter's default.
+
+    ratelimits.json:
+        {
+            "default": {"rate": 5, "burst": 10},
+            "hosts": {"www.instagram.com": {"rate": 1, "burst": 3}}
+        }
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Requests per second and burst size allowed per host by default
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+
+# "Too Many Requests", the site is throttling us rather than answering
+THROTTLED_STATUS = 429
+
+# Longest Retry-After a throttled probe will honour
+MAX_RETRY_AFTER = 30.0
+
+# Poll interval of async waiters that are not at the front of the queue
+ASYNC_POLL = 0.01
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delay-seconds form), or None"""
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_limit(value, where):
+    """Validate a {"rate": ..., "burst": ...} object into (rate, burst)"""
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: rate limit must be an object with rate and burst")
+    rate = value.get("rate")
+    burst = value.get("burst", 1)
+    if not isinstance(rate, (int, float)) or isinstance(rate, bool) or rate <= 0:
+        raise ValueError(f"{where}: rate must be a positive number of requests per second")
+    if not isinstance(burst, int) or isinstance(burst, bool) or burst < 1:
+        raise ValueError(f"{where}: burst must be a positive integer")
+    return float(rate), burst
+
+
+class _Host:
+    """Token bucket and round-robin wait queues of one host"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "blocked_until", "queues")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # owner -> waiting tickets, in the order owners get their next turn
+        self.queues = OrderedDict()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def head(self):
+        """Ticket whose turn it is"""
+        for tickets in self.queues.values():
+            return tickets[0]
+        return None
+
+
+class RateLimiter:
+    """
+    Per-host token buckets with fair queueing across owners.
+
+    Args:
+        rate (float): Default requests per second per host, None for no default limit
+        burst (int): Default burst size per host
+        hosts (dict): host -> (rate, burst) overrides
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, hosts=None):
+        self.rate = rate
+        self.burst = burst
+        self._limits = dict(hosts or {})
+        self._site_limits = {}
+        self._manifest = None
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    def _limit(self, host):
+        return self._limits.get(host) or self._site_limits.get(host) or (self.rate, self.burst)
+
+    def configure(self, host, rate, burst):
+        """Set the limit of one host, takes precedence over data.json"""
+        with self._cond:
+            self._limits[host] = (rate, burst)
+            self._hosts.pop(host, None)
+
+    def use_sites(self, sites):
+        """
+        Apply the "rateLimit" entries of a manifest.
+
+        Cheap to call on every search, the entries are only re-read when
+        a different (reloaded) manifest is passed in.
+        """
+        if sites is self._manifest:
+            return
+        site_limits = {site.host: site.rate_limit for site in sites if site.rate_limit is not None}
+        with self._cond:
+            old = {host: self._limit(host) for host in self._hosts}
+            self._site_limits = site_limits
+            self._manifest = sites
+            # Hosts whose limit changed start over with a fresh bucket once idle
+            for host, limit in old.items():
+                if self._limit(host) != limit and not self._hosts[host].queues:
+                    del self._hosts[host]
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            rate, burst = self._limit(host)
+            if rate is None:
+                return None
+            state = self._hosts[host] = _Host(rate, burst)
+        return state
+
+    def _enqueue(self, state, owner):
+        ticket = object()
+        state.queues.setdefault(owner, deque()).append(ticket)
+        return ticket
+
+    def _try_take(self, state, owner, ticket, now):
+        """Grant ticket if it is its turn and a token is available, else return seconds to wait"""
+        state.refill(now)
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        if state.head() is not ticket:
+            return None
+        if state.tokens < 1:
+            return (1 - state.tokens) / state.rate
+
+        state.tokens -= 1
+        tickets = state.queues[owner]
+        tickets.popleft()
+        if tickets:
+            # Owner goes to the back of the line for its next probe
+            state.queues.move_to_end(owner)
+        else:
+            del state.queues[owner]
+        return 0.0
+
+    def _cancel(self, state, owner, ticket):
+        tickets = state.queues.get(owner)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del state.queues[owner]
+
+    def acquire(self, host, owner=None):
+        """
+        Block until a request to host may be sent.
+
+        Args:
+            host (str): Host or rate-limit key of the site
+            owner: Identifies the search the probe belongs to, waiters are served round-robin by owner
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        started = time.monotonic()
+        with self._cond:
+            state = self._host(host)
+            if state is None:
+                return 0.0
+            ticket = self._enqueue(state, owner)
+            try:
+                while True:
+                    wait = self._try_take(state, owner, ticket, time.monotonic())
+                    if wait == 0.0:
+                        self._cond.notify_all()
+                        return time.monotonic() - started
+                    self._cond.wait(wait)
+            except BaseException:
+                self._cancel(state, owner, ticket)
+                self._cond.notify_all()
+                raise
+
+    async def acquire_async(self, host, owner=None):
+        """Async version of acquire(), never blocks the event loop"""
+        started = time.monotonic()
+        with self._cond:
+            state = self._host(host)
+            if state is None:
+                return 0.0
+            ticket = self._enqueue(state, owner)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(state, owner, ticket, time.monotonic())
+                    if wait == 0.0:
+                        self._cond.notify_all()
+                        return time.monotonic() - started
+                await asyncio.sleep(wait if wait is not None else ASYNC_POLL)
+        except BaseException:
+            with self._cond:
+                self._cancel(state, owner, ticket)
+                self._cond.notify_all()
+            raise
+
+    def penalize(self, host, delay):
+        """Stop sending to host for delay seconds, after it answered 429 or Retry-After"""
+        with self._cond:
+            state = self._host(host)
+            if state is not None:
+                state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                state.tokens = min(state.tokens, 0.0)
+
+
+def load_rate_limits(path="ratelimits.json", sites=None, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+    """
+    Build a RateLimiter from the side config file and data.json.
+
+    A missing file is not an error, the defaults and data.json limits apply.
+
+    Raises:
+        ValueError: If the file or an entry in it is malformed
+    """
+    hosts = {}
+    try:
+        with open(path, "r", encoding="utf-8") as raw:
+            config = json.load(raw)
+    except FileNotFoundError:
+        config = {}
+
+    if "default" in config:
+        rate, burst = parse_limit(config["default"], f"{path} default")
+    for host, value in config.get("hosts", {}).items():
+        hosts[host] = parse_limit(value, f"{path} {host}")
+
+    limiter = RateLimiter(rate, burst, hosts)
+    if sites is not None:
+        limiter.use_sites(sites)
+    return limiter
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Search Admission
+===============================================
+
+Searches do not run on the web server's request workers. Every scan is
+handed to one bounded SearchExecutor: a fixed number of searches run at
+a time, a few more wait in line, and anything beyond that is turned
+away with Saturated so the route can answer 503 with a Retry-After hint
+instead of piling up threads until the process falls over.
+
+Producers handed to the executor take a threading.Event that is set
+once nobody wants their output any more (the client went away), so the
+engine stops sending requests for a search nobody is watching.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Searches running at the same time, and searches allowed to wait for a slot
+DEFAULT_MAX_SEARCHES = 8
+DEFAULT_MAX_QUEUE = 16
+
+# Seconds a search is assumed to take until one has finished
+DEFAULT_SEARCH_SECONDS = 10.0
+
+# Weight of the newest search in the running average of search times
+SEARCH_TIME_WEIGHT = 0.2
+
+# Items a streamed producer may run ahead of a slow client
+STREAM_BUFFER = 256
+
+# How often a blocked producer checks whether its client is still there
+CANCEL_POLL = 0.25
+
+_DONE = object()
+
+
+class Saturated(Exception):
+    """Raised when a search cannot be admitted, retry_after is a hint in whole seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many searches in progress, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class _Stream:
+    """Consumer side of SearchExecutor.stream(), closing it cancels the producer"""
+
+    def __init__(self, items, cancel):
+        self._items = items
+        self._cancel = cancel
+        self._finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        item = self._items.get()
+        if item is _DONE:
+            self.close()
+            raise StopIteration
+        if isinstance(item, _Failure):
+            self.close()
+            raise item.error
+        return item
+
+    def close(self):
+        self._finished = True
+        self._cancel.set()
+
+
+class SearchExecutor:
+    """
+    Bounded pool that runs whole searches, separate from the request workers.
+
+    Args:
+        max_searches (int): Searches running at the same time
+        max_queue (int): Searches waiting for a slot before new ones are rejected
+    """
+
+    def __init__(self, max_searches=DEFAULT_MAX_SEARCHES, max_queue=DEFAULT_MAX_QUEUE):
+        self.max_searches = max(1, max_searches)
+        self.max_queue = max(0, max_queue)
+        self.running = 0
+        self.queued = 0
+        self.rejected = 0
+        self.search_seconds = DEFAULT_SEARCH_SECONDS
+        self._executor = ThreadPoolExecutor(max_workers=self.max_searches, thread_name_prefix="search")
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        """Seconds until a slot is likely to be free, from the average search time"""
+        with self._lock:
+            rounds = (self.queued + 1) / self.max_searches
+            return max(1, math.ceil(rounds * self.search_seconds))
+
+    def submit(self, func, *args):
+        """
+        Run func(*args) once a slot is free.
+
+        Raises:
+            Saturated: If every slot is busy and the queue is full
+        """
+        with self._lock:
+            if self.running + self.queued >= self.max_searches + self.max_queue:
+                self.rejected += 1
+                admitted = False
+            else:
+                self.queued += 1
+                admitted = True
+        if not admitted:
+            raise Saturated(self.retry_after())
+        return self._executor.submit(self._run, func, args)
+
+    def _run(self, func, args):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        started = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.running -= 1
+                self.search_seconds += SEARCH_TIME_WEIGHT * (elapsed - self.search_seconds)
+
+    def start_flight(self, run, producer):
+        """SingleFlight start hook, runs the leader of each flight on this executor"""
+        self.submit(run, producer)
+
+    def stream(self, producer):
+        """
+        Run a producer on the executor and iterate over its items here.
+
+        Args:
+            producer (callable): Called with a threading.Event that is set
+                when the returned iterator is closed, returns an iterator
+
+        Returns:
+            iterator: The producer's items; closing it cancels the producer
+
+        Raises:
+            Saturated: If the search cannot be admitted
+        """
+        items = queue.Queue(maxsize=STREAM_BUFFER)
+        cancel = threading.Event()
+
+        def put(item):
+            while not cancel.is_set():
+                try:
+                    items.put(item, timeout=CANCEL_POLL)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def pump():
+            results = None
+            try:
+                results = producer(cancel)
+                for item in results:
+                    if not put(item):
+                        break
+            except Exception as e:
+                put(_Failure(e))
+            finally:
+                close = getattr(results, "close", None)
+                if close is not None:
+                    close()
+                put(_DONE)
+
+        self.submit(pump)
+        return _Stream(items, cancel)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -12,25 +12,45 @@ Date: September 2025
 
 
 Usage:
-    python sherlock.py <username> [--debug]
+    python sherlock.py <username> [--debug] [--workers N] [--backend threads|asyncio] [--trace] [--variants]
+                       [--output-dir DIR] [--format txt|jsonl|csv|sqlite]
+    python sherlock.py [username] --recheck <results.json> [--max-age HOURS]
+    python sherlock.py --file <usernames.txt | -> [--workers N] [--backend threads|asyncio] [--variants]
+                       [--output-dir DIR] [--format txt|jsonl|csv|sqlite]
 
 Example:
     python sherlock.py adityadeore
     python sherlock.py adityadeore --debug
+    python sherlock.py aditya_deore --variants
+    python sherlock.py adityadeore --recheck adityadeore.json --max-age 12
+    python sherlock.py --file handles.txt --workers 100 > results.ndjson
+    python sherlock.py --file handles.txt --output-dir results --format csv > /dev/null
 """
 
-import requests
 import json
 import os
 import sys 
 import argparse
 
+import aio_engine
+import engine
+from dnscache import DnsCache
+from engine import DEFAULT_WORKERS, batch_events
+from health import HealthTracker
+from http_pool import HttpPool
+from incremental import DEFAULT_MAX_AGE, recheck
+from metrics import PHASES, ProbeMetrics
+from pipeline import Pipeline, SharedProbes
+from ratelimit import load_rate_limits
+from tiers import TierTracker
+from variants import expand_username, expand_usernames
+from writers import FORMATS, open_writer, recorded, replace_file
+
 DEBUG = False
 
+# Longest wait for a single site, busy sites get a shorter adaptive timeout
+DEFAULT_TIMEOUT = 10
 
-def write_to_file(url , filename):
-    with open(filename , "a") as f:
-        f.write(url+"\n")
 
 def print_error(err  , errstr , var , debug = False):
     if debug:
@@ -38,100 +58,233 @@ def print_error(err  , errstr , var , debug = False):
     else:
         print (f"\033[37;1m[\033[91;1m-\033[37;1m]\033[91;1m {errstr}\033[93;1m {var}")
 
-def make_request(url, headers, error_type, social_network):
-    try:
-        r = requests.get(url, headers=headers)
-        if r.status_code:
-            return r, error_type
-    except requests.exceptions.HTTPError as errh:
-        print_error(errh, "HTTP Error:", social_network, DEBUG)
-    except requests.exceptions.ConnectionError as errc:
-        print_error(errc, "Error Connecting:", social_network, DEBUG)
-    except requests.exceptions.Timeout as errt:
-        print_error(errt, "Timeout Error:", social_network, DEBUG)
-    except requests.exceptions.RequestException as err:
-        print_error(err, "Unknown error:", social_network, DEBUG)
-    
-    return None, ""
+def report_error(err, errstr, social_network):
+    print_error(err, errstr, social_network, DEBUG)
+
+def report_batch_error(err, errstr, social_network):
+    # stdout carries the NDJSON results in batch mode
+    print(f"ERROR: {errstr} {err if DEBUG else social_network}", file=sys.stderr)
+
+
+def read_usernames(stream):
+    """Usernames from a file, one per line, skipping blanks, # comments and duplicates"""
+    usernames = []
+    seen = set()
+    for line in stream:
+        username = line.strip()
+        if username and not username.startswith("#") and username not in seen:
+            seen.add(username)
+            usernames.append(username)
+    return usernames
+
+
+def make_pipeline(max_workers, backend, timeout, on_error, metrics=None):
+    """Search pipeline for one command-line run, plus the connection pool and tiers to close afterwards"""
+    # Hosts are resolved once, in the background as soon as data.json is loaded
+    dns = DnsCache()
+    http_pool = HttpPool(pool_maxsize=max_workers, dns=dns)
+    aio_engine.probe_loop.use_dns(dns)
+    tiers = TierTracker("tiers.json")
+    pipeline = Pipeline("data.json", aio_engine if backend == "asyncio" else engine, dns=dns,
+                        max_workers=max_workers, timeout=timeout, on_error=on_error, session=http_pool,
+                        health=HealthTracker(default_timeout=timeout, max_timeout=timeout),
+                        limiter=load_rate_limits("ratelimits.json"), metrics=metrics, tiers=tiers)
+    return pipeline, http_pool, tiers
+
+
+def collect_spans(results, into):
+    """Pass (name, result) pairs through, appending each to into for print_trace()"""
+    for item in results:
+        into.append(item)
+        yield item
+
+
+def print_trace(results, limit=15):
+    """Print where the search spent its time, slowest sites first, from the spans of its results"""
+    phases = {}
+    for _, result in results:
+        site = phases.setdefault(result["platform"], {})
+        for phase, spent in result.get("spans", {}).items():
+            site[phase] = site.get(phase, 0.0) + spent
+    print()
+    print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Time per site (seconds):\033[0m")
+    print("{:<20}".format("site") + "".join("{:>9}".format(phase) for phase in PHASES) + "{:>9}".format("total"))
+    slowest = sorted(phases.items(), key=lambda item: sum(item[1].values()), reverse=True)
+    for site, spans in slowest[:limit]:
+        print("{:<20}".format(site[:19]) + "".join("{:>9.3f}".format(spans.get(phase, 0.0)) for phase in PHASES)
+              + "{:>9.3f}".format(sum(spans.values())))
 
 
-def sherlock(username):
+def sherlock(username, max_workers=DEFAULT_WORKERS, backend="threads", timeout=DEFAULT_TIMEOUT, trace=False,
+             variants=False, output_dir=".", output_format="txt"):
     """
     Main function to search for username across social media platforms.
     
     Args:
         username (str): The username to search for
+        max_workers (int): Number of sites checked at the same time
+        backend (str): "threads" or "asyncio"
+        timeout (float): Longest wait for a single site in seconds
+        trace (bool): Print the time each site spent on DNS, connect, TLS, TTFB and body
+        variants (bool): Also search the case, separator and numeric-suffix variants of username
+        output_dir (str): Directory the results file is saved in
+        output_format (str): "txt" (found profiles only), "jsonl", "csv" or "sqlite"
         
     Returns:
-        None: Creates a text file with found profiles
+        None: Creates <username>.txt (or .jsonl, .csv, .db) with the results
     """
     print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Social Media Finder by Aditya\033[0m")
     print()
 
-    fname = username+".txt"
+    print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Checking username\033[0m\033[1;37m {}\033[0m\033[1;92m on: \033[0m".format(username))
+    metrics = ProbeMetrics(spans=True) if trace else None
+    pipeline, http_pool, tiers = make_pipeline(max_workers, backend, timeout, report_error, metrics)
+    sites = pipeline.sites()
+
+    if variants:
+        names = expand_username(username)
+        print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Variants:\033[1;37m {}\033[0m".format(", ".join(names[1:])))
+        shared = SharedProbes()
+        results = ((name, result) for name, _, result in pipeline.run_many(names, sites, shared=shared))
+    else:
+        results = ((username, result) for _, result in pipeline.run(username, sites))
+    traced = []
+    if trace:
+        results = collect_spans(results, traced)
 
-    if os.path.isfile(fname):
-        os.remove(fname)
-        print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Removing previous file:\033[1;37m {}\033[0m".format(fname))
+    # Sites are checked concurrently and printed as they finish. The file
+    # replaces any previous one only once the search is complete
+    writer = open_writer(output_dir, username, output_format)
+    with writer:
+        print_results(username, results, writer)
 
-    print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Checking username\033[0m\033[1;37m {}\033[0m\033[1;92m on: \033[0m".format(username))
-    raw = open("data.json", "r", encoding="utf-8")
-    data = json.load(raw)
-
-    # User agent is needed because some sites does not 
-    # return the correct information because it thinks that
-    # we are bot
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.12; rv:55.0) Gecko/20100101 Firefox/55.0'
-    }
-
-    for social_network in data:
-        url = data.get(social_network).get("url").format(username)
-        error_type = data.get(social_network).get("errorType")
-        cant_have_period = data.get(social_network).get("noPeriod")
-
-        if ("." in username) and (cant_have_period == "True"):
+    http_pool.close()
+    tiers.save(force=True)
+    if variants:
+        print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] {} usernames, {} requests for {} site checks\033[0m".format(
+            len(names), shared.probes, shared.checks))
+    print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Saved: \033[37;1m{}\033[0m".format(writer.path))
+
+    if trace:
+        print_trace(traced)
+
+def print_results(username, results, writer):
+    """Print (name, result) pairs as they come and save them with writer"""
+    for name, result in results:
+        writer.write(name, result)
+        social_network = result["platform"] if name == username else "{} ({})".format(result["platform"], name)
+        status = result["status"]
+
+        if status == "not_allowed":
+            # A variant the site cannot have is not worth a line
+            if name != username:
+                continue
             print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m User Name Not Allowed!".format(social_network))
-            continue
-            
-        r, error_type = make_request(url=url, headers=headers, error_type=error_type, social_network=social_network)
-        
-        # Skip if request failed
-        if r is None:
-            continue
-            
-        if error_type == "message":
-            error = data.get(social_network).get("errorMsg")
-            # Checks if the error message is in the HTML
-            if not error in r.text:
-                print("\033[37;1m[\033[92;1m+\033[37;1m]\033[92;1m {}:\033[0m".format(social_network), url)
-                write_to_file(url, fname)                	
-            
-            else:
-                print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m Not Found!".format(social_network))
-            
-        elif error_type == "status_code":
-            # Checks if the status code of the repsonse is 404
-            if not r.status_code == 404:
-                print("\033[37;1m[\033[92;1m+\033[37;1m]\033[92;1m {}:\033[0m".format(social_network), url)
-                write_to_file(url, fname)
-            
-            else:
-                print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m Not Found!".format(social_network))
-
-        elif error_type == "response_url":
-            error = data.get(social_network).get("errorUrl")
-
-            if not error in r.url:
-                print("\033[37;1m[\033[92;1m+\033[37;1m]\033[92;1m {}:\033[0m".format(social_network), url)
-                write_to_file(url, fname)
-            else:
-                print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m Not Found!".format(social_network))
-
-        elif error_type == "":
+
+        elif status == "found":
+            print("\033[37;1m[\033[92;1m+\033[37;1m]\033[92;1m {}:\033[0m".format(social_network), result["url"])
+
+        elif status == "not_found":
+            print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m Not Found!".format(social_network))
+
+        elif status == "error":
             print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m Error!".format(social_network))
 
-    print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Saved: \033[37;1m{}\033[0m".format(username+".txt"))
+        elif status == "skipped":
+            print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m Skipped!".format(social_network))
+
+def sherlock_recheck(path, username=None, max_workers=DEFAULT_WORKERS, backend="threads", timeout=DEFAULT_TIMEOUT,
+                     max_age=DEFAULT_MAX_AGE):
+    """
+    Re-check a saved result set, probing only what may be out of date, and print what changed.
+
+    Args:
+        path (str): JSON result set from a previous re-check or from the web app's /search,
+            updated in place; a missing file starts a full search
+        username (str): The username to search for, only needed when path does not exist yet
+        max_workers (int): Number of sites checked at the same time
+        backend (str): "threads" or "asyncio"
+        timeout (float): Longest wait for a single site in seconds
+        max_age (float): Seconds a result is reused before its site is probed again
+
+    Raises:
+        ValueError: If the file is not a result set, or is one for another username
+    """
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if username and isinstance(previous, dict) and previous.get("username") != username:
+            raise ValueError(f"{path} holds the results of {previous.get('username')!r}, not {username!r}")
+    elif username:
+        previous = {"username": username, "results": []}
+    else:
+        raise ValueError(f"{path} does not exist yet, a username is needed for the first search")
+
+    print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Re-checking\033[0m\033[1;37m {}\033[0m".format(previous.get("username")))
+    pipeline, http_pool, tiers = make_pipeline(max_workers, backend, timeout, report_error)
+    sites = pipeline.sites()
+
+    result = recheck(previous, sites, lambda name, stale: pipeline.run_many([name], stale, refresh=True), max_age)
+
+    http_pool.close()
+    tiers.save(force=True)
+    replace_file(path, json.dumps(result, indent=2))
+
+    for change in result["changes"]:
+        colour = "92" if change["after"] == "found" else "93"
+        print("\033[37;1m[\033[{0};1m{1}\033[37;1m]\033[92;1m {2}:\033[{0};1m {3} -> {4}\033[0m".format(
+            colour, "+" if change["after"] == "found" else "-", change["platform"], change["before"] or "new",
+            change["after"]), change["url"] if change["after"] == "found" else "")
+    for platform in result["failed"]:
+        print("\033[37;1m[\033[91;1m-\033[37;1m]\033[92;1m {}:\033[93;1m Error! Kept the previous answer".format(platform))
+    if not result["changes"]:
+        print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] No changes\033[0m")
+    print("\033[1;92m[\033[0m\033[1;77m*\033[0m\033[1;92m] Probed {} of {} sites, saved: \033[37;1m{}\033[0m".format(
+        result["rechecked"], result["total_platforms"], path))
+
+def sherlock_batch(usernames, max_workers=DEFAULT_WORKERS, backend="threads", timeout=DEFAULT_TIMEOUT,
+                   out=sys.stdout, variants=False, output_dir=None, output_format="jsonl", name="results"):
+    """
+    Search many usernames at once and write NDJSON results as they finish.
+
+    Args:
+        usernames (list): The usernames to search for
+        max_workers (int): Probes running at the same time across all usernames
+        backend (str): "threads" or "asyncio"
+        timeout (float): Longest wait for a single site in seconds
+        out (file): Where the NDJSON lines are written
+        variants (bool): Also search the variants of every username, sharing probes between them
+        output_dir (str): Also save every result to <output_dir>/<name>.<extension>, None saves nothing
+        output_format (str): "txt", "jsonl", "csv" or "sqlite"
+        name (str): File name of the saved results, without extension
+    """
+    # Health and rate limits are shared by the whole batch, so sites that keep
+    # failing are skipped for later usernames and busy hosts are not flooded
+    pipeline, http_pool, tiers = make_pipeline(max_workers, backend, timeout, report_batch_error)
+    sites = pipeline.sites()
+
+    shared = None
+    if variants:
+        usernames = expand_usernames(usernames)
+        shared = SharedProbes()
+    results = pipeline.run_many(usernames, sites, shared=shared)
+    writer = open_writer(output_dir, name, output_format) if output_dir else None
+    if writer is not None:
+        results = recorded(results, writer)
+    try:
+        for event in batch_events(usernames, len(sites), results):
+            out.write(json.dumps(event) + "\n")
+            out.flush()
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+    if writer is not None:
+        writer.close()
+        print(f"Saved: {writer.path}", file=sys.stderr)
+
+    http_pool.close()
+    tiers.save(force=True)
 
 if __name__ == "__main__":
     """
@@ -142,15 +295,60 @@ if __name__ == "__main__":
         description='Social Media Username Finder - Search for usernames across multiple platforms',
         epilog='Created by Aditya | Example: python sherlock.py johndoe'
     )
-    parser.add_argument('username', help='Username to search across social media platforms')
+    parser.add_argument('username', nargs='?', help='Username to search across social media platforms')
+    parser.add_argument("-f", '--file', metavar="FILE",
+                        help="Search every username in FILE (one per line, '-' for stdin) and print NDJSON results")
     parser.add_argument("-d", '--debug', help="Enable debug mode for detailed error messages", action="store_true")
+    parser.add_argument("-w", '--workers', type=int, default=DEFAULT_WORKERS,
+                        help="Number of sites checked at the same time (default: %(default)s)")
+    parser.add_argument("-b", '--backend', choices=["threads", "asyncio"], default="threads",
+                        help="Run checks on a thread pool or on one asyncio event loop (needs aiohttp)")
+    parser.add_argument("-t", '--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help="Longest wait for a single site in seconds (default: %(default)s)")
+    parser.add_argument('--trace', action="store_true",
+                        help="Print the time each site spent on DNS, connect, TLS, TTFB and body")
+    parser.add_argument('--variants', action="store_true",
+                        help="Also search case, separator (. _ -) and numeric-suffix variants of each username")
+    parser.add_argument('--recheck', metavar="FILE",
+                        help="Re-check the JSON results in FILE, probing only old, failed or changed sites, and update it")
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE / 3600, metavar="HOURS",
+                        help="With --recheck, hours a result is reused before its site is probed again "
+                             "(default: %(default)s)")
+    parser.add_argument("-o", '--output-dir', metavar="DIR",
+                        help="Directory results are saved in (default: the current one, nothing is saved with --file)")
+    parser.add_argument('--format', choices=list(FORMATS),
+                        help="Format of the saved results (default: txt, jsonl with --file)")
 
     args = parser.parse_args()
     
     if args.debug:
         DEBUG = True
 
-    if args.username:
-        sherlock(args.username)
+    if args.recheck:
+        try:
+            sherlock_recheck(args.recheck, args.username, max_workers=args.workers, backend=args.backend,
+                             timeout=args.timeout, max_age=args.max_age * 3600)
+        except ValueError as e:
+            parser.error(str(e))
+
+    elif args.file:
+        if args.file == "-":
+            usernames = read_usernames(sys.stdin)
+        else:
+            with open(args.file, "r", encoding="utf-8") as f:
+                usernames = read_usernames(f)
+        # Never the input file itself, even with --format txt
+        name = ("stdin" if args.file == "-" else os.path.splitext(os.path.basename(args.file))[0]) + "_results"
+        sherlock_batch(usernames, max_workers=args.workers, backend=args.backend, timeout=args.timeout,
+                       variants=args.variants, output_dir=args.output_dir or (args.format and "."),
+                       output_format=args.format or "jsonl", name=name)
+
+    elif args.username:
+        sherlock(args.username, max_workers=args.workers, backend=args.backend, timeout=args.timeout,
+                 trace=args.trace, variants=args.variants, output_dir=args.output_dir or ".",
+                 output_format=args.format or "txt")
+
+    else:
+        parser.error("a username or --file is required")
 
 
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Request Coalescing
+=================================================
+
+Single-flight layer for identical concurrent searches. When several
+clients search the same username at the same time, only the first one
+starts a scan; everyone else subscribes to it. Each subscriber first
+receives the results already produced (replay) and then the live tail,
+so upstream traffic does not grow with the number of viewers.
+
+When the last subscriber leaves, the flight's cancel event is set so the
+producer can stop sending requests right away instead of at its next
+result.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import threading
+from collections import deque
+
+
+class Flight:
+    """One running scan and the results it has produced so far"""
+
+    def __init__(self, key, owner):
+        self.key = key
+        self.items = []
+        self.done = False
+        self.closing = False
+        self.error = None
+        self.subscribers = 0
+        self.cancel = threading.Event()
+        self._owner = owner
+        self._cond = threading.Condition()
+
+    def run(self, producer):
+        """Drain producer, publishing every item to the subscribers"""
+        results = None
+        try:
+            results = producer(self.cancel)
+            for item in results:
+                with self._cond:
+                    self.items.append(item)
+                    self._cond.notify_all()
+                    # Nobody is listening any more, stop sending requests
+                    if self.subscribers == 0:
+                        self.closing = True
+                        break
+        except Exception as e:
+            self.error = e
+        finally:
+            close = getattr(results, "close", None)
+            if close is not None:
+                close()
+            self._owner._finish(self)
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def subscribe(self):
+        """Replay what was produced so far, then follow the live tail, see Subscription"""
+        return Subscription(self)
+
+    def _next(self, position):
+        """Items after position, waiting for the producer; empty once the flight is over"""
+        with self._cond:
+            while position >= len(self.items) and not self.done:
+                self._cond.wait()
+            if position < len(self.items):
+                return self.items[position:]
+            if self.error is not None:
+                raise self.error
+            return []
+
+    def _leave(self):
+        with self._cond:
+            self.subscribers -= 1
+            # Nobody is listening any more, stop sending requests
+            if self.subscribers == 0 and not self.done:
+                self.closing = True
+                self.cancel.set()
+
+
+class Subscription:
+    """
+    Iterator over the items of a flight for one subscriber.
+
+    close() leaves the flight even when nothing was read yet (a generator
+    closed before it started would never run its cleanup), and the last
+    subscriber to leave cancels the scan.
+    """
+
+    def __init__(self, flight):
+        self._flight = flight
+        self._position = 0
+        self._pending = deque()
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        if not self._pending:
+            try:
+                self._pending = deque(self._flight._next(self._position))
+            except BaseException:
+                self.close()
+                raise
+            self._position += len(self._pending)
+            if not self._pending:
+                self.close()
+                raise StopIteration
+        return self._pending.popleft()
+
+    def close(self):
+        """Stop following the flight, safe to call more than once"""
+        if not self._closed:
+            self._closed = True
+            self._pending.clear()
+            self._flight._leave()
+
+    def __del__(self):
+        self.close()
+
+
+class SingleFlight:
+    """
+    Share one producer between concurrent callers using the same key.
+
+    Args:
+        start (callable): Called with (run, producer) to start the leader of
+            a new flight, e.g. SearchExecutor.start_flight; defaults to a
+            thread per flight. Exceptions it raises reach the caller of run()
+    """
+
+    def __init__(self, start=None):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._start = start
+
+    def __len__(self):
+        return len(self._flights)
+
+    def run(self, key, producer):
+        """
+        Iterate over the items of the flight for key, starting it if needed.
+
+        Args:
+            key: Identifies identical requests, e.g. the normalized username
+            producer (callable): Called with a threading.Event that is set
+                once every subscriber has left, returns an iterator of items;
+                only called by the first caller
+
+        Returns:
+            iterator: Every item the producer yields, from the first one
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = True
+            if flight is not None:
+                with flight._cond:
+                    # A flight that is shutting down cannot be joined, start a new one
+                    if not flight.closing:
+                        flight.subscribers += 1
+                        leader = False
+            if leader:
+                flight = Flight(key, self)
+                # Counted before the scan starts so the first results are never dropped
+                flight.subscribers = 1
+                self._flights[key] = flight
+
+        if leader:
+            try:
+                if self._start is None:
+                    threading.Thread(target=flight.run, args=(producer,),
+                                     name=f"flight-{key}", daemon=True).start()
+                else:
+                    self._start(flight.run, producer)
+            except BaseException as e:
+                # Anyone who joined in the meantime gets the same error
+                self._finish(flight)
+                with flight._cond:
+                    flight.error = e
+                    flight.done = True
+                    flight._cond.notify_all()
+                raise
+        return flight.subscribe()
+
+    def _finish(self, flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
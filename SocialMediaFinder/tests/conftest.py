@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The modules live next to this directory, not in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Usernames the local site farm has a profile for
+FARM_PROFILES = frozenset({"alice", "carol"})
+
+# Sites of the farm, all answering 404 for a missing profile
+FARM_SITES = ("Alpha", "Beta", "Gamma")
+
+
+class _FarmHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self, body=True):
+        username = self.path.rstrip("/").rsplit("/", 1)[-1]
+        page = b"profile" if username in FARM_PROFILES else b"missing"
+        self.send_response(200 if username in FARM_PROFILES else 404)
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        if body:
+            self.wfile.write(page)
+
+    def do_HEAD(self):
+        # A body after a HEAD response would be read as the next response on the connection
+        self.do_GET(body=False)
+
+
+class _Farm(ThreadingHTTPServer):
+    # The default backlog of 5 resets connections of a search opening several at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+@pytest.fixture
+def site_farm(tmp_path, monkeypatch):
+    """Working directory holding a data.json whose sites are served locally"""
+    server = _Farm(("127.0.0.1", 0), _FarmHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    data = {name: {"url": f"http://127.0.0.1:{port}/{name.lower()}/{{}}", "errorType": "status_code"}
+            for name in FARM_SITES}
+    (tmp_path / "data.json").write_text(json.dumps(data), encoding="utf-8")
+    # Every site of the farm is one host, which must not be paced like a real one
+    (tmp_path / "ratelimits.json").write_text(json.dumps({"default": {"rate": 100000, "burst": 10000}}),
+                                              encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    server.shutdown()
+    server.server_close()
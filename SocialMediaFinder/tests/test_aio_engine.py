@@ -0,0 +1,44 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import aio_engine
+from aio_engine import ProbeLoop
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    """Sets a cookie on every response and echoes the Cookie header it was sent"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.headers.get("Cookie", "none").encode()
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.mark.skipif(aio_engine.aiohttp is None, reason="aiohttp is not installed")
+def test_shared_session_keeps_no_cookies():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CookieHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # A host name, aiohttp never keeps cookies of bare IP addresses anyway
+    url = f"http://localhost:{server.server_address[1]}/"
+    loop = ProbeLoop()
+
+    async def fetch():
+        session = await loop.session()
+        async with session.get(url) as response:
+            return await response.text()
+
+    try:
+        assert loop.submit(fetch()).result(timeout=10) == "none"
+        assert loop.submit(fetch()).result(timeout=10) == "none"
+    finally:
+        loop.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,110 @@
+import gzip
+import json
+
+import pytest
+
+from manifest import Site
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("SHERLOCK_JOBS", "memory")
+    import app
+
+    return app.app.test_client()
+
+
+@pytest.fixture
+def answered(monkeypatch, client):
+    """Two sites whose results the app's pipeline answers without probing"""
+    import app
+
+    sites = [Site(name, index, {"url": f"https://{name.lower()}.example/{{}}", "errorType": "status_code"})
+             for index, name in enumerate(("Alpha", "Beta"))]
+    results = [{"platform": site.name, "status": "found", "url": site.url_for("alice")} for site in sites]
+    monkeypatch.setattr(app, "OUTPUT_DIR", None)
+    monkeypatch.setattr(app, "load_sites", lambda: (sites, None))
+    monkeypatch.setattr(app.pipeline, "run", lambda username, run_sites: (pair for pair in enumerate(results)))
+    monkeypatch.setattr(app.pipeline, "cached",
+                        lambda usernames, run_sites: [(username, index, result) for username in usernames
+                                                      for index, result in enumerate(results)])
+    return client
+
+
+@pytest.mark.parametrize("body", [["alice", "bob"], "alice", 3, None])
+def test_jobs_reject_bodies_that_are_not_objects(client, body):
+    response = client.post("/jobs", json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("body", [["alice", "bob"], "alice", 3, None])
+def test_search_rejects_bodies_that_are_not_objects(client, body):
+    response = client.post("/search", json=body)
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Request body must be a JSON object"}
+
+
+def test_search_rejects_a_body_that_is_not_json(client):
+    response = client.post("/search", data="username=alice", content_type="application/x-www-form-urlencoded")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Request body must be a JSON object"}
+
+
+def test_search_rejects_a_username_that_is_not_a_string(client):
+    response = client.post("/search", json={"username": 42})
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("body", [["alice", "bob"], "alice", 3, None])
+def test_batch_search_rejects_bodies_that_are_not_objects(client, body):
+    response = client.post("/search-batch", json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def sse_events(body):
+    return [json.loads(message[len("data: "):]) for message in body.decode("utf-8").split("\n\n") if message]
+
+
+def test_merged_stream_has_no_progress_events(answered):
+    response = answered.get("/search-stream/alice?merge=1")
+
+    events = sse_events(response.data)
+    assert [event["type"] for event in events] == ["start", "result", "result", "complete"]
+    assert [event["processed"] for event in events[1:3]] == [1, 2]
+
+
+def test_event_stream_is_never_compressed(answered):
+    response = answered.get("/search-stream/alice", headers={"Accept-Encoding": "gzip"})
+
+    assert response.mimetype == "text/event-stream"
+    assert "Content-Encoding" not in response.headers
+    assert [event["type"] for event in sse_events(response.data)].count("progress") == 2
+
+
+def test_ndjson_stream_is_compressed_when_accepted(answered):
+    compressed = answered.get("/search-stream/alice?format=ndjson", headers={"Accept-Encoding": "gzip"})
+    plain = answered.get("/search-stream/alice?format=ndjson")
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    lines = gzip.decompress(compressed.data).splitlines()
+    assert [json.loads(line)["type"] for line in lines] == [json.loads(line)["type"]
+                                                            for line in plain.data.splitlines()]
+
+
+def test_batch_is_compressed_when_accepted(answered):
+    response = answered.post("/search-batch", json={"usernames": ["alice", "bob"]},
+                             headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    results = [json.loads(line) for line in gzip.decompress(response.data).splitlines()]
+    assert sum(1 for event in results if event["type"] == "result") == 4
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+from sherlock import sherlock_batch
+from writers import FORMATS
+
+
+def saved_rows(path, output_format):
+    """(username or None, platform or url, status or None) of every saved result"""
+    if output_format == "txt":
+        with open(path, encoding="utf-8") as f:
+            return sorted((None, line.strip(), None) for line in f)
+    if output_format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            return sorted((row["username"], row["platform"], row["status"]) for row in map(json.loads, f))
+    if output_format == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["username", "platform", "status", "url", "message"]
+        return sorted((row[0], row[1], row[2]) for row in rows[1:])
+    db = sqlite3.connect(path)
+    try:
+        return sorted(db.execute("SELECT username, platform, status FROM results"))
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("output_format", list(FORMATS))
+def test_batch_saves_every_result_in_each_format(site_farm, output_format):
+    out = io.StringIO()
+
+    sherlock_batch(["alice", "bob"], max_workers=4, out=out, output_dir=str(site_farm / "out"),
+                   output_format=output_format, name="names_results")
+
+    path = site_farm / "out" / f"names_results.{FORMATS[output_format].extension}"
+    rows = saved_rows(path, output_format)
+    if output_format == "txt":
+        # Only the profiles found are listed
+        assert len(rows) == 3 and all(url.endswith("/alice") for _, url, _ in rows)
+    else:
+        assert rows == sorted([("alice", site, "found") for site in ("Alpha", "Beta", "Gamma")]
+                              + [("bob", site, "not_found") for site in ("Alpha", "Beta", "Gamma")])
+    assert json.loads(out.getvalue().splitlines()[-1])["type"] == "complete"
+
+
+class Interrupted(io.StringIO):
+    """NDJSON output that stops the batch after its first result"""
+
+    def write(self, text):
+        if '"type": "result"' in text:
+            raise KeyboardInterrupt
+        return super().write(text)
+
+
+@pytest.mark.parametrize("output_format", list(FORMATS))
+def test_interrupted_batch_leaves_the_previous_file(site_farm, output_format):
+    directory = site_farm / "out"
+    directory.mkdir()
+    path = directory / f"names_results.{FORMATS[output_format].extension}"
+    path.write_bytes(b"previous run")
+
+    with pytest.raises(KeyboardInterrupt):
+        sherlock_batch(["alice", "bob"], max_workers=4, out=Interrupted(), output_dir=str(directory),
+                       output_format=output_format, name="names_results")
+
+    assert path.read_bytes() == b"previous run"
+    assert [entry.name for entry in directory.iterdir()] == [path.name]
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from cache import ResultCache
+from manifest import Site
+
+
+def site(name, index):
+    return Site(name, index, {"url": f"https://{name.lower()}.example/{{}}", "errorType": "status_code"})
+
+
+def probed(pairs, **kwargs):
+    """Probe engine that finds every pair it pulls"""
+    for username, pair_site in pairs:
+        yield username, pair_site.index, {"platform": pair_site.name, "status": "found"}
+
+
+def test_pairs_are_looked_up_as_the_engine_pulls_them():
+    cache = ResultCache()
+    sites = [site(f"Site{index}", index) for index in range(4)]
+    cache.put(sites[3], "alice", {"platform": "Site3", "status": "found"})
+    pulled = []
+
+    def pairs():
+        for pair_site in sites:
+            pulled.append(pair_site.name)
+            yield "alice", pair_site
+
+    results = cache.probe_pairs(probed, pairs())
+    assert next(results)[1] == 0
+    assert pulled == ["Site0"]
+    assert [index for _, index, _ in results] == [1, 2, 3]
+    assert cache.hits == 1 and cache.misses == 3
+
+
+def test_duplicate_pairs_are_each_answered():
+    cache = ResultCache()
+    github = site("GitHub", 0)
+    cache.put(github, "bob", {"platform": "GitHub", "status": "found"})
+
+    results = list(cache.probe_pairs(probed, [("alice", github), ("bob", github), ("alice", github), ("bob", github)]))
+
+    assert sorted(username for username, _, _ in results) == ["alice", "alice", "bob", "bob"]
+
+
+
+class SlowCount(int):
+    """Counter whose += sleeps between reading and writing back, to widen any race"""
+
+    def __add__(self, other):
+        time.sleep(0.001)
+        return SlowCount(int(self) + other)
+
+
+def test_counters_are_exact_under_concurrent_lookups():
+    cache = ResultCache()
+    github = site("GitHub", 0)
+    cache.put(github, "alice", {"platform": "GitHub", "status": "found"})
+    cache.hits, cache.misses = SlowCount(0), SlowCount(0)
+
+    def lookups():
+        for _ in range(20):
+            cache.get(github, "alice")
+            cache.get(github, "bob")
+            cache.cached([("alice", github)])
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.hits == 8 * 20 * 2
+    assert cache.misses == 8 * 20
@@ -0,0 +1,184 @@
+import socket
+import threading
+import time
+import types
+
+import pytest
+
+import dnscache
+from dnscache import NEGATIVE_TTL, DnsCache
+from manifest import Site
+
+
+class Clock:
+    """Stand-in for time.monotonic the tests move by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubResolver:
+    """
+    Answers in place of DnsCache._query.
+
+    Names are looked up in answers, a "*.domain" entry answering every
+    name below domain. A name without an answer fails like an unknown host.
+    """
+
+    def __init__(self, answers):
+        self.answers = dict(answers)
+        self.queries = []
+        # Cleared to hold lookups until the test sets it again
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, name):
+        self.queries.append(name)
+        self.gate.wait(5)
+        address = self.answers.get(name)
+        if address is None:
+            address = self.answers.get("*." + name.partition(".")[2])
+        if address is None:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, (address, 0))], 60
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dnscache, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def cache_with(answers, **kwargs):
+    cache = DnsCache(**kwargs)
+    cache._query = StubResolver(answers)
+    return cache
+
+
+def address(cache, host):
+    return cache.resolve(host, 443)[0][4]
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_answer_is_reused_until_its_ttl_runs_out(clock):
+    cache = cache_with({"site.example": "10.0.0.1"}, max_stale=0)
+
+    assert address(cache, "site.example") == ("10.0.0.1", 443)
+    clock.now += 59
+    assert address(cache, "Site.Example.") == ("10.0.0.1", 443)
+    assert cache._query.queries == ["site.example"]
+
+    clock.now += 1
+    address(cache, "site.example")
+    assert cache._query.queries == ["site.example", "site.example"]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_expired_answer_is_served_while_it_is_refreshed(clock):
+    cache = cache_with({"site.example": "10.0.0.1"})
+    address(cache, "site.example")
+    cache._query.answers["site.example"] = "10.0.0.2"
+    cache._query.gate.clear()
+
+    clock.now += 61
+    # The refresh is held by the gate, the caller is answered without waiting for it
+    assert address(cache, "site.example") == ("10.0.0.1", 443)
+    assert address(cache, "site.example") == ("10.0.0.1", 443)
+
+    cache._query.gate.set()
+    wait_for(lambda: address(cache, "site.example") == ("10.0.0.2", 443))
+    assert cache._query.queries == ["site.example", "site.example"]
+
+
+def test_answer_too_stale_is_looked_up_again(clock):
+    cache = cache_with({"site.example": "10.0.0.1"}, max_stale=100)
+    address(cache, "site.example")
+    cache._query.answers["site.example"] = "10.0.0.2"
+
+    clock.now += 60 + 100
+
+    assert address(cache, "site.example") == ("10.0.0.2", 443)
+
+
+def test_concurrent_lookups_of_a_host_are_merged(clock):
+    cache = cache_with({"site.example": "10.0.0.1"})
+    cache._query.gate.clear()
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(address(cache, "site.example")))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+
+    wait_for(lambda: cache.misses == 5)
+    # Give the last threads time to start waiting on the lookup in flight
+    time.sleep(0.1)
+    cache._query.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert answers == [("10.0.0.1", 443)] * 5
+    assert cache._query.queries == ["site.example"]
+
+
+def test_failed_lookup_is_remembered_briefly(clock):
+    cache = cache_with({})
+
+    with pytest.raises(socket.gaierror):
+        cache.resolve("missing.example", 443)
+    clock.now += NEGATIVE_TTL - 1
+    with pytest.raises(socket.gaierror):
+        cache.resolve("missing.example", 443)
+    assert cache._query.queries == ["missing.example"]
+
+    clock.now += 1
+    cache._query.answers["missing.example"] = "10.0.0.3"
+    assert address(cache, "missing.example") == ("10.0.0.3", 443)
+
+
+def test_failed_refresh_keeps_the_last_good_answer(clock):
+    cache = cache_with({"site.example": "10.0.0.1"}, max_stale=0)
+    address(cache, "site.example")
+    del cache._query.answers["site.example"]
+
+    clock.now += 60
+
+    assert address(cache, "site.example") == ("10.0.0.1", 443)
+    clock.now += NEGATIVE_TTL - 1
+    assert address(cache, "site.example") == ("10.0.0.1", 443)
+    assert len(cache._query.queries) == 2
+
+
+def test_user_subdomains_of_a_wildcard_domain_share_one_answer(clock):
+    cache = cache_with({"*.blog.example": "10.0.0.4", "alice.plain.example": "10.0.0.5",
+                        "bob.plain.example": "10.0.0.6"})
+    sites = [Site("Blog", 0, {"url": "https://{}.blog.example/", "errorType": "status_code"}),
+             Site("Plain", 1, {"url": "https://{}.plain.example/", "errorType": "status_code"})]
+
+    cache.prewarm(sites)
+    queries = len(cache._query.queries)
+
+    assert address(cache, "alice.blog.example") == ("10.0.0.4", 443)
+    assert address(cache, "bob.blog.example") == ("10.0.0.4", 443)
+    assert len(cache._query.queries) == queries
+
+    # Without wildcard DNS every subdomain is its own lookup
+    assert address(cache, "alice.plain.example") == ("10.0.0.5", 443)
+    assert address(cache, "bob.plain.example") == ("10.0.0.6", 443)
+    assert cache._query.queries[queries:] == ["alice.plain.example", "bob.plain.example"]
+
+
+def test_addresses_are_not_cached(clock):
+    cache = cache_with({})
+
+    assert address(cache, "127.0.0.1") == ("127.0.0.1", 443)
+    assert cache._query.queries == [] and len(cache) == 0
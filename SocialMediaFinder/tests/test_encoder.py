@@ -0,0 +1,98 @@
+import json
+import time
+import zlib
+
+import pytest
+
+from encoder import EventEncoder, coalesced
+from engine import events
+
+
+def result(platform, status="found"):
+    return {"platform": platform, "status": status, "url": f"https://{platform.lower()}.example/alice"}
+
+
+def burst_then_pause(pause=0.3):
+    """Three events at once, then one more after a pause"""
+    yield {"n": 0}
+    yield {"n": 1}
+    yield {"n": 2}
+    time.sleep(pause)
+    yield {"n": 3}
+
+
+def test_merge_folds_progress_into_results():
+    merged = list(events("alice", 2, [(0, result("Alpha")), (1, result("Beta", "not_found"))], merge_progress=True))
+
+    assert [event["type"] for event in merged] == ["start", "result", "result", "complete"]
+    assert merged[1] == {"type": "result", **result("Alpha"), "processed": 1, "total": 2, "percentage": 50}
+    assert merged[2]["processed"] == 2 and merged[2]["percentage"] == 100
+    assert merged[3]["found_count"] == 1
+
+
+def test_without_merge_progress_comes_before_each_result():
+    separate = list(events("alice", 2, [(0, result("Alpha")), (1, result("Beta"))]))
+
+    assert [event["type"] for event in separate] == ["start", "progress", "result", "progress", "result", "complete"]
+    assert separate[3]["current_platform"] == "Beta" and separate[3]["percentage"] == 100
+
+
+def test_events_within_the_window_are_one_chunk():
+    chunks = list(EventEncoder("ndjson", window=0.1).encode(burst_then_pause()))
+
+    assert chunks == [b'{"n":0}\n{"n":1}\n{"n":2}\n', b'{"n":3}\n']
+
+
+def test_without_a_window_every_event_is_a_chunk():
+    chunks = list(EventEncoder("sse").encode(burst_then_pause(0)))
+
+    assert chunks == [b'data: {"n":0}\n\n', b'data: {"n":1}\n\n', b'data: {"n":2}\n\n', b'data: {"n":3}\n\n']
+
+
+def test_lone_event_is_not_held_for_the_window():
+    started = time.monotonic()
+    chunks = coalesced(burst_then_pause(2.0), 0.05)
+
+    assert len(next(chunks)) == 3
+    assert time.monotonic() - started < 1.0
+    chunks.close()
+
+
+def test_sse_messages_carry_their_id():
+    chunks = list(EventEncoder("sse").encode([(7, {"type": "result"})]))
+
+    assert chunks == [b'id: 7\ndata: {"type":"result"}\n\n']
+
+
+def test_sse_is_never_compressed():
+    encoder = EventEncoder("sse", encoding="gzip")
+
+    assert encoder.encoding is None
+    assert "Content-Encoding" not in encoder.headers
+    assert list(encoder.encode([{"n": 0}])) == [b'data: {"n":0}\n\n']
+
+
+def test_ndjson_chunks_are_each_readable_as_they_arrive():
+    encoder = EventEncoder("ndjson", window=0.1, encoding="gzip")
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    assert encoder.headers["Content-Encoding"] == "gzip"
+    chunks = encoder.encode(burst_then_pause())
+    # Flushed per chunk, so what has arrived decompresses in full before the stream ends
+    assert decompressor.decompress(next(chunks)) == b'{"n":0}\n{"n":1}\n{"n":2}\n'
+    assert decompressor.decompress(next(chunks)) == b'{"n":3}\n'
+    decompressor.decompress(b"".join(chunks))
+    assert decompressor.eof
+
+
+def test_unknown_format_and_encoding_are_rejected():
+    with pytest.raises(ValueError):
+        EventEncoder("xml")
+    with pytest.raises(ValueError):
+        EventEncoder("ndjson", encoding="compress")
+
+
+def test_events_keep_non_ascii_text():
+    chunks = list(EventEncoder("ndjson").encode([{"username": "zoë"}]))
+
+    assert json.loads(chunks[0]) == {"username": "zoë"}
@@ -0,0 +1,129 @@
+import time
+
+import health
+from health import MIN_SAMPLES, HealthTracker
+
+
+class Clock:
+    """Stand-in for time.monotonic the tests move by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_default_timeout_until_enough_samples():
+    tracker = HealthTracker(default_timeout=7.0)
+
+    for _ in range(MIN_SAMPLES - 1):
+        tracker.record_success("Slow", 0.5)
+
+    assert tracker.timeout_for("Slow") == 7.0
+    assert tracker.timeout_for("Slow", limit=3.0) == 3.0
+
+
+def test_timeout_is_p99_times_factor():
+    tracker = HealthTracker(min_timeout=0.1, max_timeout=60.0, timeout_factor=3.0)
+
+    for _ in range(MIN_SAMPLES):
+        tracker.record_success("Steady", 1.5)
+
+    assert tracker.timeout_for("Steady") == 4.5
+
+
+def test_timeout_is_clamped():
+    tracker = HealthTracker(min_timeout=2.0, max_timeout=10.0, timeout_factor=3.0)
+
+    for _ in range(MIN_SAMPLES):
+        tracker.record_success("Fast", 0.01)
+        tracker.record_success("Slow", 8.0)
+
+    assert tracker.timeout_for("Fast") == 2.0
+    assert tracker.timeout_for("Slow") == 10.0
+    assert tracker.timeout_for("Slow", limit=5.0) == 5.0
+
+
+def test_circuit_opens_after_consecutive_failures(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    tracker = HealthTracker(failure_threshold=3, cooldown=60.0)
+
+    tracker.record_failure("Down")
+    tracker.record_failure("Down")
+    assert tracker.allow("Down")
+
+    tracker.record_failure("Down")
+    assert not tracker.allow("Down")
+    assert tracker.retry_in("Down") == 60.0
+    assert tracker.snapshot()["Down"]["open"]
+
+
+def test_success_resets_the_failure_count(monkeypatch):
+    monkeypatch.setattr(time, "monotonic", Clock())
+    tracker = HealthTracker(failure_threshold=3)
+
+    tracker.record_failure("Flaky")
+    tracker.record_failure("Flaky")
+    tracker.record_success("Flaky", 0.2)
+    tracker.record_failure("Flaky")
+    tracker.record_failure("Flaky")
+
+    assert tracker.allow("Flaky")
+
+
+def test_single_trial_probe_after_cooldown(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    tracker = HealthTracker(failure_threshold=2, cooldown=60.0)
+    tracker.record_failure("Down")
+    tracker.record_failure("Down")
+
+    clock.now += 59.0
+    assert not tracker.allow("Down")
+
+    clock.now += 1.0
+    assert tracker.allow("Down")
+    # Everyone else keeps skipping the site while the trial probe is out
+    assert not tracker.allow("Down")
+    assert not tracker.allow("Down")
+
+
+def test_failed_trial_probe_reopens_the_circuit(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    tracker = HealthTracker(failure_threshold=2, cooldown=60.0)
+    tracker.record_failure("Down")
+    tracker.record_failure("Down")
+    clock.now += 60.0
+    assert tracker.allow("Down")
+
+    tracker.record_failure("Down")
+
+    clock.now += 30.0
+    assert not tracker.allow("Down")
+    assert tracker.retry_in("Down") == 30.0
+
+
+def test_successful_trial_probe_closes_the_circuit(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    tracker = HealthTracker(failure_threshold=2, cooldown=60.0)
+    tracker.record_failure("Down")
+    tracker.record_failure("Down")
+    clock.now += 60.0
+    assert tracker.allow("Down")
+
+    tracker.record_success("Down", 0.3)
+
+    assert tracker.allow("Down")
+    assert tracker.allow("Down")
+    assert not tracker.snapshot()["Down"]["open"]
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch):
+    monkeypatch.setattr(health.random, "uniform", lambda low, high: high)
+    tracker = HealthTracker(backoff=0.25, max_backoff=2.0)
+
+    assert [tracker.delay(attempt) for attempt in range(5)] == [0.25, 0.5, 1.0, 2.0, 2.0]
@@ -0,0 +1,17 @@
+import sys
+
+import pytest
+
+import http_pool
+from http_pool import HttpPool
+
+
+@pytest.mark.skipif(http_pool.httpx is None, reason="httpx is not installed")
+def test_http2_without_h2_falls_back_to_http11(monkeypatch):
+    # A None entry makes "import h2" raise ImportError, as if it were not installed
+    monkeypatch.setitem(sys.modules, "h2", None)
+
+    pool = HttpPool(http2=True)
+
+    assert pool.http2 is False
+    assert pool._client is None and pool._session is not None
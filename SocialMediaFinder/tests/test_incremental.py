@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from incremental import check_result_set, plan_recheck
+from manifest import Manifest, Site
+
+
+def manifest(*names):
+    sites = [Site(name, index, {"url": f"https://{name.lower()}.example/{{}}", "errorType": "status_code"})
+             for index, name in enumerate(names)]
+    return Manifest("data.json", 0, sites)
+
+
+def previous(*results, timestamp=None):
+    return {"username": "alice", "results": list(results), "timestamp": timestamp or datetime.now().isoformat()}
+
+
+@pytest.mark.parametrize("stamp", [
+    lambda now: now.astimezone(timezone.utc).isoformat(),
+    lambda now: now.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    lambda now: now.isoformat(),
+])
+def test_fresh_stamps_with_or_without_offset_are_reused(stamp):
+    now = datetime.now()
+    sites = manifest("GitHub")
+    result = {"platform": "GitHub", "status": "found", "checked": stamp(now - timedelta(minutes=5))}
+
+    kept, stale = plan_recheck(previous(result), sites, max_age=3600, now=now)
+
+    assert list(kept) == [0] and stale == []
+
+
+def test_old_aware_stamps_are_probed_again():
+    now = datetime.now()
+    sites = manifest("GitHub")
+    checked = (now - timedelta(hours=2)).astimezone(timezone.utc).isoformat()
+    result = {"platform": "GitHub", "status": "found", "checked": checked}
+
+    kept, stale = plan_recheck(previous(result), sites, max_age=3600, now=now)
+
+    assert kept == {} and [site.name for site in stale] == ["GitHub"]
+
+
+@pytest.mark.parametrize("result", [
+    {"platform": ["GitHub"], "status": "found"},
+    {"platform": {"name": "GitHub"}, "status": "found"},
+    {"status": "found"},
+    {"platform": "GitHub", "status": 200},
+])
+def test_results_without_a_platform_and_status_are_rejected(result):
+    with pytest.raises(ValueError):
+        check_result_set(previous(result))
+
+
+@pytest.mark.parametrize("body", [[], ["alice"], "alice", 3])
+def test_recheck_rejects_bodies_that_are_not_objects(monkeypatch, body):
+    monkeypatch.setenv("SHERLOCK_JOBS", "memory")
+    import app
+
+    response = app.app.test_client().post("/recheck", json=body)
+
+    assert response.status_code == 400
+
+
+def test_recheck_rejects_an_unhashable_platform(monkeypatch):
+    monkeypatch.setenv("SHERLOCK_JOBS", "memory")
+    import app
+
+    body = {"previous": previous({"platform": ["GitHub"], "status": "found"})}
+    response = app.app.test_client().post("/recheck", json=body)
+
+    assert response.status_code == 400
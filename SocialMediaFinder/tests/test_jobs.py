@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+import time
+
+import jobs
+from jobs import FAILED, RUNNING, JobManager, SQLiteJobStore
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class SlowPipeline:
+    """Pipeline whose first site answers at once and whose second never does until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def sites(self):
+        return ["GitHub", "GitLab"]
+
+    def run_many(self, usernames, sites, shared=None, cancel=None):
+        yield usernames[0], 0, {"platform": "GitHub", "status": "found"}
+        while not self.release.wait(0.05):
+            if cancel is not None and cancel.is_set():
+                return
+        yield usernames[0], 1, {"platform": "GitLab", "status": "not_found"}
+
+
+def running_job(store, owner, updated, heartbeat):
+    job = {"id": "job1", "usernames": ["alice"], "status": RUNNING, "error": None, "events": 0,
+           "created": updated, "updated": updated, "finished": None, "owner": owner, "heartbeat": heartbeat}
+    store.create(job)
+    return job["id"]
+
+
+def test_job_of_another_process_with_a_fresh_heartbeat_is_left_running(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    now = time.time()
+    # No event for a long time, e.g. a slow site, but its manager still beats
+    job_id = running_job(store, "other-worker", now - 10 * jobs.STALE_SECONDS, now)
+
+    assert JobManager(None, store).get(job_id)["status"] == RUNNING
+
+
+def test_job_whose_heartbeat_stopped_is_failed(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    stale = time.time() - 2 * jobs.STALE_SECONDS
+    job_id = running_job(store, "gone-worker", stale, stale)
+
+    job = JobManager(None, store).get(job_id)
+
+    assert job["status"] == FAILED and job["error"] == "Job was interrupted"
+
+
+def test_running_job_refreshes_its_heartbeat(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "HEARTBEAT_SECONDS", 0.1)
+    monkeypatch.setattr(jobs, "FLUSH_SECONDS", 0.05)
+    pipeline = SlowPipeline()
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    manager = JobManager(pipeline, store)
+
+    job = manager.submit(["alice"])
+    try:
+        assert wait_for(lambda: store.get(job["id"])["heartbeat"] > job["heartbeat"] + 0.1)
+        assert store.get(job["id"])["owner"] == manager.owner
+    finally:
+        pipeline.release.set()
+
+
+def test_events_held_back_by_a_slow_site_are_flushed_on_a_timer(monkeypatch):
+    monkeypatch.setattr(jobs, "FLUSH_SECONDS", 0.05)
+    pipeline = SlowPipeline()
+    manager = JobManager(pipeline)
+
+    job = manager.submit(["alice"])
+    try:
+        # The GitHub result is stored while GitLab still has not answered
+        assert wait_for(lambda: any(event.get("type") == "result" for _, event in manager.events(job["id"])))
+        assert manager.get(job["id"])["status"] == RUNNING
+    finally:
+        pipeline.release.set()
+    assert wait_for(lambda: manager.get(job["id"])["status"] == "done")
+
+
+def test_store_created_before_heartbeats_is_upgraded(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, usernames TEXT, status TEXT, error TEXT, events INTEGER, "
+               "created REAL, updated REAL, finished REAL)")
+    db.execute("INSERT INTO jobs VALUES ('old', '[\"alice\"]', 'done', NULL, 0, 1, 1, 1)")
+    db.commit()
+    db.close()
+
+    store = SQLiteJobStore(path)
+
+    assert store.get("old")["status"] == "done" and store.get("old")["heartbeat"] is None
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+from manifest import CheckType, ManifestError, Site, compile_manifest, load_manifest
+
+
+@pytest.mark.parametrize("info, reason", [
+    ({"url": "https://example.com/user", "errorType": "status_code"}, "placeholder"),
+    ({"url": "https://example.com/{}/{}", "errorType": "status_code"}, "placeholder"),
+    ({"url": "https://example.com/{}", "errorType": "teapot"}, "unknown errorType"),
+    ({"url": "https://example.com/{}", "errorType": "message"}, "needs errorMsg"),
+    ({"url": "https://example.com/{}", "errorType": "message", "errorMsg": ""}, "errorMsg"),
+    ({"url": "https://example.com/{}", "errorType": "status_code", "noPeriod": "yes"}, "noPeriod"),
+    ({"url": "https://example.com/{}", "errorType": "message", "errorRegex": "user (unclosed"}, "invalid regex"),
+    ({"url": "https://example.com/{}", "errorType": "response_url"}, "errorUrl"),
+    ({"url": "https://example.com/{}", "errorType": "status_code", "maxBytes": 0}, "maxBytes"),
+])
+def test_malformed_entries_are_rejected(info, reason):
+    with pytest.raises(ManifestError, match=reason):
+        Site("Broken", 0, info)
+
+
+def test_one_bad_entry_rejects_the_manifest():
+    data = {"Good": {"url": "https://good.example/{}", "errorType": "status_code"},
+            "Bad": {"url": "https://bad.example/{}", "errorType": "teapot"}}
+
+    with pytest.raises(ManifestError, match="Bad"):
+        compile_manifest(data)
+
+
+def test_valid_entry_is_compiled():
+    site = Site("Example", 3, {"url": "https://example.com/u/{}?tab=1", "errorType": "message",
+                               "errorMsg": ["gone", "missing"], "noPeriod": "True"})
+
+    assert site.check is CheckType.MESSAGE and site.index == 3
+    assert site.url_for("alice") == "https://example.com/u/alice?tab=1"
+    assert not site.allows("a.b") and site.allows("ab")
+
+
+def write(path, data, mtime):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_manifest_is_reused_until_data_json_changes(tmp_path):
+    path = tmp_path / "data.json"
+    write(path, {"One": {"url": "https://one.example/{}", "errorType": "status_code"}}, 1000000)
+
+    first = load_manifest(str(path))
+    assert load_manifest(str(path)) is first
+
+    write(path, {"One": {"url": "https://one.example/{}", "errorType": "status_code"},
+                 "Two": {"url": "https://two.example/{}", "errorType": "status_code"}}, 1000010)
+    second = load_manifest(str(path))
+
+    assert second is not first
+    assert [site.name for site in second] == ["One", "Two"]
+
+
+def test_invalid_json_is_a_manifest_error(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    with pytest.raises(ManifestError, match="not valid JSON"):
+        load_manifest(str(path))
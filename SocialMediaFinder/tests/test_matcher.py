@@ -0,0 +1,82 @@
+from manifest import Site
+from matcher import NEGATIVE, POSITIVE, BodyScanner, Matcher, scan_body
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_marker_split_across_chunks_is_found():
+    matcher = Matcher(negatives=("Page Not Found",))
+    body = b"x" * 100 + b"Page Not Found" + b"y" * 100
+
+    # Every split of the marker between two chunks
+    for cut in range(101, 114):
+        assert scan_body([body[:cut], body[cut:]], matcher, 10000) == NEGATIVE
+    assert scan_body(chunked(body, 3), matcher, 10000) == NEGATIVE
+
+
+def test_earliest_marker_decides():
+    matcher = Matcher(negatives=("no such user",), positives=("followers",))
+
+    assert scan_body([b"<h1>alice</h1> 12 followers ... no such user"], matcher, 10000) == POSITIVE
+    assert scan_body([b"no such user ... suggested: 12 followers"], matcher, 10000) == NEGATIVE
+    # Across chunks, the positive marker of the first chunk stops the scan
+    assert scan_body([b"12 followers" + b"x" * 50, b"no such user"], matcher, 10000) == POSITIVE
+
+
+def test_negative_wins_a_tie_at_the_same_position():
+    matcher = Matcher(negatives=("missing",), positives=("miss",))
+
+    assert matcher.search(b"...missing...") == NEGATIVE
+
+
+def test_verdict_without_a_marker_depends_on_positive_markers():
+    negative_only = Matcher(negatives=("no such user",))
+    positive_only = Matcher(positives=("followers",))
+
+    # A page saying neither is a profile unless the site lists what a profile shows
+    assert negative_only.verdict(scan_body([b"hello"], negative_only, 10000)) is True
+    assert positive_only.verdict(scan_body([b"hello"], positive_only, 10000)) is False
+    assert positive_only.verdict(scan_body([b"1 followers"], positive_only, 10000)) is True
+
+
+def test_regex_markers_match_across_chunks():
+    matcher = Matcher(negative_regexes=(r"user \w+ (was|has been) suspended",), positive_regexes=(r"joined \d{4}",))
+    body = b"x" * 3000 + b"user alice has been suspended" + b"x" * 3000
+
+    assert scan_body(chunked(body, 1000), matcher, 100000) == NEGATIVE
+    assert scan_body([b"alice joined 2019"], matcher, 100000) == POSITIVE
+    assert scan_body([b"alice joined recently"], matcher, 100000) is None
+
+
+def test_nothing_past_the_byte_cap_is_scanned():
+    matcher = Matcher(negatives=("not found",))
+    body = b"x" * 500 + b"not found"
+
+    assert scan_body(chunked(body, 100), matcher, 500) is None
+    assert scan_body(chunked(body, 100), matcher, 509) == NEGATIVE
+
+    scanner = BodyScanner(matcher, 250)
+    assert scanner.feed(b"x" * 200) is False
+    assert scanner.feed(b"x" * 200) is True
+    assert scanner.read == 250
+
+
+def test_site_max_bytes_comes_from_data_json():
+    site = Site("Capped", 0, {"url": "https://capped.example/{}", "errorType": "message",
+                              "errorMsg": "not found", "maxBytes": 64})
+
+    assert site.max_bytes == 64
+    assert scan_body([b"x" * 64, b"not found"], site.matcher, site.max_bytes) is None
+
+
+def test_markers_are_compiled_for_the_page_charset():
+    site = Site("Latin", 0, {"url": "https://latin.example/{}", "errorType": "message",
+                             "errorMsg": "Página no encontrada"})
+    body = "<p>Página no encontrada</p>".encode("latin-1")
+
+    assert scan_body([body], site.matcher_for("utf-8"), 10000) is None
+    assert scan_body([body], site.matcher_for("ISO-8859-1"), 10000) == NEGATIVE
+    # An unknown charset falls back to the UTF-8 markers
+    assert site.matcher_for("x-unknown") is site.matcher
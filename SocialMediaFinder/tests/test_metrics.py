@@ -0,0 +1,43 @@
+from cache import ResultCache
+from manifest import Site
+from metrics import ProbeMetrics, ProbeTrace
+
+
+def test_cache_lookups_are_exported_as_counters():
+    metrics = ProbeMetrics()
+    cache = ResultCache()
+    cache.hits, cache.misses = 3, 1
+    metrics.watch_cache(cache)
+
+    rendered = metrics.render()
+
+    assert "# TYPE sherlock_cache_hits_total counter\nsherlock_cache_hits_total 3" in rendered
+    assert "# TYPE sherlock_cache_misses_total counter\nsherlock_cache_misses_total 1" in rendered
+
+
+def test_spans_travel_with_the_result_but_not_into_the_cache():
+    metrics = ProbeMetrics(spans=True)
+    trace = ProbeTrace()
+    trace.span("ttfb", 0.25)
+    result = {"platform": "GitHub", "status": "found"}
+
+    metrics.probe_started()
+    metrics.probe_finished("GitHub", result, 0.3, trace)
+
+    assert result["spans"] == {"ttfb": 0.25}
+    cache = ResultCache()
+    github = Site("GitHub", 0, {"url": "https://github.example/{}", "errorType": "status_code"})
+    cache.put(github, "alice", result)
+    assert "spans" not in cache.get(github, "alice")
+
+
+def test_spans_stay_off_the_result_unless_enabled():
+    metrics = ProbeMetrics()
+    trace = ProbeTrace()
+    trace.span("ttfb", 0.25)
+    result = {"platform": "GitHub", "status": "found"}
+
+    metrics.probe_started()
+    metrics.probe_finished("GitHub", result, 0.3, trace)
+
+    assert "spans" not in result
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from cache import ResultCache
+from manifest import Manifest, Site
+from pipeline import Pipeline
+from serving import Saturated, SearchExecutor
+from singleflight import SingleFlight
+
+
+class NoProbes:
+    """Probe engine of a test that must be answered from the cache"""
+
+    @staticmethod
+    def probe_pairs(pairs, **kwargs):
+        raise AssertionError("nothing should be probed")
+
+
+def manifest(*names):
+    sites = [Site(name, index, {"url": f"https://{name.lower()}.example/{{}}", "errorType": "status_code"})
+             for index, name in enumerate(names)]
+    return Manifest("data.json", 0, sites)
+
+
+@pytest.fixture
+def saturated():
+    """SearchExecutor whose only slot is taken and that queues nothing"""
+    executor = SearchExecutor(max_searches=1, max_queue=0)
+    release = threading.Event()
+    executor.submit(release.wait, 5)
+    yield executor
+    release.set()
+    executor.shutdown()
+
+
+def test_fully_cached_search_is_answered_without_a_slot(saturated):
+    sites = manifest("GitHub", "GitLab")
+    cache = ResultCache()
+    for site in sites:
+        cache.put(site, "alice", {"platform": site.name, "status": "found"})
+    pipeline = Pipeline(probe_engine=NoProbes, cache=cache, inflight=SingleFlight(start=saturated.start_flight))
+
+    results = dict(pipeline.run("alice", sites))
+
+    assert [results[index]["platform"] for index in sorted(results)] == ["GitHub", "GitLab"]
+    assert saturated.rejected == 0
+
+
+def test_search_with_a_miss_still_needs_a_slot(saturated):
+    sites = manifest("GitHub", "GitLab")
+    cache = ResultCache()
+    cache.put(sites.sites[0], "alice", {"platform": "GitHub", "status": "found"})
+    pipeline = Pipeline(probe_engine=NoProbes, cache=cache, inflight=SingleFlight(start=saturated.start_flight))
+
+    with pytest.raises(Saturated):
+        pipeline.run("alice", sites)
+    assert cache.hits == 0
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import types
+
+import pytest
+
+import ratelimit
+from ratelimit import RateLimiter
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when a waiter sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ClockCondition(threading.Condition):
+    """Condition whose timed wait moves the fake clock instead of blocking"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None):
+        self.clock.advance(timeout)
+        return False
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+
+    async def sleep(seconds):
+        clock.advance(seconds)
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic=clock))
+    monkeypatch.setattr(ratelimit, "asyncio", types.SimpleNamespace(sleep=sleep))
+    return clock
+
+
+def limiter_on(clock, rate, burst):
+    limiter = RateLimiter(rate, burst)
+    limiter._cond = ClockCondition(clock)
+    return limiter
+
+
+def test_burst_then_paced_at_the_rate(clock):
+    limiter = limiter_on(clock, rate=4.0, burst=2)
+    started = clock.now
+
+    waits = [limiter.acquire("site.example") for _ in range(5)]
+
+    assert waits == pytest.approx([0.0, 0.0, 0.25, 0.25, 0.25])
+    assert clock.now - started == pytest.approx(0.75)
+
+
+def test_idle_host_refills_up_to_its_burst(clock):
+    limiter = limiter_on(clock, rate=1.0, burst=3)
+    for _ in range(3):
+        limiter.acquire("site.example")
+
+    clock.advance(60.0)
+
+    assert [limiter.acquire("site.example") for _ in range(4)] == pytest.approx([0.0, 0.0, 0.0, 1.0])
+
+
+def test_hosts_have_their_own_buckets(clock):
+    limiter = limiter_on(clock, rate=1.0, burst=1)
+    limiter.configure("slow.example", 0.5, 1)
+
+    assert limiter.acquire("site.example") == 0.0
+    assert limiter.acquire("slow.example") == 0.0
+    assert limiter.acquire("slow.example") == pytest.approx(2.0)
+
+
+def test_waiters_are_served_round_robin_by_search(clock):
+    limiter = limiter_on(clock, rate=1.0, burst=1)
+    granted = []
+
+    async def probe(owner, number):
+        await limiter.acquire_async("site.example", owner)
+        granted.append(f"{owner}{number}")
+
+    async def main():
+        # The batch queues all its probes before the interactive search asks for one
+        await asyncio.gather(*(probe("batch", n) for n in range(4)),
+                             *(probe("user", n) for n in range(2)))
+
+    asyncio.run(main())
+
+    assert granted == ["batch0", "batch1", "user0", "batch2", "user1", "batch3"]
+
+
+def test_throttled_host_pauses_every_search(clock):
+    limiter = limiter_on(clock, rate=10.0, burst=10)
+    limiter.acquire("site.example", "first")
+
+    limiter.penalize("site.example", 5.0)
+
+    assert limiter.acquire("site.example", "second") == pytest.approx(5.0)
+    assert limiter.acquire("other.example", "second") == 0.0
+
+
+def test_penalty_never_shortens_a_longer_one(clock):
+    limiter = limiter_on(clock, rate=10.0, burst=10)
+
+    limiter.penalize("site.example", 20.0)
+    limiter.penalize("site.example", 5.0)
+
+    assert limiter.acquire("site.example") == pytest.approx(20.0)
+
+
+def test_host_without_limit_is_not_paced(clock):
+    limiter = limiter_on(clock, rate=None, burst=1)
+
+    assert [limiter.acquire("site.example") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert clock.now == 1000.0
+
+
+def test_parse_retry_after():
+    assert ratelimit.parse_retry_after("7") == 7.0
+    assert ratelimit.parse_retry_after("3600") == ratelimit.MAX_RETRY_AFTER
+    assert ratelimit.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert ratelimit.parse_retry_after(None) is None
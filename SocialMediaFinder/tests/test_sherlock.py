@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+SHERLOCK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sherlock.py")
+
+
+def run_cli(*args, stdin=""):
+    return subprocess.run([sys.executable, SHERLOCK, *args], input=stdin, capture_output=True, text=True,
+                          timeout=60, check=True)
+
+
+def test_cli_trace_prints_time_per_site(site_farm):
+    output = run_cli("alice", "--trace").stdout
+
+    assert "Time per site" in output
+    assert "Alpha" in output.split("Time per site", 1)[1]
+    assert (site_farm / "alice.txt").exists()
+
+
+def test_cli_batch_saves_its_results(site_farm):
+    run = run_cli("--file", "-", "--output-dir", "out", stdin="alice\nbob\n")
+
+    events = [json.loads(line) for line in run.stdout.splitlines()]
+    assert events[-1]["type"] == "complete"
+    with open(site_farm / "out" / "stdin_results.jsonl", encoding="utf-8") as f:
+        saved = [json.loads(line) for line in f]
+    assert sorted((row["username"], row["status"]) for row in saved) == \
+        [("alice", "found")] * 3 + [("bob", "not_found")] * 3
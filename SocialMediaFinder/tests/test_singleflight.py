@@ -0,0 +1,71 @@
+import threading
+import time
+
+from engine import events
+from serving import SearchExecutor
+from singleflight import SingleFlight
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def slow_scan(started):
+    """Producer that sends nothing until it is cancelled"""
+    def producer(cancel):
+        started.set()
+        cancel.wait(10)
+        return iter(())
+    return producer
+
+
+def test_close_before_first_item_cancels_the_scan():
+    started = threading.Event()
+    flights = SingleFlight()
+    subscription = flights.run("alice", slow_scan(started))
+    assert started.wait(5)
+
+    subscription.close()
+
+    assert wait_for(lambda: len(flights) == 0)
+
+
+def test_stream_closed_after_start_event_releases_its_search_slot():
+    executor = SearchExecutor(max_searches=1, max_queue=0)
+    started = threading.Event()
+    flights = SingleFlight(start=executor.start_flight)
+
+    # What sherlock_streaming() does when the client leaves right after the start event
+    results = flights.run("alice", slow_scan(started))
+    stream = events("alice", 3, results)
+    assert next(stream)["type"] == "start"
+    assert started.wait(5)
+    stream.close()
+    results.close()
+
+    assert wait_for(lambda: executor.running == 0)
+    # The slot is free again, the next search is admitted
+    flights.run("bob", lambda cancel: iter([(0, {"status": "found"})])).close()
+    executor.shutdown()
+
+
+def test_subscribers_get_every_item_and_close_twice_is_harmless():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def producer(cancel):
+        gate.wait(5)
+        yield from range(3)
+
+    first = flights.run("carol", producer)
+    second = flights.run("carol", producer)
+    gate.set()
+    assert list(first) == [0, 1, 2]
+    assert list(second) == [0, 1, 2]
+    first.close()
+    second.close()
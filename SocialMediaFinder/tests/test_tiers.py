@@ -0,0 +1,124 @@
+import time
+
+import engine
+from health import HealthTracker
+from http_pool import HttpPool
+from manifest import Site, load_manifest
+from tiers import GET, HEAD, RANGE, RELEARN_SECONDS, VERIFY_PROBES, TierTracker
+
+
+def status_site(name="Codes"):
+    return Site(name, 0, {"url": f"https://{name.lower()}.example/{{}}", "errorType": "status_code"})
+
+
+def message_site(name="Pages"):
+    return Site(name, 0, {"url": f"https://{name.lower()}.example/{{}}", "errorType": "message",
+                          "errorMsg": "not found"})
+
+
+FOUND = {"status": "found"}
+NOT_FOUND = {"status": "not_found"}
+
+
+def test_first_cheap_answers_are_double_checked():
+    tiers = TierTracker()
+    site = status_site()
+
+    for _ in range(VERIFY_PROBES):
+        assert tiers.plan(site) == (HEAD, True)
+        tiers.record(site, HEAD, FOUND, FOUND)
+
+    assert tiers.plan(site) == (HEAD, False)
+
+
+def test_disagreeing_full_get_moves_the_site_up_a_tier():
+    tiers = TierTracker()
+    site = status_site()
+
+    tiers.record(site, HEAD, FOUND, NOT_FOUND)
+
+    assert tiers.plan(site) == (RANGE, True)
+    tiers.record(site, RANGE, NOT_FOUND, FOUND)
+    assert tiers.tier_for(site) == GET
+
+
+def test_message_site_moves_to_get_after_repeated_fallbacks():
+    tiers = TierTracker(max_misses=3)
+    site = message_site()
+    assert tiers.plan(site) == (RANGE, False)
+
+    # An existing profile has no errorMsg anywhere, so its fallbacks do not count
+    tiers.record(site, RANGE, None, FOUND)
+    for _ in range(2):
+        tiers.record(site, RANGE, None, NOT_FOUND)
+    assert tiers.tier_for(site) == RANGE
+
+    tiers.record(site, RANGE, None, NOT_FOUND)
+    assert tiers.tier_for(site) == GET
+
+
+def test_promoted_site_tries_its_cheap_tier_again_after_a_week(monkeypatch):
+    tiers = TierTracker()
+    site = status_site()
+    now = time.time()
+    tiers.record(site, HEAD, FOUND, NOT_FOUND)
+
+    monkeypatch.setattr(time, "time", lambda: now + RELEARN_SECONDS - 60)
+    assert tiers.tier_for(site) == RANGE
+    monkeypatch.setattr(time, "time", lambda: now + RELEARN_SECONDS + 60)
+    assert tiers.tier_for(site) == HEAD
+
+
+def test_learned_tiers_survive_a_restart(tmp_path):
+    path = str(tmp_path / "tiers.json")
+    tiers = TierTracker(path)
+    site = status_site()
+    tiers.record(site, HEAD, FOUND, NOT_FOUND)
+    tiers.save(force=True)
+
+    restored = TierTracker(path)
+
+    assert restored.tier_for(site) == RANGE
+    assert list(tmp_path.iterdir()) == [tmp_path / "tiers.json"]
+
+
+class SlowSecondTurn:
+    """Rate limiter that makes every turn after the first wait"""
+
+    def __init__(self, wait):
+        self.wait = wait
+        self.turns = 0
+
+    def acquire(self, host, owner):
+        self.turns += 1
+        if self.turns == 1:
+            return 0.0
+        time.sleep(self.wait)
+        return self.wait
+
+    def penalize(self, host, seconds):
+        pass
+
+
+class RecordingHealth(HealthTracker):
+    def __init__(self):
+        super().__init__(retries=0)
+        self.latencies = []
+
+    def record_success(self, name, latency):
+        self.latencies.append(latency)
+        super().record_success(name, latency)
+
+
+def test_fallback_wait_for_a_limiter_turn_is_not_latency(site_farm):
+    site = load_manifest("data.json")["Alpha"]
+    limiter = SlowSecondTurn(0.5)
+    health = RecordingHealth()
+    session = HttpPool()
+
+    # The first cheap answer is verified with a full GET, which takes the second turn
+    result = engine.check_site(site, "alice", session=session, health=health, limiter=limiter, tiers=TierTracker())
+    session.close()
+
+    assert result["status"] == "found" and limiter.turns == 2
+    assert health.latencies and health.latencies[0] < 0.4
@@ -0,0 +1,93 @@
+from manifest import Site
+from pipeline import SharedProbes
+from variants import MAX_VARIANTS, expand_username, expand_usernames, separator_forms
+
+
+def site(name, url, **info):
+    return Site(name, 0, {"url": url, "errorType": "status_code", **info})
+
+
+def test_separators_are_swapped_and_dropped():
+    assert separator_forms("alice.smith") == ["alice.smith", "alice_smith", "alice-smith", "alicesmith"]
+    assert separator_forms("a-b_c") == ["a-b_c", "a.b.c", "a_b_c", "a-b-c", "abc"]
+    assert separator_forms("alice") == ["alice"]
+
+
+def test_dropping_separators_keeps_two_characters():
+    assert separator_forms("a.") == ["a.", "a_", "a-"]
+
+
+def test_username_comes_first_then_case_forms_then_suffixes():
+    variants = expand_username("Alice", suffixes=("1",))
+
+    assert variants == ["Alice", "alice", "ALICE", "Alice1"]
+
+
+def test_variants_are_capped_per_username():
+    variants = expand_username("alice.b_smith")
+
+    assert len(variants) == MAX_VARIANTS
+    assert len(set(variants)) == MAX_VARIANTS
+    assert variants[0] == "alice.b_smith"
+    assert "alicebsmith" in variants
+
+
+def test_cap_applies_to_each_username_of_a_list():
+    expanded = expand_usernames(["alice.b_smith", "bob.j_jones"], limit=5)
+
+    assert expanded == expand_username("alice.b_smith", limit=5) + expand_username("bob.j_jones", limit=5)
+
+
+def test_probe_key_lowercases_on_case_insensitive_sites():
+    sensitive = site("Sensitive", "https://sensitive.example/{}")
+    insensitive = site("Insensitive", "https://insensitive.example/{}", caseInsensitive="True")
+
+    assert sensitive.probe_key("Alice") != sensitive.probe_key("alice")
+    assert insensitive.probe_key("Alice") == insensitive.probe_key("alice") == "https://insensitive.example/alice"
+
+
+def test_subdomain_sites_are_always_case_insensitive():
+    blog = site("Blog", "https://{}.blog.example/")
+
+    assert blog.case_insensitive
+    assert blog.probe_key("ALICE") == blog.probe_key("alice") == "https://alice.blog.example/"
+    assert blog.host == "blog.example"
+
+
+def test_one_probe_is_shared_by_every_variant_reaching_the_profile():
+    insensitive = site("Insensitive", "https://insensitive.example/{}", caseInsensitive="True")
+    shared = SharedProbes()
+    probed = []
+
+    def probe(pairs):
+        for username, pair_site in pairs:
+            probed.append(username)
+            yield username, pair_site.index, {"platform": pair_site.name, "status": "found",
+                                              "url": pair_site.url_for(username)}
+
+    pairs = [(variant, insensitive) for variant in ("alice", "Alice", "ALICE")]
+    results = list(shared.fan_out(probe(shared.unique(pairs))))
+
+    assert probed == ["alice"]
+    assert shared.checks == 3 and shared.probes == 1
+    assert {username: result["url"] for username, _, result in results} == {
+        "alice": "https://insensitive.example/alice",
+        "Alice": "https://insensitive.example/Alice",
+        "ALICE": "https://insensitive.example/ALICE",
+    }
+    assert all(result["status"] == "found" for _, _, result in results)
+
+
+def test_case_sensitive_site_probes_every_variant():
+    sensitive = site("Sensitive", "https://sensitive.example/{}")
+    shared = SharedProbes()
+
+    def probe(pairs):
+        for username, pair_site in pairs:
+            yield username, pair_site.index, {"status": "not_found", "url": pair_site.url_for(username)}
+
+    pairs = [(variant, sensitive) for variant in ("alice", "Alice", "ALICE")]
+    results = list(shared.fan_out(probe(shared.unique(pairs))))
+
+    assert shared.probes == 3
+    assert sorted(username for username, _, _ in results) == ["ALICE", "Alice", "alice"]
@@ -0,0 +1,142 @@
+import queue
+import threading
+import zlib
+
+import pytest
+
+import workers
+from manifest import Site, load_manifest
+from workers import Dispatcher, _BrokerState, run_worker, shard_of
+
+
+class InProcessBroker:
+    """Broker with the methods of ManagerBroker, its queues in this process"""
+
+    def __init__(self, shards=4):
+        self.shards = shards
+        self.state = _BrokerState(shards)
+
+    def _get(self, name, timeout):
+        try:
+            return self.state.queue(name).get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put_tasks(self, shard, tasks):
+        self.state.queue(f"tasks-{shard}").put(tasks)
+
+    def get_tasks(self, shard, timeout):
+        return self._get(f"tasks-{shard}", timeout)
+
+    def put_results(self, reply_to, results):
+        self.state.queue(reply_to).put(results)
+
+    def get_results(self, reply_to, timeout):
+        return self._get(reply_to, timeout)
+
+    def claim_shard(self):
+        return self.state.claim()
+
+    def cancel(self, search_id):
+        self.state.cancel(search_id)
+
+    def cancelled(self, search_ids):
+        return set(self.state.cancelled(list(search_ids)))
+
+    def queued(self, shard):
+        """Tasks waiting on a shard, taken off its queue"""
+        tasks = []
+        while True:
+            batch = self.get_tasks(shard, 0)
+            if batch is None:
+                return tasks
+            tasks.extend(batch)
+
+
+def site(name, index, url):
+    return Site(name, index, {"url": url, "errorType": "status_code"})
+
+
+def queue_only(dispatcher, pairs):
+    """Queue the probes of pairs and leave, as a search cancelled straight away does"""
+    cancel = threading.Event()
+    cancel.set()
+    assert list(dispatcher.probe_pairs(pairs, cancel=cancel)) == []
+
+
+@pytest.fixture
+def start_worker(site_farm):
+    """Starts a worker serving every shard of a broker, stopped after the test"""
+    stop = threading.Event()
+    threads = []
+
+    def start(broker):
+        thread = threading.Thread(target=run_worker, args=(broker, range(broker.shards)),
+                                  kwargs={"max_workers": 4, "timeout": 5, "stop": stop}, daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    yield start
+    stop.set()
+    for thread in threads:
+        thread.join(5)
+
+
+def test_tasks_are_sharded_by_crc32_of_the_host():
+    broker = InProcessBroker(shards=4)
+    sites = [site(f"Site{index}", index, f"https://host{index}.example/{{}}") for index in range(8)]
+    sites.append(site("Blog", 8, "https://{}.host3.example/"))
+
+    queue_only(Dispatcher(broker), [("alice", pair_site) for pair_site in sites])
+
+    sharded = {task[4]: shard for shard in range(4) for task in broker.queued(shard)}
+    assert sharded == {pair_site.name: zlib.crc32(pair_site.host.encode("utf-8")) % 4 for pair_site in sites}
+    # A per-user subdomain site shares its parent domain's shard
+    assert sharded["Blog"] == sharded["Site3"] == shard_of(sites[3], 4)
+    assert len(set(sharded.values())) > 1
+
+
+def test_probe_nobody_answers_is_reported_as_an_error():
+    dispatcher = Dispatcher(InProcessBroker(), answer_timeout=0.2)
+    sites = [site("Alpha", 0, "https://alpha.example/{}"), site("Beta", 1, "https://beta.example/{}")]
+
+    results = list(dispatcher.probe_pairs([("alice", pair_site) for pair_site in sites]))
+
+    assert sorted(index for _, index, _ in results) == [0, 1]
+    assert all(result["status"] == "error" and result["message"] == "No worker answered"
+               for _, _, result in results)
+    assert results[0][2]["url"] == sites[results[0][1]].url_for("alice")
+
+
+def test_workers_answer_through_the_broker(start_worker):
+    broker = InProcessBroker()
+    start_worker(broker)
+    sites = list(load_manifest("data.json"))
+
+    results = list(Dispatcher(broker).probe_pairs([(username, pair_site) for username in ("alice", "bob")
+                                                   for pair_site in sites]))
+
+    found = {(username, sites[index].name) for username, index, result in results if result["status"] == "found"}
+    assert len(results) == 2 * len(sites)
+    assert found == {("alice", pair_site.name) for pair_site in sites}
+
+
+def test_tasks_of_a_cancelled_search_are_dropped(start_worker, monkeypatch):
+    probed = []
+    check_site = workers.check_site
+
+    def recording(probe_site, username, **kwargs):
+        probed.append(username)
+        return check_site(probe_site, username, **kwargs)
+
+    monkeypatch.setattr(workers, "check_site", recording)
+    sites = list(load_manifest("data.json"))
+    broker = InProcessBroker()
+    dispatcher = Dispatcher(broker)
+    queue_only(dispatcher, [("alice", pair_site) for pair_site in sites])
+
+    start_worker(broker)
+    results = list(dispatcher.probe_pairs([("carol", pair_site) for pair_site in sites]))
+
+    assert [result["status"] for _, _, result in results] == ["found"] * len(sites)
+    assert probed == ["carol"] * len(sites)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Probe Tiers
+==========================================
+
+Most sites can be decided without downloading the whole profile page.
+Every site is probed on the cheapest tier that has proven reliable for
+it:
+
+    head   HEAD request, the status line and redirects are enough
+           (status_code and response_url sites)
+    range  GET of the first bytes only, through a Range header; for
+           "message" sites errorMsg is usually near the top of the page
+    get    full GET, the body is read until errorMsg shows up
+
+Tiers are learned per site. status_code and response_url sites start on
+head; their first answers are double-checked with a full GET, and any
+disagreement moves the site up a tier (head -> range -> get). "message"
+sites start on range, where a marker inside the range decides and
+anything else falls back to a full GET; a site whose errorMsg keeps
+turning up past the range moves to get. A cheap answer
+that cannot decide (405, 501, 416) always falls back to a full GET.
+
+What was learned is kept in tiers.json, and a site that was moved up is
+given its cheap tier again after a week.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import json
+import os
+import threading
+import time
+
+from manifest import CheckType
+
+HEAD = "head"
+RANGE = "range"
+GET = "get"
+TIERS = (HEAD, RANGE, GET)
+
+# Bytes requested by the range tier of "message" sites
+RANGE_BYTES = 32 * 1024
+
+# Cheap answers that say nothing about the profile: method not allowed or not implemented, bad range
+INCONCLUSIVE_STATUS = frozenset({405, 416, 501})
+
+# Cheap answers double-checked with a full GET before a site relies on its tier
+VERIFY_PROBES = 3
+
+# Times in a row a tier has to fall back before the site moves up a tier
+MAX_MISSES = 3
+
+# Seconds before a site that was moved up tries its cheapest tier again
+RELEARN_SECONDS = 7 * 24 * 3600
+
+# Shortest time between two writes of the tiers file
+SAVE_INTERVAL = 30.0
+
+
+def first_tier(site):
+    """Cheapest tier that can decide a site"""
+    return RANGE if site.check is CheckType.MESSAGE else HEAD
+
+
+def range_header(site):
+    """Range header value of the range tier, one byte is enough when the body is not read"""
+    if site.check is CheckType.MESSAGE:
+        return f"bytes=0-{min(RANGE_BYTES, site.max_bytes) - 1}"
+    return "bytes=0-0"
+
+
+def covers_body(content_range):
+    """Whether a 206 answer holds the whole body, from its Content-Range header"""
+    # bytes 0-32767/120000
+    try:
+        span, _, total = content_range.rpartition(" ")[2].partition("/")
+        end = int(span.partition("-")[2])
+        return total != "*" and int(total) <= end + 1
+    except (AttributeError, ValueError):
+        return False
+
+
+class SiteTier:
+    """Learned tier of one site"""
+
+    __slots__ = ("check", "tier", "verified", "misses", "since")
+
+    def __init__(self, check, tier, verified=0, misses=0, since=0.0):
+        self.check = check
+        self.tier = tier
+        self.verified = verified
+        self.misses = misses
+        self.since = since
+
+
+class TierTracker:
+    """
+    Probe tier of every site, shared by all searches of a process.
+
+    Args:
+        path (str): JSON file the learned tiers are kept in, None keeps them in memory only
+        verify (int): Cheap answers double-checked before a status_code or response_url site relies on them
+        max_misses (int): Fallbacks in a row before a site moves up a tier
+        relearn (float): Seconds before a site that was moved up tries its cheapest tier again
+    """
+
+    def __init__(self, path=None, verify=VERIFY_PROBES, max_misses=MAX_MISSES, relearn=RELEARN_SECONDS):
+        self.path = path
+        self.verify = verify
+        self.max_misses = max_misses
+        self.relearn = relearn
+        self._sites = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved = 0.0
+        if path is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, entry in data.items() if isinstance(data, dict) else ():
+            try:
+                if entry["tier"] in TIERS:
+                    self._sites[name] = SiteTier(entry["check"], entry["tier"], int(entry["verified"]),
+                                                 int(entry["misses"]), float(entry["since"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def _state(self, site, now):
+        state = self._sites.get(site.name)
+        cheapest = first_tier(site)
+        if state is None or state.check != site.check.value or \
+                (state.tier != cheapest and now - state.since > self.relearn):
+            state = self._sites[site.name] = SiteTier(site.check.value, cheapest, since=now)
+        return state
+
+    def tier_for(self, site):
+        """Tier the site is currently probed on"""
+        with self._lock:
+            return self._state(site, time.time()).tier
+
+    def plan(self, site):
+        """
+        How to probe a site.
+
+        Returns:
+            tuple: (tier, verify) where verify asks for a full GET to check the cheap answer
+        """
+        with self._lock:
+            state = self._state(site, time.time())
+            verify = (state.tier != GET and site.check is not CheckType.MESSAGE
+                      and state.verified < self.verify)
+            return state.tier, verify
+
+    def record(self, site, tier, cheap, full=None):
+        """
+        Learn from one tiered probe.
+
+        Args:
+            site (Site): The site that was probed
+            tier (str): Tier the cheap request was sent on
+            cheap (dict): Its result, None when it could not decide
+            full (dict): Result of the full GET sent after it, None if there was none
+        """
+        with self._lock:
+            now = time.time()
+            state = self._state(site, now)
+            if state.tier != tier:
+                return
+
+            if full is None:
+                state.misses = 0
+            elif cheap is not None:
+                if cheap["status"] == full["status"]:
+                    state.verified += 1
+                    self._dirty = self._dirty or state.verified == self.verify
+                else:
+                    self._promote(state, now)
+            elif site.check is not CheckType.MESSAGE or full["status"] == "not_found":
+                # An existing profile has no errorMsg anywhere, only a missing one past the range counts
+                state.misses += 1
+                if state.misses >= self.max_misses:
+                    self._promote(state, now)
+        self.save()
+
+    def _promote(self, state, now):
+        state.tier = TIERS[min(TIERS.index(state.tier) + 1, len(TIERS) - 1)]
+        state.verified = 0
+        state.misses = 0
+        state.since = now
+        self._dirty = True
+
+    def snapshot(self):
+        """site name -> tier"""
+        with self._lock:
+            return {name: state.tier for name, state in self._sites.items()}
+
+    def save(self, force=False):
+        """Write the learned tiers when they changed, at most every SAVE_INTERVAL seconds unless forced"""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty or (not force and time.monotonic() - self._saved < SAVE_INTERVAL):
+                return
+            data = {name: {"check": state.check, "tier": state.tier, "verified": state.verified,
+                           "misses": state.misses, "since": state.since}
+                    for name, state in self._sites.items()}
+            self._dirty = False
+            self._saved = time.monotonic()
+
+        temp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(temp, self.path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
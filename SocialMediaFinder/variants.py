@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Username Variants
+================================================
+
+People rarely hold the exact same handle everywhere. A variant search
+looks for a username together with the forms it commonly takes:
+
+    case        alice_smith, Alice_smith, ALICE_SMITH
+    separators  alice.smith, alice-smith, alicesmith
+    suffixes    alice_smith1, alice_smith01, alice_smith123
+
+Most of these reach the same profile on many sites, since a lot of them
+ignore case (see "caseInsensitive" in data.json, and per-user subdomains
+always do). The search pipeline's SharedProbes stage sends one request
+per distinct profile URL and hands its result to every variant, so
+adding variants costs far fewer requests than separate searches would.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+# Characters people swap between in a handle
+SEPARATORS = (".", "_", "-")
+
+# Numeric endings tried on every separator form
+DEFAULT_SUFFIXES = ("1", "2", "01", "123")
+
+# Most variants generated for one username, the username itself included
+MAX_VARIANTS = 32
+
+
+def separator_forms(username):
+    """username with its separators swapped for each other and dropped, username first"""
+    forms = {username: None}
+    if any(separator in username for separator in SEPARATORS):
+        for replacement in SEPARATORS + ("",):
+            form = username
+            for separator in SEPARATORS:
+                form = form.replace(separator, replacement)
+            if len(form) >= 2:
+                forms[form] = None
+    return list(forms)
+
+
+def expand_username(username, suffixes=DEFAULT_SUFFIXES, limit=MAX_VARIANTS):
+    """
+    Candidate usernames for a variant search.
+
+    Args:
+        username (str): The username as given
+        suffixes (tuple): Endings appended to each separator form
+        limit (int): Most variants returned
+
+    Returns:
+        list: Distinct variants, username itself first and closest forms before suffixed ones
+    """
+    variants = {}
+    forms = separator_forms(username)
+    for form in forms:
+        for variant in (form, form.lower(), form.capitalize(), form.upper()):
+            variants.setdefault(variant, None)
+    for form in forms:
+        for suffix in suffixes:
+            variants.setdefault(form + suffix, None)
+    return list(variants)[:max(1, limit)]
+
+
+def expand_usernames(usernames, **kwargs):
+    """Variants of every username in order, without duplicates, see expand_username()"""
+    expanded = {}
+    for username in usernames:
+        for variant in expand_username(username, **kwargs):
+            expanded.setdefault(variant, None)
+    return list(expanded)
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Distributed Workers
+==================================================
+
+Runs probes on worker processes, on this machine or on others, so scan
+capacity is not bound to the one interpreter serving the web app:
+
+    web app --(username, site) tasks--> broker --> workers
+    web app <--------- results -------- broker <---'
+
+The web app's pipeline hands its probes to a Dispatcher in place of a
+probe engine. Tasks travel through a broker, queues served over TCP by
+multiprocessing.managers: a stand-in for Redis that needs nothing
+installed. Workers probe with the usual engine (check_site), each with
+its own threads, connection pool, DNS cache, health tracker and rate
+limiter, and send every result back to the queue of the process that
+asked for it, which hands it to the search stream it belongs to. Tasks
+carry their site's data.json entry, so workers need no copy of it.
+
+Tasks are sharded by host: every probe of a host goes to the same shard
+and each worker serves one shard, so a worker keeps warm connections to
+its own subset of hosts and a host's rate limit is enforced in one place.
+Capacity grows with the number of workers; run one per shard, and more
+on a shard to add capacity to it.
+
+    export SHERLOCK_WORKERS_AUTHKEY=secret
+    python workers.py broker --listen 0.0.0.0:5050 --shards 4
+    python workers.py worker --connect broker-host:5050     (4 times, on any node)
+
+The web app uses them with SHERLOCK_BACKEND=workers and
+SHERLOCK_WORKERS_ADDRESS=broker-host:5050. Without an address it serves
+a broker on localhost and starts SHERLOCK_WORKER_PROCESSES workers of
+its own, one shard each.
+
+Another queue plugs in as an object with the methods of ManagerBroker.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import argparse
+import atexit
+import itertools
+import logging
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from multiprocessing.managers import BaseManager
+
+from dnscache import DnsCache
+from engine import CANCEL_POLL, DEFAULT_WORKERS, check_site, error_result
+from health import HealthTracker
+from http_pool import HttpPool
+from manifest import Site
+from metrics import ProbeTrace
+from ratelimit import load_rate_limits
+
+# Environment variable holding the key workers and web apps authenticate to the broker with
+AUTHKEY_ENV = "SHERLOCK_WORKERS_AUTHKEY"
+
+# Shards of a broker started without --shards
+DEFAULT_SHARDS = 4
+
+# Probes one worker runs at the same time
+DEFAULT_WORKER_THREADS = 50
+
+# Seconds a worker waits for a single site before giving up
+DEFAULT_TIMEOUT = 10
+
+# Seconds from queuing a task to its result coming back, after which it is reported as an error
+ANSWER_TIMEOUT = 60
+
+# Seconds a worker or dispatcher blocks on an empty queue before checking whether it should stop
+POLL_SECONDS = 1.0
+
+# Seconds the broker remembers a cancelled search, its queued tasks are dropped until then
+CANCEL_TTL = 600
+
+# Errors of a broker that went away
+BROKER_ERRORS = (OSError, EOFError)
+
+log = logging.getLogger("sherlock")
+
+
+def shard_of(site, shards):
+    """Shard of a site's tasks, the same for every site of a host"""
+    return zlib.crc32(site.host.encode("utf-8")) % shards
+
+
+def parse_address(address):
+    """(host, port) of "host:port" """
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class _BrokerState:
+    """The broker's queues and bookkeeping, lives in the broker process"""
+
+    def __init__(self, shards):
+        self._shards = shards
+        self._queues = {}
+        self._cancelled = {}
+        self._claims = 0
+        self._lock = threading.Lock()
+
+    def queue(self, name):
+        with self._lock:
+            return self._queues.setdefault(name, queue.Queue())
+
+    def shards(self):
+        return self._shards
+
+    def claim(self):
+        """Next shard for a worker that did not pick one, round robin"""
+        with self._lock:
+            shard = self._claims % self._shards
+            self._claims += 1
+            return shard
+
+    def cancel(self, search_id):
+        now = time.monotonic()
+        with self._lock:
+            self._cancelled = {key: at for key, at in self._cancelled.items() if now - at < CANCEL_TTL}
+            self._cancelled[search_id] = now
+
+    def cancelled(self, search_ids):
+        with self._lock:
+            return [search_id for search_id in search_ids if search_id in self._cancelled]
+
+
+class _BrokerClient(BaseManager):
+    pass
+
+
+_BrokerClient.register("queue")
+_BrokerClient.register("state")
+
+
+def serve_broker(address, authkey, shards=DEFAULT_SHARDS):
+    """
+    Broker server with shards task queues, run it with serve_forever().
+
+    Its address, with the port picked when 0 was asked for, is server.address.
+    """
+    state = _BrokerState(shards)
+    server_class = type("_BrokerServer", (BaseManager,), {})
+    server_class.register("queue", callable=state.queue)
+    server_class.register("state", callable=lambda: state)
+    return server_class(address=address, authkey=authkey).get_server()
+
+
+class ManagerBroker:
+    """
+    Connection to a broker served by serve_broker().
+
+    Args:
+        address (tuple): (host, port) of the broker
+        authkey (bytes): Key the broker was started with
+
+    Raises:
+        ValueError: If authkey is empty
+        OSError: If the broker cannot be reached
+    """
+
+    def __init__(self, address, authkey):
+        if not authkey:
+            raise ValueError(f"A broker needs an authkey, set {AUTHKEY_ENV}")
+        self._manager = _BrokerClient(address=address, authkey=authkey)
+        self._manager.connect()
+        self._state = self._manager.state()
+        self.shards = self._state.shards()
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, name):
+        with self._lock:
+            proxy = self._queues.get(name)
+            if proxy is None:
+                proxy = self._queues[name] = self._manager.queue(name)
+            return proxy
+
+    def _get(self, name, timeout):
+        try:
+            return self._queue(name).get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put_tasks(self, shard, tasks):
+        """Queue a list of tasks on a shard"""
+        self._queue(f"tasks-{shard}").put(tasks)
+
+    def get_tasks(self, shard, timeout):
+        """Next list of tasks of a shard, None if there was none within timeout seconds"""
+        return self._get(f"tasks-{shard}", timeout)
+
+    def put_results(self, reply_to, results):
+        """Send a list of results to the dispatcher listening on reply_to"""
+        self._queue(reply_to).put(results)
+
+    def get_results(self, reply_to, timeout):
+        """Next list of results sent to reply_to, None if there was none within timeout seconds"""
+        return self._get(reply_to, timeout)
+
+    def claim_shard(self):
+        return self._state.claim()
+
+    def cancel(self, search_id):
+        """Drop the tasks of a search that are still queued"""
+        self._state.cancel(search_id)
+
+    def cancelled(self, search_ids):
+        """Those of search_ids that were cancelled"""
+        return set(self._state.cancelled(list(search_ids)))
+
+
+class Dispatcher:
+    """
+    Probe engine that runs every probe on a worker.
+
+    Used in place of the engine module, Pipeline(..., probe_engine=Dispatcher(broker)).
+
+    Args:
+        broker (ManagerBroker): Queues to the workers, or another object with its methods
+        answer_timeout (float): Seconds from queuing a probe to its result coming back,
+            after which the probe is reported as an error
+    """
+
+    def __init__(self, broker, answer_timeout=ANSWER_TIMEOUT):
+        self.broker = broker
+        self.answer_timeout = answer_timeout
+        self.reply_to = f"results-{uuid.uuid4().hex}"
+        self._searches = {}
+        self._lock = threading.Lock()
+        self._reader = None
+
+    def _read(self):
+        """Hand every result sent back to this process to the search that asked for it"""
+        while True:
+            try:
+                results = self.broker.get_results(self.reply_to, POLL_SECONDS)
+            except BROKER_ERRORS as e:
+                # Searches waiting on the results report them once their answer timeout passes
+                log.warning("Worker broker unreachable: %r", e)
+                time.sleep(POLL_SECONDS)
+                continue
+            for search_id, seq, result in results or ():
+                with self._lock:
+                    arrived = self._searches.get(search_id)
+                if arrived is not None:
+                    arrived.put((seq, result))
+
+    def probe_pairs(self, pairs, max_workers=DEFAULT_WORKERS, timeout=None, metrics=None, cancel=None, **_):
+        """
+        Check (username, site) pairs on the workers, see engine.probe_pairs().
+
+        Up to twice max_workers probes of the search are queued or running
+        at a time. Health, rate limits, tiers and connections are the
+        workers' own, so only timeout, metrics and cancel apply here.
+
+        Yields:
+            tuple: (username, index, result) in completion order
+        """
+        with self._lock:
+            if self._reader is None:
+                self._reader = threading.Thread(target=self._read, name="worker-results", daemon=True)
+                self._reader.start()
+            search_id = uuid.uuid4().hex
+            arrived = self._searches[search_id] = queue.Queue()
+
+        pairs = iter(pairs)
+        window = max(1, max_workers) * 2
+        seqs = itertools.count()
+        # seq -> [username, site, queued at, answer deadline]
+        pending = {}
+
+        def fill():
+            batches = {}
+            now = time.monotonic()
+            expires = time.time() + self.answer_timeout
+            for username, site in islice(pairs, window - len(pending)):
+                seq = next(seqs)
+                pending[seq] = [username, site, now, now + self.answer_timeout]
+                batches.setdefault(shard_of(site, self.broker.shards), []).append(
+                    (self.reply_to, search_id, seq, username, site.name, site.digest, site.info, timeout, expires))
+                if metrics is not None:
+                    metrics.probe_started()
+            for shard, tasks in batches.items():
+                try:
+                    self.broker.put_tasks(shard, tasks)
+                except BROKER_ERRORS as e:
+                    log.warning("Worker broker unreachable: %r", e)
+                    for task in tasks:
+                        pending[task[2]][3] = now
+
+        def finished(seq, result):
+            username, site, queued, _ = pending.pop(seq)
+            if metrics is not None:
+                metrics.probe_finished(site.name, result, time.monotonic() - queued, ProbeTrace())
+            return username, site.index, result
+
+        complete = False
+        try:
+            fill()
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    return
+                try:
+                    seq, result = arrived.get(timeout=CANCEL_POLL)
+                    # A result that comes back after its deadline was already reported
+                    if seq in pending:
+                        yield finished(seq, result)
+                except queue.Empty:
+                    pass
+
+                now = time.monotonic()
+                for seq in [seq for seq, entry in pending.items() if entry[3] <= now]:
+                    username, site = pending[seq][:2]
+                    yield finished(seq, error_result(site.name, site.url_for(username), "No worker answered"))
+                fill()
+            complete = True
+        finally:
+            with self._lock:
+                del self._searches[search_id]
+            if metrics is not None:
+                for _ in pending:
+                    metrics.in_flight.dec()
+            if not complete:
+                try:
+                    self.broker.cancel(search_id)
+                except BROKER_ERRORS:
+                    pass
+
+
+def run_worker(broker, shards=None, max_workers=DEFAULT_WORKER_THREADS, timeout=DEFAULT_TIMEOUT,
+               rate_limits="ratelimits.json", stop=None):
+    """
+    Probe the tasks of some shards until stop is set or the broker goes away.
+
+    Args:
+        broker (ManagerBroker): Queues of the tasks and results
+        shards (list): Shards to serve, None lets the broker assign one
+        max_workers (int): Probes running at the same time
+        timeout (float): Longest wait for a single site, tasks may ask for less
+        rate_limits (str): Location of ratelimits.json
+        stop (threading.Event): Ends the worker once set
+    """
+    shards = list(shards) if shards else [broker.claim_shard()]
+    stop = stop or threading.Event()
+    dns = DnsCache()
+    # Every probe of a host comes to the same worker, so it may need many connections to it
+    session = HttpPool(pool_maxsize=max_workers, dns=dns)
+    health = HealthTracker(default_timeout=timeout, max_timeout=timeout)
+    limiter = load_rate_limits(rate_limits)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="probe")
+    slots = threading.BoundedSemaphore(max_workers)
+    replies = queue.Queue()
+    sites = {}
+    sites_lock = threading.Lock()
+    log.info("Worker serving shard %s of %d", ", ".join(map(str, shards)), broker.shards)
+
+    def site_for(name, digest, info):
+        # Compiled once per data.json entry, a changed entry has another digest
+        key = (name, digest)
+        with sites_lock:
+            site = sites.get(key)
+            if site is None:
+                site = sites[key] = Site(name, len(sites), info)
+                # "rateLimit" entries of the sites seen so far
+                limiter.use_sites(tuple(sites.values()))
+            return site
+
+    def probe(task):
+        reply_to, search_id, seq, username, name, digest, info, task_timeout, _ = task
+        try:
+            site = site_for(name, digest, info)
+            result = check_site(site, username, timeout=min(task_timeout or timeout, timeout), session=session,
+                                health=health, limiter=limiter, owner=search_id)
+        except Exception as e:
+            result = error_result(name, "", f"Error: {str(e)}")
+        finally:
+            slots.release()
+        replies.put((reply_to, (search_id, seq, result)))
+
+    def send():
+        # Results that finished while the last batch was being sent go out together
+        while True:
+            item = replies.get()
+            if item is None:
+                return
+            batches = {}
+            while item is not None:
+                batches.setdefault(item[0], []).append(item[1])
+                try:
+                    item = replies.get_nowait()
+                except queue.Empty:
+                    item = None
+            try:
+                for reply_to, results in batches.items():
+                    broker.put_results(reply_to, results)
+            except BROKER_ERRORS as e:
+                log.warning("Worker broker unreachable: %r", e)
+                stop.set()
+                return
+
+    sender = threading.Thread(target=send, name="worker-send", daemon=True)
+    sender.start()
+    poll = POLL_SECONDS / len(shards)
+    try:
+        while not stop.is_set():
+            for shard in shards:
+                tasks = broker.get_tasks(shard, poll)
+                if not tasks:
+                    continue
+                cancelled = broker.cancelled({task[1] for task in tasks})
+                for task in tasks:
+                    slots.acquire()
+                    # Checked once a thread is free, the task may have waited for it
+                    if task[1] in cancelled or task[8] < time.time():
+                        slots.release()
+                        continue
+                    executor.submit(probe, task)
+    except BROKER_ERRORS as e:
+        log.warning("Worker broker unreachable: %r", e)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        replies.put(None)
+        sender.join(POLL_SECONDS)
+        session.close()
+
+
+def start_local_workers(processes, max_workers=DEFAULT_WORKER_THREADS, timeout=DEFAULT_TIMEOUT):
+    """
+    Serve a broker on localhost and start worker processes on it, one shard each.
+
+    The workers are stopped when this process exits, and stop on their
+    own when the broker goes away with it.
+
+    Returns:
+        ManagerBroker: Connection to the broker
+    """
+    processes = max(1, processes)
+    authkey = secrets.token_hex(16)
+    server = serve_broker(("127.0.0.1", 0), authkey.encode(), processes)
+    threading.Thread(target=server.serve_forever, name="worker-broker", daemon=True).start()
+
+    host, port = server.address
+    env = dict(os.environ, **{AUTHKEY_ENV: authkey})
+    script = os.path.abspath(__file__)
+    children = [subprocess.Popen([sys.executable, script, "worker", "--connect", f"{host}:{port}",
+                                  "--shard", str(shard), "--threads", str(max_workers), "--timeout", str(timeout)],
+                                 env=env)
+                for shard in range(processes)]
+
+    def stop_children():
+        for child in children:
+            child.terminate()
+        for child in children:
+            try:
+                child.wait(5)
+            except subprocess.TimeoutExpired:
+                child.kill()
+
+    atexit.register(stop_children)
+    return ManagerBroker(server.address, authkey.encode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Social Media Username Finder - Broker and workers of the distributed probe mode',
+        epilog=f'The broker and its workers authenticate with the key in {AUTHKEY_ENV}'
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    broker_parser = commands.add_parser("broker", help="Serve the task and result queues")
+    broker_parser.add_argument('--listen', default="127.0.0.1:5050", metavar="HOST:PORT",
+                               help="Address to serve on (default: 127.0.0.1:5050)")
+    broker_parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS,
+                               help=f"Task queues, one per worker (default: {DEFAULT_SHARDS})")
+    worker_parser = commands.add_parser("worker", help="Probe the tasks of a shard")
+    worker_parser.add_argument('--connect', default="127.0.0.1:5050", metavar="HOST:PORT",
+                               help="Address of the broker (default: 127.0.0.1:5050)")
+    worker_parser.add_argument('--shard', type=int, action="append",
+                               help="Shard to serve, repeat for several (default: the broker assigns one)")
+    worker_parser.add_argument('--threads', type=int, default=DEFAULT_WORKER_THREADS,
+                               help=f"Probes running at the same time (default: {DEFAULT_WORKER_THREADS})")
+    worker_parser.add_argument("-t", '--timeout', type=float, default=DEFAULT_TIMEOUT,
+                               help=f"Seconds to wait for a single site (default: {DEFAULT_TIMEOUT})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    authkey = os.environ.get(AUTHKEY_ENV, "").encode()
+    if not authkey:
+        parser.error(f"{AUTHKEY_ENV} must be set")
+
+    if args.command == "broker":
+        if args.shards < 1:
+            parser.error("--shards must be at least 1")
+        server = serve_broker(parse_address(args.listen), authkey, args.shards)
+        log.info("Broker with %d shards on %s:%d", args.shards, *server.address)
+        server.serve_forever()
+    else:
+        try:
+            broker = ManagerBroker(parse_address(args.connect), authkey)
+        except BROKER_ERRORS as e:
+            parser.exit(1, f"Cannot reach the broker at {args.connect}: {e}\n")
+        if args.shard and not all(0 <= shard < broker.shards for shard in args.shard):
+            parser.error(f"--shard must be between 0 and {broker.shards - 1}")
+        try:
+            run_worker(broker, args.shard, max_workers=args.threads, timeout=args.timeout)
+        except KeyboardInterrupt:
+            pass
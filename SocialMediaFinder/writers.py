@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Social Media Username Finder - Result Writers
+=============================================
+
+Saves search results to disk. One writer per output file, in one of four
+formats:
+
+    txt     the URL of every profile found, one per line (the classic <username>.txt)
+    jsonl   every result as a JSON object on its own line, with its username
+    csv     every result as a row: username, platform, status, url, message
+    sqlite  every result as a row of a "results" table
+
+Writes are buffered, so a bulk search saves thousands of results with a
+handful of system calls instead of opening the file once per hit. The
+file is written under a temporary name next to its destination and only
+renamed over it once the search is complete, so readers never see half
+a file and two searches saving the same name cannot interleave their
+lines: the last one to finish wins. A search that fails or is abandoned
+leaves the previous file untouched.
+
+Author: Aditya Deore
+Date: September 2025
+Repository: sherlok-finds
+"""
+
+import csv
+import json
+import os
+import re
+import sqlite3
+import tempfile
+
+# Buffer of the text formats, flushed to the temporary file when full
+BUFFER_BYTES = 1024 * 1024
+
+# Rows the SQLite writer inserts at a time
+BUFFER_ROWS = 1000
+
+COLUMNS = ("username", "platform", "status", "url", "message")
+
+# Temporary files are private, finished ones get the usual permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def safe_name(name):
+    """name usable as a file name, never a path"""
+    return re.sub(r"[^\w.\-]", "_", name).lstrip(".") or "_"
+
+
+class ResultWriter:
+    """
+    Buffered writer of one results file, renamed into place on close().
+
+    Use as a context manager: the file is kept when the block completes
+    and discarded when it raises.
+
+    Args:
+        path (str): Destination of the file
+    """
+
+    extension = ""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            os.chmod(self.temp, 0o666 & ~_UMASK)
+            self._open(fd)
+        except BaseException:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+            os.unlink(self.temp)
+            raise
+
+    def _open(self, fd):
+        self._file = open(fd, "w", buffering=BUFFER_BYTES, encoding="utf-8", newline="")
+
+    def write(self, username, result):
+        """Add the result of one site for username"""
+        self._write(username, result)
+        self.count += 1
+
+    def write_many(self, rows):
+        """Add (username, result) pairs"""
+        for username, result in rows:
+            self.write(username, result)
+
+    def close(self):
+        """Finish the file and move it to its destination"""
+        if self.temp is None:
+            return
+        try:
+            self._finish()
+            os.replace(self.temp, self.path)
+        except BaseException:
+            self.discard()
+            raise
+        self.temp = None
+
+    def discard(self):
+        """Drop everything written, the destination keeps its previous content"""
+        if self.temp is None:
+            return
+        try:
+            self._abort()
+        finally:
+            try:
+                os.unlink(self.temp)
+            except OSError:
+                pass
+            self.temp = None
+
+    def _finish(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def _abort(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class TextWriter(ResultWriter):
+    """URL of every profile found, one per line"""
+
+    extension = "txt"
+
+    def _write(self, username, result):
+        if result["status"] == "found":
+            self._file.write(result["url"] + "\n")
+
+
+class JsonLinesWriter(ResultWriter):
+    """Every result as one JSON object per line"""
+
+    extension = "jsonl"
+
+    def _write(self, username, result):
+        self._file.write(json.dumps({"username": username, **result}) + "\n")
+
+
+class CsvWriter(ResultWriter):
+    """Every result as a CSV row, with a header"""
+
+    extension = "csv"
+
+    def _open(self, fd):
+        super()._open(fd)
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(COLUMNS)
+
+    def _write(self, username, result):
+        self._csv.writerow((username, result["platform"], result["status"], result["url"], result["message"]))
+
+
+class SQLiteWriter(ResultWriter):
+    """Every result as a row of a "results" table"""
+
+    extension = "db"
+
+    def _open(self, fd):
+        os.close(fd)
+        self._db = sqlite3.connect(self.temp, check_same_thread=False)
+        # The file is only renamed into place once complete, so no journal is needed
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE results (username TEXT, platform TEXT, status TEXT, url TEXT, message TEXT)")
+        self._rows = []
+
+    def _write(self, username, result):
+        self._rows.append((username, result["platform"], result["status"], result["url"], result["message"]))
+        if len(self._rows) >= BUFFER_ROWS:
+            self._flush()
+
+    def _flush(self):
+        self._db.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?)", self._rows)
+        self._rows = []
+
+    def _finish(self):
+        self._flush()
+        self._db.commit()
+        self._db.close()
+        fd = os.open(self.temp, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _abort(self):
+        self._db.close()
+
+
+FORMATS = {"txt": TextWriter, "jsonl": JsonLinesWriter, "csv": CsvWriter, "sqlite": SQLiteWriter}
+
+
+def open_writer(directory, name, format="txt"):
+    """
+    Writer of <directory>/<name>.<extension> in the given format.
+
+    Raises:
+        ValueError: If the format is unknown
+        OSError: If the directory cannot be created or written to
+    """
+    try:
+        writer_class = FORMATS[format]
+    except KeyError:
+        raise ValueError(f"Unknown output format {format!r}, expected one of {', '.join(FORMATS)}") from None
+    return writer_class(os.path.join(directory or ".", f"{safe_name(name)}.{writer_class.extension}"))
+
+
+def replace_file(path, text):
+    """Write text to path in full under a temporary name, then rename it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        os.chmod(temp, 0o666 & ~_UMASK)
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+def recorded(results, writer):
+    """Pass (username, index, result) tuples through, saving each result with writer"""
+    for username, index, result in results:
+        writer.write(username, result)
+        yield username, index, result